@@ -0,0 +1,189 @@
+"""
+Cached token authentication for the BarBuzz API.
+
+DRF's TokenAuthentication looks up the token and its user with a join on
+every request. CachedTokenAuthentication resolves the token from a small
+in-process LRU first, then from the shared cache (Redis in production),
+and only falls back to the database on a miss. Entries expire after a short
+TTL and are dropped on logout.
+
+Only plain field values are cached (CACHED_TOKEN_FIELDS and
+CACHED_USER_FIELDS), never the password hash or the rest of the user row;
+each request gets Token and User instances built from them.
+
+Logout drops the entries of the worker handling it and the shared entry.
+Other workers keep accepting the token for up to
+AUTH_TOKEN_LOCAL_CACHE_TIMEOUT seconds (1 by default; 0 turns the local
+tier off). Deactivating a user does not
+touch the caches, so it takes effect after AUTH_TOKEN_CACHE_TIMEOUT plus
+AUTH_TOKEN_LOCAL_CACHE_TIMEOUT seconds at most.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+# Fields kept in the caches; everything else loads lazily if a view asks for it
+CACHED_TOKEN_FIELDS = ('key', 'user_id', 'created')
+CACHED_USER_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name',
+    'is_active', 'is_staff', 'is_superuser', 'last_login', 'date_joined',
+)
+
+
+class LocalTokenCache:
+    """
+    Thread-safe LRU of cached token entries with a per-entry TTL.
+
+    Entries hold field values only and are never modified, so they can be
+    shared between threads; instances are built from them per request.
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return data
+
+    def set(self, key, data):
+        if self.timeout <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_token_cache = LocalTokenCache(
+    settings.AUTH_TOKEN_LOCAL_CACHE_SIZE,
+    settings.AUTH_TOKEN_LOCAL_CACHE_TIMEOUT,
+)
+
+
+def token_cache_key(key):
+    """
+    Return the shared cache key for a token.
+
+    The key is hashed so raw tokens never appear in Redis key listings.
+    """
+    return f"auth_token_v2_{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def token_entry(token):
+    """
+    Return the cached form of a token: its and its user's field values.
+
+    Args:
+        token (Token): Token with its `user` relation loaded
+    """
+    return (
+        {field: getattr(token, field) for field in CACHED_TOKEN_FIELDS},
+        {field: getattr(token.user, field) for field in CACHED_USER_FIELDS},
+    )
+
+
+def _from_values(model, values):
+    # from_db() takes the values in concrete field order
+    names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+    return model.from_db(None, names, [values[name] for name in names])
+
+
+def token_from_entry(model, entry):
+    """
+    Build a Token and its User from a cached entry.
+
+    Fields that are not cached (e.g. the password) are deferred and load
+    from the database on access.
+    """
+    token_values, user_values = entry
+    token = _from_values(model, token_values)
+    token.user = _from_values(get_user_model(), user_values)
+    return token
+
+
+def cache_token(token):
+    """
+    Store a token with its user in both cache tiers.
+
+    Args:
+        token (Token): Token with its `user` relation loaded
+    """
+    cache_key = token_cache_key(token.key)
+    entry = token_entry(token)
+    cache.set(cache_key, entry, timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT)
+    local_token_cache.set(cache_key, entry)
+
+
+def invalidate_token(key):
+    """
+    Drop a token from both cache tiers, e.g. on logout.
+
+    Other worker processes keep their local copy for at most
+    AUTH_TOKEN_LOCAL_CACHE_TIMEOUT seconds.
+
+    Args:
+        key (str): Token key
+    """
+    cache_key = token_cache_key(key)
+    local_token_cache.delete(cache_key)
+    cache.delete(cache_key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that caches the token -> user lookup.
+
+    Accepts the same "Authorization: Token <key>" header and raises the
+    same errors as TokenAuthentication.
+    """
+
+    def authenticate_credentials(self, key):
+        model = self.get_model()
+        cache_key = token_cache_key(key)
+        entry = local_token_cache.get(cache_key)
+        if entry is None:
+            entry = cache.get(cache_key)
+            if entry is None:
+                try:
+                    token = model.objects.select_related('user').get(key=key)
+                except model.DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_('Invalid token.'))
+                entry = token_entry(token)
+                cache.set(cache_key, entry, timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT)
+            local_token_cache.set(cache_key, entry)
+        token = token_from_entry(model, entry)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
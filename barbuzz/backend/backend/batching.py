@@ -0,0 +1,159 @@
+"""
+Write batching for the BarBuzz maintenance commands.
+
+BatchWriter replaces per-row ``save()`` calls: it compares new values with
+the loaded ones, keeps only rows that actually changed, and writes them
+with ``bulk_update`` restricted to the changed fields, one transaction per
+batch. bulk_update bypasses save() and its signals, so the writer handles
+the bookkeeping those would have done (``updated_at``, cache versions,
+derived tables) through its ``after_flush`` hook.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import bump_bar_data_version
+
+
+class BatchWriter:
+    """
+    Accumulate field changes and deletions, and flush them in batches.
+
+    Use as a context manager so the last partial batch is flushed:
+
+        with bar_writer() as writer:
+            for bar in Bar.objects.iterator():
+                writer.update(bar, website=...)
+
+    Args:
+        model: Model class of the instances written
+        batch_size (int): Rows per flush (and per bulk_update query)
+        touch (str, optional): auto_now field set on every changed row
+        after_flush (callable, optional): after_flush(changed, deleted_pks),
+            called inside the flush transaction; `changed` maps each written
+            instance to the set of fields that changed
+    """
+
+    def __init__(self, model, batch_size=500, touch=None, after_flush=None):
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.touch = touch
+        self.after_flush = after_flush
+        self.updated = 0
+        self.deleted = 0
+        self._dirty = {}
+        self._deleted_pks = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Flush what was already processed even if the run was interrupted
+        self.flush()
+        return False
+
+    @property
+    def pending(self):
+        return len(self._dirty) + len(self._deleted_pks)
+
+    def update(self, instance, **values):
+        """
+        Set field values on `instance`, recording only the ones that change.
+
+        Values are normalized with the field's to_python() before comparing,
+        so e.g. a float rating equal to the stored Decimal is not a change.
+
+        Args:
+            instance: Saved model instance, with the given fields loaded
+            **values: Field name to new value
+
+        Returns:
+            bool: Whether any field changed
+        """
+        changed = set()
+        for name, value in values.items():
+            field = self.model._meta.get_field(name)
+            if value is not None:
+                value = field.to_python(value)
+            if getattr(instance, field.attname) != value:
+                setattr(instance, field.attname, value)
+                changed.add(field.name)
+        if not changed:
+            return False
+        if instance.pk in self._dirty:
+            self._dirty[instance.pk][1].update(changed)
+        else:
+            self._dirty[instance.pk] = (instance, changed)
+        self._maybe_flush()
+        return True
+
+    def delete(self, instance):
+        """Schedule `instance` for deletion in the next flush."""
+        self._dirty.pop(instance.pk, None)
+        self._deleted_pks.add(instance.pk)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all pending changes in one transaction.
+
+        Rows are grouped by their set of changed fields, so each bulk_update
+        writes only columns that changed.
+        """
+        if not self.pending:
+            return
+        dirty, self._dirty = self._dirty, {}
+        deleted_pks, self._deleted_pks = self._deleted_pks, set()
+
+        if self.touch:
+            now = timezone.now()
+            for instance, fields in dirty.values():
+                setattr(instance, self.touch, now)
+                fields.add(self.touch)
+
+        groups = defaultdict(list)
+        for instance, fields in dirty.values():
+            groups[frozenset(fields)].append(instance)
+
+        with transaction.atomic():
+            for fields, instances in groups.items():
+                self.model.objects.bulk_update(instances, fields=sorted(fields), batch_size=self.batch_size)
+            if deleted_pks:
+                self.model.objects.filter(pk__in=deleted_pks).delete()
+            if self.after_flush is not None:
+                self.after_flush(
+                    {instance: fields for instance, fields in dirty.values()}, deleted_pks
+                )
+
+        self.updated += len(dirty)
+        self.deleted += len(deleted_pks)
+
+
+def _after_bar_flush(changed, deleted_pks):
+    from .models import BarOpeningInterval
+
+    hours_changed = [bar for bar, fields in changed.items() if 'hours' in fields]
+    if hours_changed:
+        BarOpeningInterval.objects.sync(hours_changed)
+    if changed:
+        # Deletions already bumped it through the post_delete signal
+        transaction.on_commit(bump_bar_data_version)
+
+
+def bar_writer(batch_size=500):
+    """
+    Return a BatchWriter for Bar rows.
+
+    Changed rows get a fresh updated_at, rows whose hours changed get their
+    opening intervals recompiled, and the bar data version is bumped once
+    per flush.
+    """
+    from .models import Bar
+
+    return BatchWriter(Bar, batch_size=batch_size, touch='updated_at', after_flush=_after_bar_flush)
@@ -0,0 +1,192 @@
+"""
+Application-level caching helpers for the BarBuzz API.
+
+Holds the bar data version counter, which is bumped on every write to the
+Bar table and embedded in cache keys so that stale entries are never read
+again, the rendered-response cache for bar lists, the per-user set of
+favorite bars, and daily per-bar request counters.
+"""
+
+import datetime
+import hashlib
+import time
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+BAR_DATA_VERSION_KEY = "bar_data_version"
+
+# A user's favorite bars, by primary key and by Google place_id. `version`
+# changes every time the set is rebuilt, so it can be used in cache keys.
+FavoriteIds = namedtuple('FavoriteIds', ['bar_ids', 'place_ids', 'version'])
+
+
+def get_bar_data_version():
+    """
+    Return the current bar data version.
+
+    The counter is seeded from the clock, so a counter lost to eviction or a
+    cache flush never comes back with a value that old entries were keyed on.
+
+    Returns:
+        int: Current version
+    """
+    version = cache.get(BAR_DATA_VERSION_KEY)
+    if version is None:
+        cache.add(BAR_DATA_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(BAR_DATA_VERSION_KEY)
+    return version
+
+
+def bump_bar_data_version():
+    """
+    Invalidate everything keyed on the bar data version.
+
+    Called from the Bar post_save/post_delete signals; bulk writes that
+    bypass signals must call it themselves.
+    """
+    try:
+        cache.incr(BAR_DATA_VERSION_KEY)
+    except ValueError:
+        cache.add(BAR_DATA_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def quantize_coordinate(value):
+    """
+    Round a coordinate to the bar list cache grid.
+
+    Args:
+        value (float): Latitude or longitude in decimal degrees
+
+    Returns:
+        float: Coordinate rounded to BAR_LIST_CACHE_COORD_PRECISION decimals
+    """
+    return round(value, settings.BAR_LIST_CACHE_COORD_PRECISION)
+
+
+def bar_list_cache_key(params):
+    """
+    Build the response cache key for normalized bar list parameters.
+
+    Args:
+        params (dict): Normalized list parameters
+
+    Returns:
+        str: Cache key including the current bar data version
+    """
+    normalized = repr(sorted(params.items()))
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f"bar_list_{get_bar_data_version()}_{digest}"
+
+
+def get_cached_response(cache_key):
+    """
+    Fetch a cached rendered response.
+
+    Args:
+        cache_key (str): Key from bar_list_cache_key
+
+    Returns:
+        tuple: (etag, content type, content bytes), or None on a miss
+    """
+    return cache.get(cache_key)
+
+
+def set_cached_response(cache_key, etag, content_type, content):
+    """
+    Store a rendered response.
+
+    Args:
+        cache_key (str): Key from bar_list_cache_key
+        etag (str): ETag of the response
+        content_type (str): Content-Type header of the response
+        content (bytes): Rendered response body
+    """
+    cache.set(cache_key, (etag, content_type, content), timeout=settings.BAR_LIST_CACHE_TIMEOUT)
+
+
+def favorite_ids_cache_key(user_id):
+    return f"favorite_ids_{user_id}"
+
+
+def get_favorite_ids(user):
+    """
+    Return the user's favorite bar ids, from the cache or one query.
+
+    Args:
+        user: User whose favorites are looked up
+
+    Returns:
+        FavoriteIds: Favorite bar ids and place ids, or None for anonymous users
+    """
+    if not user.is_authenticated:
+        return None
+    cache_key = favorite_ids_cache_key(user.pk)
+    favorite_ids = cache.get(cache_key)
+    if favorite_ids is None:
+        from .models import Favorite
+
+        rows = list(Favorite.objects.filter(user=user).values_list('bar_id', 'bar__place_id'))
+        favorite_ids = FavoriteIds(
+            bar_ids=frozenset(bar_id for bar_id, _ in rows),
+            place_ids=frozenset(place_id for _, place_id in rows),
+            version=time.time_ns(),
+        )
+        cache.set(cache_key, favorite_ids, timeout=settings.FAVORITE_IDS_CACHE_TIMEOUT)
+    return favorite_ids
+
+
+def invalidate_favorite_ids(user_id):
+    """
+    Drop the cached favorite set after the user's favorites change.
+
+    Args:
+        user_id (int): Primary key of the user
+    """
+    cache.delete(favorite_ids_cache_key(user_id))
+
+
+def bar_requests_cache_key(day, bar_id):
+    return f"bar_requests_{day.isoformat()}_{bar_id}"
+
+
+def record_bar_request(bar_id):
+    """
+    Count a request for a bar in today's counter.
+
+    Args:
+        bar_id (int): Primary key of the requested bar
+    """
+    cache_key = bar_requests_cache_key(datetime.date.today(), bar_id)
+    try:
+        cache.incr(cache_key)
+    except ValueError:
+        if not cache.add(cache_key, 1, timeout=settings.BAR_REQUESTS_RETENTION_DAYS * 86400):
+            cache.incr(cache_key)
+
+
+def get_bar_request_counts(bar_ids, days=7):
+    """
+    Sum the daily request counters of bars over the last `days` days.
+
+    Args:
+        bar_ids (iterable): Bar primary keys
+        days (int): Number of days, today included
+
+    Returns:
+        dict: Bar id to request count, for bars with any requests
+    """
+    today = datetime.date.today()
+    dates = [today - datetime.timedelta(days=offset) for offset in range(days)]
+    bar_ids = list(bar_ids)
+    counts = defaultdict(int)
+    for start in range(0, len(bar_ids), 1000):
+        keys = {
+            bar_requests_cache_key(day, bar_id): bar_id
+            for bar_id in bar_ids[start:start + 1000]
+            for day in dates
+        }
+        for key, count in cache.get_many(keys).items():
+            counts[keys[key]] += count
+    return dict(counts)
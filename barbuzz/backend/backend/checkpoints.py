@@ -0,0 +1,107 @@
+"""
+Checkpointing for the long-running Places maintenance commands.
+
+A command processes its rows in primary key order and records its progress
+in CommandCheckpoint. Because the runner finishes items out of order, the
+saved position is a low-water mark: the highest primary key below which
+every started item is done. Before each save the command's pending writes
+are flushed, so a checkpoint never gets ahead of the database. A run
+started with --resume skips everything below the mark and retries the
+items that failed, so an interrupted run costs only the remaining work.
+"""
+
+from collections import deque
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import CommandCheckpoint
+
+
+def add_checkpoint_arguments(parser):
+    """Add the --resume option shared by checkpointed commands."""
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the last interrupted run instead of starting over')
+
+
+class Checkpoint:
+    """
+    Progress tracker of one command run, persisted to CommandCheckpoint.
+
+    Args:
+        command (str): Command name, the CommandCheckpoint key
+        resume (bool): Continue the saved run instead of starting a new one
+        flush (callable, optional): Called before each save to write out
+            the results of the items done so far
+    """
+
+    def __init__(self, command, resume=False, flush=None):
+        self.flush = flush
+        self.state, created = CommandCheckpoint.objects.get_or_create(command=command)
+        self.resuming = resume and not created and self.state.finished_at is None
+        self.finished = resume and not created and self.state.finished_at is not None
+        if not (self.resuming or self.finished):
+            self.state.last_pk = 0
+            self.state.processed = 0
+            self.state.failed_pks = []
+            self.state.started_at = timezone.now()
+            self.state.finished_at = None
+        self._failed = set(self.state.failed_pks)
+        self._in_order = deque()
+        self._done = set()
+
+    def pending(self, queryset):
+        """
+        Restrict `queryset` to the items this run still has to process.
+
+        Args:
+            queryset (QuerySet): All items of a full run
+
+        Returns:
+            QuerySet: Items after the checkpoint plus failed ones, by pk
+        """
+        if self.resuming:
+            queryset = queryset.filter(Q(pk__gt=self.state.last_pk) | Q(pk__in=self._failed))
+        return queryset.order_by('pk')
+
+    def started(self, pk):
+        """Record that the item `pk` was submitted; call in pk order."""
+        self._in_order.append(pk)
+
+    def done(self, pk, succeeded=True):
+        """Record the outcome of the item `pk`."""
+        self.state.processed += 1
+        if succeeded:
+            self._failed.discard(pk)
+        else:
+            self._failed.add(pk)
+        self._done.add(pk)
+        while self._in_order and self._in_order[0] in self._done:
+            head = self._in_order.popleft()
+            self._done.discard(head)
+            self.state.last_pk = max(self.state.last_pk, head)
+
+    def save(self):
+        """Flush pending writes, then persist the checkpoint."""
+        if self.flush is not None:
+            self.flush()
+        self.state.failed_pks = sorted(self._failed)
+        self.state.save()
+
+    def finish(self):
+        """
+        Mark the run as complete, unless items failed: those stay to be
+        retried by the next --resume.
+        """
+        if not self._failed:
+            self.state.finished_at = timezone.now()
+        self.save()
+
+    def describe(self):
+        """One-line summary of the saved progress, for command output."""
+        if self.finished:
+            return f"The last run finished at {self.state.finished_at:%Y-%m-%d %H:%M}, nothing to resume"
+        if self.resuming:
+            return (f"Resuming after pk {self.state.last_pk} ({self.state.processed} already processed, "
+                    f"{len(self._failed)} failed to retry)")
+        return "Starting a new run"
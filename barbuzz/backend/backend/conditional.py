@@ -0,0 +1,96 @@
+"""
+Conditional GET support for the BarBuzz API.
+
+ETags are derived from cheap version information (row timestamps, aggregate
+signatures or cached result versions) rather than from hashing rendered
+response bodies, so a matching If-None-Match can be answered with a
+304 Not Modified before any serialization work happens.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from .models import Favorite
+
+# Cache-Control directives for the different kinds of responses. Every
+# endpoint is per-user (token authenticated), so responses are private.
+BAR_LIST_CACHE_CONTROL = {'private': True, 'max_age': 60}
+REVALIDATE_CACHE_CONTROL = {'private': True, 'no_cache': True}
+
+
+def make_etag(*parts):
+    """
+    Build a strong ETag from version parts.
+
+    Args:
+        *parts: Values that together identify a version of a response
+
+    Returns:
+        str: Quoted ETag value
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def not_modified(request, etag, cache_control=REVALIDATE_CACHE_CONTROL):
+    """
+    Return a 304 response if the client's cached copy matches `etag`.
+
+    Args:
+        request: HTTP request carrying If-None-Match
+        etag (str): Current ETag of the resource, or None if unknown
+        cache_control (dict): Cache-Control directives for the response
+
+    Returns:
+        HttpResponse: 304 (or 412) response, or None if the body must be sent
+    """
+    if etag is None:
+        return None
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        add_validators(response, etag, cache_control)
+    return response
+
+
+def add_validators(response, etag, cache_control=REVALIDATE_CACHE_CONTROL):
+    """
+    Attach ETag, Cache-Control and Vary headers to a response.
+
+    Args:
+        response: Response to update in place
+        etag (str): ETag of the response body, or None to skip the ETag header
+        cache_control (dict): Cache-Control directives for the response
+
+    Returns:
+        The same response, for chaining
+    """
+    if etag is not None and 200 <= response.status_code < 400:
+        response['ETag'] = etag
+    patch_cache_control(response, **cache_control)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def favorites_signature(user):
+    """
+    Return a tuple that changes whenever the user's favorites change.
+
+    Favorite ids only grow, so (count, max id) changes on every add and
+    remove; the newest bar timestamp covers edits to the favorited bars.
+    One aggregate query.
+
+    Args:
+        user: User whose favorites are summarized
+
+    Returns:
+        tuple: (count, max favorite id, max bar updated_at)
+    """
+    summary = Favorite.objects.filter(user=user).aggregate(
+        count=Count('id'),
+        last_id=Max('id'),
+        last_updated=Max('bar__updated_at'),
+    )
+    return (summary['count'], summary['last_id'], summary['last_updated'])
@@ -0,0 +1,285 @@
+"""
+Duplicate bar detection and merging.
+
+Imports from different sources (or a place_id change after Google merges
+two listings) leave the same venue in the table more than once, with
+slightly different names or coordinates. find_duplicates() finds them
+without comparing all pairs: bars are bucketed into a grid of cells about
+`max_distance` wide, so each bar is only compared with the bars of its own
+and adjacent cells. Candidate pairs are scored on normalized name and
+address similarity (difflib) and distance, and matching pairs are grouped
+into clusters with a union-find.
+
+merge_cluster() keeps one bar per cluster and moves the favorites and wait
+time history of the others onto it before deleting them.
+"""
+
+import math
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+from difflib import SequenceMatcher
+
+from django.db import transaction
+from django.db.models import Count
+
+from .caching import invalidate_favorite_ids
+from .models import Bar, Favorite, WaitTime
+from .utils import haversine_distance
+
+METERS_PER_DEGREE = 111_320
+
+NAME_WEIGHT = 0.6
+ADDRESS_WEIGHT = 0.25
+DISTANCE_WEIGHT = 0.15
+
+_NAME_STOPWORDS = {'the', 'and', 'n', 'co', 'llc', 'inc'}
+_ADDRESS_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'boulevard': 'blvd', 'road': 'rd', 'drive': 'dr',
+    'lane': 'ln', 'place': 'pl', 'court': 'ct', 'highway': 'hwy', 'parkway': 'pkwy',
+    'suite': 'ste', 'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+}
+_ADDRESS_DROP = {'usa', 'united', 'states', 'us'}
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+
+# Fields copied from duplicates onto the kept bar when it has no value
+FILLABLE_FIELDS = (
+    'address', 'phone_number', 'website', 'description', 'hours', 'photo_reference', 'price_level', 'rating',
+)
+
+DuplicatePair = namedtuple('DuplicatePair', ['bar_id', 'other_id', 'score', 'distance'])
+
+
+def _tokens(value):
+    value = unicodedata.normalize('NFKD', value or '').encode('ascii', 'ignore').decode().lower()
+    value = value.replace('&', ' and ').replace("'", '')
+    return [token for token in _NON_WORD_RE.split(value) if token]
+
+
+def normalize_name(name):
+    """Lowercase, accent-free name without punctuation and filler words."""
+    return ' '.join(token for token in _tokens(name) if token not in _NAME_STOPWORDS)
+
+
+def normalize_address(address):
+    """Lowercase address with common street words abbreviated and country dropped."""
+    return ' '.join(
+        _ADDRESS_ABBREVIATIONS.get(token, token) for token in _tokens(address)
+        if token not in _ADDRESS_DROP
+    )
+
+
+def similarity(a, b, minimum=0.0):
+    """
+    difflib ratio of two strings, or 0.0 when its cheap upper bounds
+    already rule out reaching `minimum`.
+    """
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    if matcher.real_quick_ratio() < minimum or matcher.quick_ratio() < minimum:
+        return 0.0
+    return matcher.ratio()
+
+
+def pair_score(name_a, name_b, address_a, address_b, distance, max_distance, min_name_similarity=0.0):
+    """
+    Score how likely two bars are the same venue.
+
+    Args:
+        name_a, name_b (str): Normalized names
+        address_a, address_b (str): Normalized addresses, possibly empty
+        distance (float): Distance between the bars in meters
+        max_distance (float): Distance at which the distance score is 0
+        min_name_similarity (float): Name similarity below which the pair
+            scores 0 without computing the rest
+
+    Returns:
+        float: Score between 0 and 1
+    """
+    name = similarity(name_a, name_b, min_name_similarity)
+    if name < min_name_similarity or name == 0.0:
+        return 0.0
+    closeness = max(0.0, 1.0 - distance / max_distance)
+    if address_a and address_b:
+        address = similarity(address_a, address_b)
+        return NAME_WEIGHT * name + ADDRESS_WEIGHT * address + DISTANCE_WEIGHT * closeness
+    # Without both addresses the name and distance carry all the weight
+    weight = NAME_WEIGHT + DISTANCE_WEIGHT
+    return (NAME_WEIGHT * name + DISTANCE_WEIGHT * closeness) / weight
+
+
+def find_duplicates(queryset=None, max_distance=75, threshold=0.85, min_name_similarity=0.6):
+    """
+    Find pairs of bars that are probably the same venue.
+
+    Args:
+        queryset (QuerySet, optional): Bars to check, defaults to all bars
+        max_distance (float): Maximum distance in meters between duplicates
+        threshold (float): Minimum pair_score() of a duplicate pair
+        min_name_similarity (float): Minimum name similarity of a duplicate pair
+
+    Returns:
+        list: DuplicatePair tuples, best score first
+    """
+    queryset = Bar.objects.all() if queryset is None else queryset
+    lat_step = max_distance / METERS_PER_DEGREE
+    lng_steps = {}
+    cells = defaultdict(list)
+    for bar_id, name, address, lat, lng in queryset.values_list(
+        'id', 'name', 'address', 'latitude', 'longitude'
+    ).iterator(chunk_size=5000):
+        row = math.floor(lat / lat_step)
+        if row not in lng_steps:
+            lng_steps[row] = _lng_step(row, lat_step)
+        cell = (row, math.floor(lng / lng_steps[row]))
+        cells[cell].append((bar_id, normalize_name(name), normalize_address(address), lat, lng))
+
+    pairs = []
+
+    def compare(bar, others):
+        for other in others:
+            distance = haversine_distance(bar[3], bar[4], other[3], other[4]) * 1000
+            if distance > max_distance:
+                continue
+            score = pair_score(bar[1], other[1], bar[2], other[2], distance, max_distance, min_name_similarity)
+            if score >= threshold:
+                pairs.append(DuplicatePair(bar[0], other[0], round(score, 3), round(distance, 1)))
+
+    # Each unordered pair of cells is visited once: a cell is compared with
+    # itself, the next cell of its row and the cells of the next row
+    for (row, column), bars in cells.items():
+        next_step = lng_steps.get(row + 1)
+        # Widest longitude span of max_distance over both rows
+        span = max(lng_steps[row], next_step or 0)
+        for index, bar in enumerate(bars):
+            compare(bar, bars[index + 1:])
+            compare(bar, cells.get((row, column + 1), ()))
+            if next_step is None:
+                continue
+            # The next row has its own columns, so look up the ones within reach of this bar
+            for next_column in range(math.floor((bar[4] - span) / next_step),
+                                     math.floor((bar[4] + span) / next_step) + 1):
+                compare(bar, cells.get((row + 1, next_column), ()))
+    pairs.sort(key=lambda pair: -pair.score)
+    return pairs
+
+
+def _lng_step(row, lat_step):
+    """
+    Cell width in degrees of longitude for a grid row: max_distance at the
+    row's poleward edge, so no two bars of the row within max_distance are
+    more than one column apart.
+    """
+    poleward = min(max(abs(row), abs(row + 1)) * lat_step, 90.0)
+    return lat_step / max(math.cos(math.radians(poleward)), 0.01)
+
+
+def cluster_pairs(pairs):
+    """
+    Group duplicate pairs into clusters of bar ids (union-find).
+
+    Returns:
+        list: Sorted lists of two or more bar ids
+    """
+    parent = {}
+
+    def find(bar_id):
+        parent.setdefault(bar_id, bar_id)
+        while parent[bar_id] != bar_id:
+            parent[bar_id] = parent[parent[bar_id]]
+            bar_id = parent[bar_id]
+        return bar_id
+
+    for pair in pairs:
+        root, other_root = find(pair.bar_id), find(pair.other_id)
+        if root != other_root:
+            parent[max(root, other_root)] = min(root, other_root)
+
+    clusters = defaultdict(list)
+    for bar_id in parent:
+        clusters[find(bar_id)].append(bar_id)
+    return [sorted(cluster) for cluster in clusters.values()]
+
+
+def choose_survivor(bars):
+    """
+    Pick the bar of a cluster to keep: the most favorited, then the one
+    with the longest wait time history, the most complete data, and the
+    oldest.
+
+    Args:
+        bars (list): Bar instances with num_favorites and num_wait_times set
+    """
+    def rank(bar):
+        filled = sum(1 for field in FILLABLE_FIELDS if getattr(bar, field) not in (None, ''))
+        return (-bar.num_favorites, -bar.num_wait_times, -filled, bar.pk)
+    return min(bars, key=rank)
+
+
+def merge_cluster(bar_ids):
+    """
+    Merge a cluster of duplicate bars into one.
+
+    Favorites and wait times of the removed bars move to the kept bar
+    (a user who favorited several of them keeps one favorite), and empty
+    fields of the kept bar are filled from the removed ones.
+
+    Args:
+        bar_ids (iterable): Primary keys of the duplicate bars
+
+    Returns:
+        tuple: (kept Bar, list of removed bar ids), or (None, []) if fewer
+            than two of the bars still exist
+    """
+    with transaction.atomic():
+        bars = _lock_and_count(bar_ids)
+        if len(bars) < 2:
+            return None, []
+        survivor = choose_survivor(bars)
+        removed = [bar for bar in bars if bar.pk != survivor.pk]
+        removed_ids = [bar.pk for bar in removed]
+
+        changed = []
+        for field in FILLABLE_FIELDS:
+            if getattr(survivor, field) in (None, ''):
+                value = next((getattr(bar, field) for bar in removed if getattr(bar, field) not in (None, '')), None)
+                if value is not None:
+                    setattr(survivor, field, value)
+                    changed.append(field)
+
+        affected_users = set(Favorite.objects.filter(bar_id__in=removed_ids).values_list('user_id', flat=True))
+        kept_users = set(Favorite.objects.filter(bar=survivor).values_list('user_id', flat=True))
+        moved = set()
+        for favorite in Favorite.objects.filter(bar_id__in=removed_ids).order_by('pk'):
+            if favorite.user_id not in kept_users and favorite.user_id not in moved:
+                moved.add(favorite.user_id)
+                Favorite.objects.filter(pk=favorite.pk).update(bar=survivor)
+        Bar.objects.adjust_favorites_count([survivor.pk], len(moved))
+        WaitTime.objects.filter(bar_id__in=removed_ids).update(bar=survivor)
+
+        # Remaining favorites of the removed bars cascade with them
+        Bar.objects.filter(pk__in=removed_ids).delete()
+        if changed:
+            survivor.save(update_fields=changed + ['updated_at'])
+
+        for user_id in affected_users:
+            transaction.on_commit(lambda user_id=user_id: invalidate_favorite_ids(user_id))
+    return survivor, removed_ids
+
+
+def _lock_and_count(bar_ids):
+    # Lock the rows first: select_for_update cannot be combined with aggregates
+    bars = list(Bar.objects.select_for_update().filter(pk__in=bar_ids).order_by('pk'))
+    favorites = dict(
+        Favorite.objects.filter(bar__in=bars).values('bar').annotate(count=Count('id')).values_list('bar', 'count')
+    )
+    wait_times = dict(
+        WaitTime.objects.filter(bar__in=bars).values('bar').annotate(count=Count('id')).values_list('bar', 'count')
+    )
+    for bar in bars:
+        bar.num_favorites = favorites.get(bar.pk, 0)
+        bar.num_wait_times = wait_times.get(bar.pk, 0)
+    return bars
@@ -0,0 +1,159 @@
+"""
+Bar list filters for the BarBuzz API.
+
+The same parsed filters are applied in two places: pushed down into Bar
+querysets, where the partial indexes on Bar serve them, and as a predicate
+over bars built from Google Places results, which cannot be filtered
+upstream without fragmenting the Places cache.
+"""
+
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, OuterRef, Q
+
+from .hours import minute_of_week
+
+# Bar.type values served by the API
+BAR_TYPES = ('bar', 'nightclub', 'bar+nightclub')
+
+# Bar.type values matched by each ?type= value
+TYPE_MATCHES = {
+    'bar': ('bar', 'bar+nightclub'),
+    'nightclub': ('nightclub', 'bar+nightclub'),
+}
+
+# Parsed filters; None (or empty) means "not filtered"
+BarFilters = namedtuple('BarFilters', ['price_levels', 'min_rating', 'types', 'open_now'])
+
+NO_FILTERS = BarFilters(price_levels=(), min_rating=None, types=(), open_now=False)
+
+
+def parse_bar_filters(query_params):
+    """
+    Parse the bar filter query parameters.
+    
+    Supported parameters:
+    - price_level: Comma-separated price levels (0-4)
+    - rating: Minimum rating (0-5)
+    - type: Comma-separated kinds, 'bar' and/or 'nightclub'
+    - open_now: 'true' to only return bars open now (see open_at_condition)
+    
+    Args:
+        query_params: Request query parameters
+    
+    Returns:
+        BarFilters: Normalized filters, usable in cache keys
+    
+    Raises:
+        ValueError: If a parameter is malformed
+    """
+    price_levels = ()
+    if query_params.get('price_level'):
+        try:
+            price_levels = tuple(sorted({int(level) for level in query_params['price_level'].split(',')}))
+        except ValueError:
+            raise ValueError("Invalid price_level")
+        if any(level < 0 or level > 4 for level in price_levels):
+            raise ValueError("price_level must be between 0 and 4")
+
+    min_rating = None
+    if query_params.get('rating'):
+        try:
+            min_rating = Decimal(query_params['rating'])
+        except InvalidOperation:
+            raise ValueError("Invalid rating")
+        # NaN and Infinity parse, but cannot be compared with the range
+        if not min_rating.is_finite():
+            raise ValueError("Invalid rating")
+        if not Decimal(0) <= min_rating <= Decimal(5):
+            raise ValueError("rating must be between 0 and 5")
+
+    types = ()
+    if query_params.get('type'):
+        types = tuple(sorted({kind.strip() for kind in query_params['type'].split(',') if kind.strip()}))
+        unknown = set(types) - set(TYPE_MATCHES)
+        if unknown:
+            raise ValueError(f"Invalid type, expected one of: {', '.join(TYPE_MATCHES)}")
+
+    open_now = query_params.get('open_now', 'false').lower() == 'true'
+
+    return BarFilters(price_levels=price_levels, min_rating=min_rating, types=types, open_now=open_now)
+
+
+def _matching_types(filters):
+    return sorted({bar_type for kind in filters.types for bar_type in TYPE_MATCHES[kind]})
+
+
+def filter_bars(queryset, filters):
+    """
+    Apply bar filters to a Bar queryset.
+    
+    Args:
+        queryset: Bar queryset
+        filters (BarFilters): Parsed filters
+    
+    Returns:
+        QuerySet: Filtered queryset
+    """
+    if filters is None:
+        return queryset
+    condition = Q()
+    if filters.price_levels:
+        condition &= Q(price_level__in=filters.price_levels)
+    if filters.min_rating is not None:
+        condition &= Q(rating__gte=filters.min_rating)
+    if filters.types:
+        condition &= Q(type__in=_matching_types(filters))
+    if filters.open_now:
+        condition &= open_at_condition()
+    return queryset.filter(condition)
+
+
+def open_at_condition(moment=None):
+    """
+    Build a Bar condition for "open at `moment`" (default: now).
+    
+    Bars with compiled opening intervals are checked against them; bars
+    without any fall back to the stored is_open flag.
+    
+    Args:
+        moment (datetime, optional): Aware datetime
+    
+    Returns:
+        Q: Condition usable in Bar.objects.filter()
+    """
+    from .models import BarOpeningInterval
+
+    minute = minute_of_week(moment)
+    intervals = BarOpeningInterval.objects.filter(bar=OuterRef('pk'))
+    covering = intervals.filter(open_minute__lte=minute, close_minute__gt=minute)
+    return Q(Exists(covering)) | (Q(is_open=True) & ~Q(Exists(intervals)))
+
+
+def bar_matches(bar, filters):
+    """
+    Check an in-memory bar (e.g. built from Places results) against filters.
+    
+    Bars with an unknown price level or rating never match a filter on it,
+    as in SQL.
+    
+    Args:
+        bar (Bar): Bar instance, saved or not
+        filters (BarFilters): Parsed filters
+    
+    Returns:
+        bool: Whether the bar passes every filter
+    """
+    if filters is None:
+        return True
+    if filters.price_levels and bar.price_level not in filters.price_levels:
+        return False
+    if filters.min_rating is not None and (
+            bar.rating is None or Decimal(str(bar.rating)) < filters.min_rating):
+        return False
+    if filters.types and bar.type not in _matching_types(filters):
+        return False
+    if filters.open_now and not bar.is_open:
+        return False
+    return True
@@ -0,0 +1,182 @@
+"""
+Opening hours parsing for the BarBuzz application.
+
+Bar.hours holds whatever the importer stored: a Google Places ``periods``
+list or ``weekday_text`` lines. Rows imported by older code may hold the
+periods as a JSON-encoded string instead. These helpers
+compile either format into minute-of-week intervals, which are stored in
+BarOpeningInterval so open-now checks run in SQL.
+
+Minute-of-week counts from Sunday 00:00 (Google's day 0) in bar local time.
+Intervals are half-open ``[open, close)`` and never cross the end of the
+week; one that does is split in two.
+"""
+
+import json
+import re
+import zoneinfo
+
+from django.conf import settings
+from django.utils import timezone
+
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+
+WEEKDAYS = ('sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday')
+
+_TIME_RE = re.compile(r'^(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?$', re.IGNORECASE)
+_RANGE_SEPARATOR_RE = re.compile(r'\s*(?:–|—|-|\bto\b)\s*')
+
+
+def parse_hours(value):
+    """
+    Compile a Bar.hours value into minute-of-week intervals.
+
+    Args:
+        value: Places periods, weekday_text lines, a legacy JSON string of
+            either, or None
+
+    Returns:
+        list: Sorted, merged (open_minute, close_minute) tuples
+    """
+    if isinstance(value, str):
+        # Legacy rows stored the periods JSON-encoded
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    if not isinstance(value, list) or not value:
+        return []
+    if all(isinstance(item, dict) for item in value):
+        intervals = _parse_periods(value)
+    elif all(isinstance(item, str) for item in value):
+        intervals = _parse_weekday_text(value)
+    else:
+        return []
+    return _normalize(intervals)
+
+
+def _parse_hhmm(value):
+    value = str(value)
+    if len(value) != 4 or not value.isdigit():
+        raise ValueError(f"Invalid time {value!r}")
+    return int(value[:2]) * 60 + int(value[2:])
+
+
+def _parse_periods(periods):
+    """Compile Google Places ``opening_hours.periods``."""
+    intervals = []
+    for period in periods:
+        opening = period.get('open')
+        if not isinstance(opening, dict):
+            continue
+        try:
+            start = opening['day'] * DAY_MINUTES + _parse_hhmm(opening['time'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        closing = period.get('close')
+        if not isinstance(closing, dict):
+            # Places reports "always open" as a single open without close
+            intervals.append((0, WEEK_MINUTES))
+            continue
+        try:
+            end = closing['day'] * DAY_MINUTES + _parse_hhmm(closing['time'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if end <= start:
+            end += WEEK_MINUTES
+        intervals.append((start, end))
+    return intervals
+
+
+def _parse_clock(text, default_meridiem=None):
+    """
+    Parse '5', '5:30', '5:30 PM' or '17:30' into (minutes, meridiem).
+
+    A 12-hour time without AM/PM takes `default_meridiem`, since Places
+    omits it on the first time of a range when both times share it.
+    """
+    match = _TIME_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"Invalid time {text!r}")
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = match.group(3).lower().replace('.', '') if match.group(3) else None
+    effective = meridiem or (default_meridiem if hour <= 12 else None)
+    if effective:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Invalid time {text!r}")
+        hour = hour % 12 + (12 if effective == 'pm' else 0)
+    if hour > 24 or minute > 59:
+        raise ValueError(f"Invalid time {text!r}")
+    return hour * 60 + minute, meridiem
+
+
+def _parse_weekday_text(lines):
+    """Compile Google Places ``opening_hours.weekday_text`` lines."""
+    intervals = []
+    for line in lines:
+        # Newer responses use thin and narrow no-break spaces
+        line = re.sub(r'[\u2009\u202f\xa0]', ' ', line)
+        day_name, _, schedule = line.partition(':')
+        day_name = day_name.strip().lower()
+        if day_name not in WEEKDAYS:
+            continue
+        day_start = WEEKDAYS.index(day_name) * DAY_MINUTES
+        schedule = schedule.strip().lower()
+        if not schedule or schedule == 'closed':
+            continue
+        if 'open 24 hours' in schedule:
+            intervals.append((day_start, day_start + DAY_MINUTES))
+            continue
+        for time_range in schedule.split(','):
+            parts = _RANGE_SEPARATOR_RE.split(time_range.strip())
+            if len(parts) != 2:
+                continue
+            try:
+                end, end_meridiem = _parse_clock(parts[1])
+                start, _ = _parse_clock(parts[0], end_meridiem)
+            except ValueError:
+                continue
+            if end <= start:
+                end += DAY_MINUTES
+            intervals.append((day_start + start, day_start + end))
+    return intervals
+
+
+def _normalize(intervals):
+    """Wrap intervals into the week, split at the week boundary and merge."""
+    pieces = []
+    for start, end in intervals:
+        if end - start >= WEEK_MINUTES:
+            return [(0, WEEK_MINUTES)]
+        offset = start - start % WEEK_MINUTES
+        start, end = start - offset, end - offset
+        if end > WEEK_MINUTES:
+            pieces.append((start, WEEK_MINUTES))
+            pieces.append((0, end - WEEK_MINUTES))
+        else:
+            pieces.append((start, end))
+
+    merged = []
+    for start, end in sorted(pieces):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def minute_of_week(moment=None):
+    """
+    Convert a datetime to a minute of the week in bar local time.
+
+    Args:
+        moment (datetime, optional): Aware datetime, defaults to now
+
+    Returns:
+        int: Minutes since Sunday 00:00 local time
+    """
+    moment = moment or timezone.now()
+    local = timezone.localtime(moment, zoneinfo.ZoneInfo(settings.BAR_TIME_ZONE))
+    # isoweekday(): Monday=1 ... Sunday=7
+    return (local.isoweekday() % 7) * DAY_MINUTES + local.hour * 60 + local.minute
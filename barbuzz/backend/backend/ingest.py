@@ -0,0 +1,342 @@
+"""
+Bulk ingestion of bar records.
+
+upsert_bars() merges normalized bar records (dicts keyed by Bar field
+name) into the Bar table by place_id. On PostgreSQL the records are
+streamed with COPY into a temporary staging table and merged with a single
+INSERT ... ON CONFLICT (place_id) DO UPDATE per batch, whose WHERE clause
+skips rows that would not change. Other databases load the existing rows,
+compare them in Python and write the difference with
+bulk_create(update_conflicts=True).
+
+Like BatchWriter, the bulk path bypasses Bar's signals, so it recompiles
+opening intervals of rows whose hours were written and bumps the bar data
+version itself.
+
+insert_raw() appends model instances exactly as given (COPY on
+PostgreSQL), for history rows whose auto_now_add timestamps must be kept.
+
+Bookkeeping fields (BOOKKEEPING_FIELDS) are written but never count as a
+change: a record that only moves refreshed_at leaves the row's other
+columns, updated_at and the bar data version alone.
+"""
+
+import datetime
+import io
+import json
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models.sql import InsertQuery
+from django.utils import timezone
+
+from .caching import bump_bar_data_version
+from .models import Bar, BarOpeningInterval
+from .utils import bar_type_from_place_types
+
+IngestResult = namedtuple('IngestResult', ['inserted', 'updated', 'unchanged'])
+
+# Fields set by the database or by Django rather than by records
+MANAGED_FIELDS = ('id', 'created_at', 'updated_at')
+
+# Fields records set that say when a bar was checked, not what it is
+BOOKKEEPING_FIELDS = ('refreshed_at',)
+
+
+def bar_record_from_place(place_id, place_details):
+    """
+    Normalize a Places Details result into a bar record.
+
+    Args:
+        place_id (str): Google Places ID
+        place_details (dict): Details result with the BAR_DETAILS_MASK fields
+
+    Returns:
+        dict: Bar field values, or None if the place is not a bar or nightclub
+    """
+    name = place_details.get('name')
+    bar_type = bar_type_from_place_types(place_details.get('types', []))
+    location = place_details.get('geometry', {}).get('location', {})
+    if not (name and bar_type and location.get('lat') and location.get('lng')):
+        return None
+
+    opening_hours = place_details.get('opening_hours', {})
+    periods = opening_hours.get('periods', [])
+    photos = place_details.get('photos', [])
+    website = place_details.get('website', '')
+    return {
+        'place_id': place_id,
+        'name': name[:100],
+        'address': place_details.get('formatted_address', '')[:200],
+        'latitude': location['lat'],
+        'longitude': location['lng'],
+        'phone_number': place_details.get('formatted_phone_number', '')[:20],
+        # Longer URLs do not fit Bar.website
+        'website': website if len(website) <= 200 else '',
+        'hours': periods or None,
+        'is_open': bool(opening_hours.get('open_now')),
+        'photo_reference': photos[0].get('photo_reference', '') if photos else '',
+        'price_level': place_details.get('price_level'),
+        'rating': place_details.get('rating'),
+        'type': bar_type,
+        'refreshed_at': timezone.now(),
+    }
+
+
+def upsert_bars(records, columns=None, update_columns=None, batch_size=5000):
+    """
+    Insert new bars and update changed ones, matching on place_id.
+
+    Args:
+        records (iterable): Bar records; may be a generator of any length
+        columns (iterable, optional): Fields the records provide, defaults
+            to the keys of the first record. It must include every field
+            without a default (place_id, latitude, longitude); other fields
+            of new rows get their model defaults.
+        update_columns (iterable, optional): Fields written when the bar
+            already exists, defaults to all `columns` but place_id.
+            BOOKKEEPING_FIELDS among them are written to every existing
+            bar but do not make it count as updated.
+        batch_size (int): Records per staging load and merge transaction
+
+    Returns:
+        IngestResult: Counts of inserted, updated and unchanged bars
+    """
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return IngestResult(0, 0, 0)
+    columns = [column for column in columns or first if column not in MANAGED_FIELDS]
+    missing = [
+        field.name for field in Bar._meta.concrete_fields
+        if field.name not in columns and field.name not in MANAGED_FIELDS
+        and not field.null and field.get_default() is None
+    ]
+    if missing:
+        raise ValueError(f"Bar records must include {', '.join(missing)}")
+    if update_columns is None:
+        update_columns = [column for column in columns if column != 'place_id']
+    update_columns = [column for column in update_columns if column in columns]
+
+    merge = _merge_postgresql if connection.vendor == 'postgresql' else _merge_generic
+    inserted = updated = unchanged = 0
+    batch = {first['place_id']: first}
+    for record in records:
+        batch[record['place_id']] = record
+        if len(batch) >= batch_size:
+            result = _merge_batch(merge, list(batch.values()), columns, update_columns)
+            inserted, updated, unchanged = inserted + result[0], updated + result[1], unchanged + result[2]
+            batch = {}
+    if batch:
+        result = _merge_batch(merge, list(batch.values()), columns, update_columns)
+        inserted, updated, unchanged = inserted + result[0], updated + result[1], unchanged + result[2]
+    return IngestResult(inserted, updated, unchanged)
+
+
+def insert_raw(model, objs, batch_size=5000):
+    """
+    Insert model instances with their field values exactly as set.
+
+    Unlike bulk_create(), fields are not pre_save()d, so auto_now_add and
+    auto_now values on the instances are kept, as when loading fixtures.
+    Primary keys are left to the database and no signals are sent.
+
+    Args:
+        model: Model class of the instances
+        objs (list): Unsaved instances
+        batch_size (int): Rows per COPY or INSERT statement
+
+    Returns:
+        int: Number of rows inserted
+    """
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    if connection.vendor == 'postgresql':
+        quote = connection.ops.quote_name
+        columns = [quote(field.column) for field in fields]
+        with connection.cursor() as cursor:
+            for start in range(0, len(objs), batch_size):
+                _copy_into(cursor, quote(model._meta.db_table), columns, (
+                    '\t'.join(_copy_text(field, field.value_from_object(obj)) for field in fields) + '\n'
+                    for obj in objs[start:start + batch_size]
+                ))
+        return len(objs)
+
+    batch_size = max(min(batch_size, connection.ops.bulk_batch_size(fields, objs)), 1)
+    for start in range(0, len(objs), batch_size):
+        query = InsertQuery(model)
+        query.insert_values(fields, objs[start:start + batch_size], raw=True)
+        query.get_compiler(connection=connection).execute_sql()
+    return len(objs)
+
+
+def _merge_batch(merge, records, columns, update_columns):
+    """Merge one batch (unique place_ids) and do the signal bookkeeping."""
+    with transaction.atomic():
+        changed, inserted = merge(records, columns, update_columns)
+        if changed:
+            if 'hours' in columns:
+                BarOpeningInterval.objects.sync(
+                    Bar(pk=pk, hours=hours) for pk, hours, was_inserted in changed
+                    if was_inserted or 'hours' in update_columns
+                )
+            transaction.on_commit(bump_bar_data_version)
+    return IngestResult(inserted, len(changed) - inserted, len(records) - len(changed))
+
+
+def _python_value(field, value):
+    if value is None:
+        return None
+    if field.get_internal_type() == 'JSONField':
+        return value
+    return field.to_python(value)
+
+
+def _copy_text(field, value):
+    """Encode one value in COPY text format."""
+    if value is None:
+        return '\\N'
+    if field.get_internal_type() == 'JSONField':
+        value = json.dumps(value, cls=field.encoder)
+    elif isinstance(value, bool):
+        value = 't' if value else 'f'
+    elif isinstance(value, (datetime.date, datetime.datetime)):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _copy_into(cursor, table, columns, rows):
+    """COPY rows of text-format lines into `table`, with psycopg 3 or psycopg2."""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    data = ''.join(rows)
+    raw = cursor.cursor
+    if hasattr(raw, 'copy'):
+        with raw.copy(sql) as copy:
+            copy.write(data)
+    else:
+        raw.copy_expert(sql, io.StringIO(data))
+
+
+def _merge_postgresql(records, columns, update_columns):
+    """
+    Stage the batch with COPY and merge it with INSERT ... ON CONFLICT.
+
+    Returns:
+        tuple: ([(pk, hours, inserted)] of written rows, number inserted)
+    """
+    fields = {column: Bar._meta.get_field(column) for column in columns}
+    quote = connection.ops.quote_name
+    table = quote(Bar._meta.db_table)
+    # Fields the records do not provide take their model defaults on insert
+    default_fields = [
+        field for field in Bar._meta.concrete_fields
+        if field.name not in columns and field.name not in MANAGED_FIELDS
+    ]
+    db_columns = [fields[column].column for column in columns]
+
+    lines = (
+        '\t'.join(_copy_text(fields[column], _python_value(fields[column], record.get(column)))
+                  for column in columns) + '\n'
+        for record in records
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE bar_staging ON COMMIT DROP AS "
+            f"SELECT {', '.join(quote(column) for column in db_columns)} FROM {table} WITH NO DATA"
+        )
+        _copy_into(cursor, 'bar_staging', [quote(column) for column in db_columns], lines)
+
+        insert_columns = db_columns + [field.column for field in default_fields] + ['created_at', 'updated_at']
+        select = (
+            [f"s.{quote(column)}" for column in db_columns]
+            + [f"CAST(%s AS {field.cast_db_type(connection)})" for field in default_fields]
+            + ['now()', 'now()']
+        )
+        update = [fields[column].column for column in update_columns]
+        compared = [fields[column].column for column in update_columns if column not in BOOKKEEPING_FIELDS]
+        sql = (
+            f"INSERT INTO {table} ({', '.join(quote(column) for column in insert_columns)}) "
+            f"SELECT {', '.join(select)} FROM bar_staging s "
+        )
+        if compared:
+            sql += (
+                f"ON CONFLICT (place_id) DO UPDATE SET "
+                f"{', '.join(f'{quote(column)} = EXCLUDED.{quote(column)}' for column in update)}, "
+                f"updated_at = EXCLUDED.updated_at "
+                f"WHERE ({', '.join(f'{table}.{quote(column)}' for column in compared)}) "
+                f"IS DISTINCT FROM ({', '.join(f'EXCLUDED.{quote(column)}' for column in compared)}) "
+            )
+        else:
+            sql += "ON CONFLICT (place_id) DO NOTHING "
+        # xmax is 0 only for rows this statement inserted
+        hours_column = quote('hours') if 'hours' in columns else 'NULL'
+        sql += f"RETURNING id, {hours_column}, (xmax = 0)"
+        cursor.execute(sql, [
+            field.get_db_prep_save(field.get_default(), connection) for field in default_fields
+        ])
+        # jsonb comes back undecoded, as for JSONField queries
+        changed = [
+            (pk, json.loads(hours) if isinstance(hours, str) else hours, was_inserted)
+            for pk, hours, was_inserted in cursor.fetchall()
+        ]
+        bookkeeping = [column for column in update if column not in compared]
+        if bookkeeping:
+            # Rows the merge skipped as unchanged still record the check
+            cursor.execute(
+                f"UPDATE {table} SET "
+                f"{', '.join(f'{quote(column)} = s.{quote(column)}' for column in bookkeeping)} "
+                f"FROM bar_staging s WHERE {table}.place_id = s.place_id "
+                f"AND ({', '.join(f'{table}.{quote(column)}' for column in bookkeeping)}) "
+                f"IS DISTINCT FROM ({', '.join(f's.{quote(column)}' for column in bookkeeping)})"
+            )
+        cursor.execute("DROP TABLE bar_staging")
+    return changed, sum(1 for _, _, was_inserted in changed if was_inserted)
+
+
+def _merge_generic(records, columns, update_columns):
+    """
+    Compare the batch with the stored rows in Python and write only the
+    difference with bulk_create(update_conflicts=True).
+    """
+    fields = {column: Bar._meta.get_field(column) for column in columns}
+    compared = [column for column in update_columns if column not in BOOKKEEPING_FIELDS]
+    bookkeeping = [column for column in update_columns if column in BOOKKEEPING_FIELDS]
+    existing = {
+        row['place_id']: row
+        for row in Bar.objects.filter(place_id__in=[record['place_id'] for record in records])
+        .values('id', 'place_id', *update_columns)
+    }
+
+    to_write = []
+    checked = []
+    inserted = 0
+    for record in records:
+        values = {column: _python_value(fields[column], record.get(column)) for column in columns}
+        stored = existing.get(record['place_id'])
+        if stored is None:
+            inserted += 1
+        elif all(stored[column] == values[column] for column in compared):
+            if any(stored[column] != values[column] for column in bookkeeping):
+                checked.append(Bar(pk=stored['id'], **{column: values[column] for column in bookkeeping}))
+            continue
+        to_write.append(Bar(**values))
+    if checked:
+        # Rows skipped as unchanged still record the check
+        Bar.objects.bulk_update(checked, bookkeeping)
+    if not to_write:
+        return [], 0
+
+    if update_columns:
+        Bar.objects.bulk_create(
+            to_write, update_conflicts=True, unique_fields=['place_id'],
+            update_fields=update_columns + ['updated_at'],
+        )
+    else:
+        Bar.objects.bulk_create(to_write)
+    written = Bar.objects.filter(place_id__in=[bar.place_id for bar in to_write])
+    changed = [
+        (pk, hours, place_id not in existing)
+        for pk, hours, place_id in written.values_list('id', 'hours', 'place_id')
+    ]
+    return changed, inserted
@@ -0,0 +1,77 @@
+import random
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from backend.models import Bar
+from backend.serializers import BarSerializer, FastBarSerializer
+
+class Command(BaseCommand):
+    help = 'Compare BarSerializer with FastBarSerializer on synthetic bar lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help='Number of bars per list')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of timed runs per serializer')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+
+    def build_bars(self, count, seed):
+        """Build unsaved Bar instances covering every field type, half with distances."""
+        rng = random.Random(seed)
+        now = timezone.now()
+        bars = []
+        for i in range(count):
+            bar = Bar(
+                id=i + 1,
+                place_id=f"place_{i}",
+                name=f"Bar {i}",
+                address=f"{i} Main St",
+                latitude=30.0 + rng.random(),
+                longitude=-97.0 - rng.random(),
+                phone_number='(512) 555-0100',
+                website='https://example.com',
+                description='A bar' * rng.randint(0, 20),
+                hours=[{'open': {'day': d, 'time': '1700'}, 'close': {'day': d, 'time': '0200'}} for d in range(7)],
+                photo_reference=rng.choice(['', 'ref_' + str(i)]),
+                price_level=rng.choice([None, 1, 2, 3]),
+                # Places returns floats, the database returns Decimals
+                rating=rng.choice([None, round(rng.uniform(1, 5), 1), Decimal('4.25')]),
+                type='bar',
+                is_open=bool(i % 2),
+                created_at=now,
+                updated_at=now,
+            )
+            if i % 2:
+                bar.distance = round(rng.uniform(0, 5), 1)
+            bars.append(bar)
+        return bars
+
+    def time_serializer(self, serializer_class, bars, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            serializer_class(bars, many=True).data
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        count = options['count']
+        repeat = options['repeat']
+        bars = self.build_bars(count, options['seed'])
+
+        renderer = JSONRenderer()
+        expected = renderer.render(BarSerializer(bars, many=True).data)
+        actual = renderer.render(FastBarSerializer(bars, many=True).data)
+        if expected != actual:
+            self.stderr.write('FastBarSerializer output differs from BarSerializer')
+            return
+
+        self.stdout.write(f"Output identical for {count} bars ({len(expected)} bytes)")
+
+        drf_time = self.time_serializer(BarSerializer, bars, repeat)
+        fast_time = self.time_serializer(FastBarSerializer, bars, repeat)
+
+        self.stdout.write(f"BarSerializer:     {drf_time * 1000:.2f} ms (best of {repeat})")
+        self.stdout.write(f"FastBarSerializer: {fast_time * 1000:.2f} ms (best of {repeat})")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {drf_time / fast_time:.1f}x"))
@@ -1,49 +1,52 @@
 from django.core.management.base import BaseCommand
-import googlemaps
-from django.conf import settings
+from backend.batching import bar_writer
+from backend.checkpoints import Checkpoint, add_checkpoint_arguments
 from backend.models import Bar
-import time
+from backend.places import fetch_place_details, field_mask
+from backend.runner import CommandRunner, add_runner_arguments, places_client
+
+DETAILS_MASK = field_mask('types')
 
 class Command(BaseCommand):
     help = 'Remove establishments that are not actual bars'
     
+    def add_arguments(self, parser):
+        add_runner_arguments(parser)
+        add_checkpoint_arguments(parser)
+    
     def handle(self, *args, **options):
         # Initialize Google Maps client
-        gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+        gmaps = places_client(options)
+        
+        checkpoint = Checkpoint('cleanup_bars', resume=options['resume'])
+        self.stdout.write(checkpoint.describe())
+        if checkpoint.finished:
+            return
+        
+        # Get all bars not yet checked by this run
+        establishments = checkpoint.pending(Bar.objects.only('id', 'place_id', 'name'))
+        total = establishments.count()
+        self.stdout.write(f"Checking {total} establishments...")
+        
+        def fetch(establishment):
+            # Fetch place details from Google
+            return fetch_place_details(gmaps, establishment.place_id, DETAILS_MASK)
         
-        # Get all bars
-        establishments = Bar.objects.all()
-        self.stdout.write(f"Checking {establishments.count()} establishments...")
+        def apply(establishment, place_details):
+            # Check if it's a bar
+            place_types = place_details.get('types', [])
+            is_bar = 'bar' in place_types or 'night_club' in place_types
+            
+            if not is_bar:
+                self.stdout.write(f"Removing non-bar: {establishment.name} (types: {place_types})")
+                writer.delete(establishment)
         
-        # Check each establishment
-        non_bars_removed = 0
-        for establishment in establishments:
-            try:
-                # Fetch place details from Google
-                place_details = gmaps.place(
-                    place_id=establishment.place_id,
-                    fields=['types']
-                ).get('result', {})
-                
-                # Get place types
-                place_types = place_details.get('types', [])
-                establishment.place_types = place_types  # Store types in the model
-                
-                # Check if it's a bar
-                is_bar = 'bar' in place_types or 'night_club' in place_types
-                
-                if not is_bar:
-                    self.stdout.write(f"Removing non-bar: {establishment.name} (types: {place_types})")
-                    establishment.delete()
-                    non_bars_removed += 1
-                else:
-                    establishment.establishment_type = 'bar'
-                    establishment.save()
-                
-                # Avoid rate limits
-                time.sleep(0.2)
-                
-            except Exception as e:
-                self.stderr.write(f"Error checking {establishment.name}: {e}")
+        with bar_writer(options['batch_size']) as writer:
+            checkpoint.flush = writer.flush
+            CommandRunner.from_options(self, options, label='establishments').run(
+                establishments.iterator(chunk_size=options['batch_size']), fetch, apply, total=total,
+                checkpoint=checkpoint
+            )
+            checkpoint.finish()
         
-        self.stdout.write(self.style.SUCCESS(f"Removed {non_bars_removed} non-bar establishments"))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(f"Removed {writer.deleted} non-bar establishments"))
@@ -1,8 +1,13 @@
-import googlemaps
-import time
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from ...batching import bar_writer
+from ...checkpoints import Checkpoint, add_checkpoint_arguments
 from ...models import Bar
+from ...places import fetch_place_details, field_mask
+from ...runner import CommandRunner, add_runner_arguments, places_client
+from ...utils import bar_type_from_place_types
+
+DETAILS_MASK = field_mask('types')
 
 class Command(BaseCommand):
     help = 'Clean up database - remove or mark restaurants and update bar types'
@@ -11,6 +16,8 @@ class Command(BaseCommand):
         parser.add_argument('--dry-run', action='store_true', help='Show what would be done without making changes')
         parser.add_argument('--delete', action='store_true', help='Delete restaurants instead of just marking them')
         parser.add_argument('--limit', type=int, default=0, help='Limit number of bars to process (0 for all)')
+        add_runner_arguments(parser)
+        add_checkpoint_arguments(parser)
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
@@ -22,99 +29,95 @@ class Command(BaseCommand):
             self.stderr.write('Google Maps API key not found in settings')
             return
             
-        gmaps = googlemaps.Client(key=api_key)
+        gmaps = places_client(options)
+        
+        # Dry runs change nothing, so they neither save nor consume a checkpoint
+        checkpoint = None
+        bars = Bar.objects.only('id', 'place_id', 'name', 'type').order_by('id')
+        if not dry_run:
+            checkpoint = Checkpoint('database_cleanup', resume=options['resume'])
+            self.stdout.write(checkpoint.describe())
+            if checkpoint.finished:
+                return
+            bars = checkpoint.pending(bars)
         
         # Get all bars or a limited subset
-        bars = Bar.objects.all()
         if limit > 0:
             bars = bars[:limit]
             
         total_count = bars.count()
         self.stdout.write(f"Processing {total_count} establishments...")
         
-        # Track results
-        bar_count = 0
-        nightclub_count = 0
-        restaurant_count = 0
-        error_count = 0
-        api_calls = 0
+        # If no place_id, we can't verify with Google
+        missing_place_id = 0
         
-        # Process each bar
-        for bar in bars:
-            try:
-                self.stdout.write(f"Checking: {bar.name}")
-                
-                # If no place_id, we can't verify with Google
-                if not bar.place_id:
-                    self.stdout.write(f"  - No place_id, skipping")
-                    error_count += 1
-                    continue
-                    
-                # Get details from Google Places API
-                place_details = gmaps.place(place_id=bar.place_id).get('result', {})
-                api_calls += 1
-                
-                types = place_details.get('types', [])
-                self.stdout.write(f"  - Types: {types}")
-                
-                # Determine if it's a bar, nightclub or restaurant
-                is_bar = 'bar' in types
-                is_nightclub = 'night_club' in types
-                
-                # Set the appropriate type
-                if is_bar and is_nightclub:
-                    new_type = 'bar+nightclub'
-                    bar_count += 1
-                    nightclub_count += 1
-                elif is_bar:
-                    new_type = 'bar'
-                    bar_count += 1
-                elif is_nightclub:
-                    new_type = 'nightclub'
-                    nightclub_count += 1
+        def with_place_id(bars):
+            nonlocal missing_place_id
+            for bar in bars:
+                if bar.place_id:
+                    yield bar
                 else:
-                    new_type = 'restaurant'
-                    restaurant_count += 1
-                
-                # Update or delete as appropriate
-                if new_type == 'restaurant':
-                    if delete_restaurants:
-                        if not dry_run:
-                            self.stdout.write(f"  - DELETING: {bar.name} (not a bar/nightclub)")
-                            bar.delete()
-                        else:
-                            self.stdout.write(f"  - Would delete: {bar.name}")
+                    self.stdout.write(f"  - No place_id, skipping: {bar.name}")
+                    missing_place_id += 1
+        
+        # Track results
+        counts = {'bar': 0, 'nightclub': 0, 'restaurant': 0}
+        
+        def fetch(bar):
+            # Get details from Google Places API
+            return fetch_place_details(gmaps, bar.place_id, DETAILS_MASK)
+        
+        def apply(bar, place_details):
+            types = place_details.get('types', [])
+            
+            # Determine if it's a bar, nightclub or restaurant
+            new_type = bar_type_from_place_types(types) or 'restaurant'
+            if new_type in ('bar', 'bar+nightclub'):
+                counts['bar'] += 1
+            if new_type in ('nightclub', 'bar+nightclub'):
+                counts['nightclub'] += 1
+            if new_type == 'restaurant':
+                counts['restaurant'] += 1
+            
+            # Update or delete as appropriate
+            if new_type == 'restaurant':
+                if delete_restaurants:
+                    if not dry_run:
+                        self.stdout.write(f"  - DELETING: {bar.name} (not a bar/nightclub, types: {types})")
+                        writer.delete(bar)
                     else:
-                        if not dry_run:
-                            bar.type = 'restaurant'
-                            bar.save()
-                            self.stdout.write(f"  - Marked as restaurant: {bar.name}")
-                        else:
-                            self.stdout.write(f"  - Would mark as restaurant: {bar.name}")
+                        self.stdout.write(f"  - Would delete: {bar.name}")
                 else:
-                    # It's a bar or nightclub
-                    if bar.type != new_type:
-                        if not dry_run:
-                            bar.type = new_type
-                            bar.save()
-                            self.stdout.write(f"  - Updated type to {new_type}: {bar.name}")
-                        else:
-                            self.stdout.write(f"  - Would update type to {new_type}: {bar.name}")
+                    if not dry_run:
+                        writer.update(bar, type='restaurant')
+                        self.stdout.write(f"  - Marked as restaurant: {bar.name}")
                     else:
-                        self.stdout.write(f"  - Already correct type ({new_type}): {bar.name}")
-                
-                # Don't hit API rate limits
-                time.sleep(0.2)
-                
-            except Exception as e:
-                self.stderr.write(f"Error processing {bar.name}: {str(e)}")
-                error_count += 1
+                        self.stdout.write(f"  - Would mark as restaurant: {bar.name}")
+            elif bar.type != new_type:
+                # It's a bar or nightclub with an outdated type
+                if not dry_run:
+                    writer.update(bar, type=new_type)
+                    self.stdout.write(f"  - Updated type to {new_type}: {bar.name}")
+                else:
+                    self.stdout.write(f"  - Would update type to {new_type}: {bar.name}")
+        
+        with bar_writer(options['batch_size']) as writer:
+            if checkpoint is not None:
+                checkpoint.flush = writer.flush
+            stats = CommandRunner.from_options(self, options, label='establishments').run(
+                with_place_id(bars.iterator(chunk_size=options['batch_size'])), fetch, apply, total=total_count,
+                checkpoint=checkpoint
+            )
+            # A --limit run leaves the rest for the next --resume
+            if checkpoint is not None and (limit <= 0 or total_count < limit):
+                checkpoint.finish()
+        api_calls = stats.processed
         
         # Display summary
         self.stdout.write("\nSummary:")
         self.stdout.write(f"Processed {total_count} establishments")
-        self.stdout.write(f"Found {bar_count} bars, {nightclub_count} nightclubs, {restaurant_count} restaurants")
-        self.stdout.write(f"Encountered {error_count} errors")
+        self.stdout.write(f"Found {counts['bar']} bars, {counts['nightclub']} nightclubs, {counts['restaurant']} restaurants")
+        self.stdout.write(f"Encountered {len(stats.errors) + missing_place_id} errors")
         self.stdout.write(f"Made {api_calls} API calls")
         
         estimated_cost = api_calls * 0.0017  # $0.0017 per Details request
@@ -122,4 +125,4 @@ class Command(BaseCommand):
         
         if dry_run:
             self.stdout.write("\nThis was a dry run. No changes were made.")
-            self.stdout.write("Run without --dry-run to apply changes.")
\ No newline at end of file
+            self.stdout.write("Run without --dry-run to apply changes.")
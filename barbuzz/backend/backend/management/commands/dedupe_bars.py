@@ -0,0 +1,61 @@
+import time
+from django.core.management.base import BaseCommand
+from ...dedupe import cluster_pairs, find_duplicates, merge_cluster
+from ...models import Bar
+
+class Command(BaseCommand):
+    help = 'Find bars listed more than once and merge them, keeping favorites and wait times'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='List the duplicates without merging them')
+        parser.add_argument('--distance', type=float, default=75,
+                            help='Maximum distance in meters between duplicates')
+        parser.add_argument('--threshold', type=float, default=0.85,
+                            help='Minimum similarity score (0-1) of duplicates')
+        parser.add_argument('--min-name-similarity', type=float, default=0.6,
+                            help='Minimum name similarity (0-1) of duplicates')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        started = time.monotonic()
+        pairs = find_duplicates(
+            max_distance=options['distance'],
+            threshold=options['threshold'],
+            min_name_similarity=options['min_name_similarity'],
+        )
+        clusters = cluster_pairs(pairs)
+        self.stdout.write(
+            f"Found {len(pairs)} duplicate pairs in {len(clusters)} clusters "
+            f"({time.monotonic() - started:.1f}s)"
+        )
+        if not clusters:
+            return
+
+        scores = {}
+        for pair in pairs:
+            scores.setdefault(pair.bar_id, []).append(pair)
+            scores.setdefault(pair.other_id, []).append(pair)
+        names = dict(
+            Bar.objects.filter(pk__in={bar_id for cluster in clusters for bar_id in cluster})
+            .values_list('id', 'name')
+        )
+
+        merged = removed = 0
+        for cluster in clusters:
+            best = max(pair.score for bar_id in cluster for pair in scores[bar_id])
+            listing = ', '.join(f"{names.get(bar_id, '?')} (#{bar_id})" for bar_id in cluster)
+            if dry_run:
+                self.stdout.write(f"  [{best:.2f}] {listing}")
+                continue
+            survivor, removed_ids = merge_cluster(cluster)
+            if survivor is None:
+                continue
+            merged += 1
+            removed += len(removed_ids)
+            self.stdout.write(f"  [{best:.2f}] Kept {survivor.name} (#{survivor.pk}), removed {removed_ids}")
+
+        if dry_run:
+            self.stdout.write("Dry run: nothing was merged")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Merged {merged} clusters, removed {removed} duplicate bars"))
@@ -0,0 +1,57 @@
+import os
+from django.core.management.base import BaseCommand
+from ...models import Bar, Favorite, WaitTime
+from ...snapshots import BAR_EXCLUDED_FIELDS, open_snapshot, snapshot_header, write_line
+
+class Command(BaseCommand):
+    help = 'Export the bar dataset to a compressed NDJSON snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Snapshot file to write')
+        parser.add_argument('--favorites', action='store_true', help='Include users\' favorite bars')
+        parser.add_argument('--wait-times', action='store_true', help='Include the wait time history')
+        parser.add_argument('--compression', choices=['zstd', 'gzip', 'none'],
+                            help='Compression, defaults to zstd when available, else gzip')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        chunk_size = options['chunk_size']
+        tables = ['bar']
+        if options['favorites']:
+            tables.append('favorite')
+        if options['wait_times']:
+            tables.append('wait_time')
+
+        bar_fields = [field.name for field in Bar._meta.concrete_fields if field.name not in BAR_EXCLUDED_FIELDS]
+        counts = dict.fromkeys(tables, 0)
+
+        # Rows are streamed from server-side cursors straight into the file
+        try:
+            stream = open_snapshot(path, 'w', options['compression'])
+        except ValueError as e:
+            self.stderr.write(str(e))
+            return
+        with stream:
+            write_line(stream, snapshot_header(tables))
+
+            for values in Bar.objects.order_by('pk').values(*bar_fields).iterator(chunk_size=chunk_size):
+                write_line(stream, {'t': 'bar', **values})
+                counts['bar'] += 1
+
+            if options['favorites']:
+                favorites = Favorite.objects.order_by('pk').values_list('user__username', 'bar__place_id')
+                for username, place_id in favorites.iterator(chunk_size=chunk_size):
+                    write_line(stream, {'t': 'favorite', 'username': username, 'place_id': place_id})
+                    counts['favorite'] += 1
+
+            if options['wait_times']:
+                wait_times = WaitTime.objects.order_by('pk').values_list('bar__place_id', 'timestamp', 'estimated_wait')
+                for place_id, timestamp, estimated_wait in wait_times.iterator(chunk_size=chunk_size):
+                    write_line(stream, {'t': 'wait_time', 'place_id': place_id, 'timestamp': timestamp,
+                                        'estimated_wait': estimated_wait})
+                    counts['wait_time'] += 1
+
+        size = os.path.getsize(path)
+        summary = ', '.join(f"{count} {table.replace('_', ' ')}s" for table, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Exported {summary} to {path} ({size / 1024:.1f} KiB)"))
@@ -1,9 +1,11 @@
 import json
-import googlemaps
-import time
 from django.core.management.base import BaseCommand
-from django.conf import settings
+from ...batching import bar_writer
 from ...models import Bar
+from ...places import fetch_place_details, field_mask
+from ...runner import CommandRunner, add_runner_arguments, places_client
+
+DETAILS_MASK = field_mask('hours')
 
 class Command(BaseCommand):
     help = 'Fix hours data format for existing bars'
@@ -11,74 +13,80 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--dry-run', action='store_true', help='Show what would be changed without making changes')
         parser.add_argument('--limit', type=int, default=0, help='Maximum bars to process (0 for all)')
+        add_runner_arguments(parser)
+
+    @staticmethod
+    def needs_fixing(bar):
+        """Whether the bar's hours are missing or not stored as a list."""
+        return not bar.hours or not isinstance(bar.hours, list)
+
+    @staticmethod
+    def decode_legacy(bar):
+        """
+        Decode hours stored as a JSON string by older imports.
+
+        Returns:
+            list: The decoded periods, or None if the hours must be refetched
+        """
+        if not isinstance(bar.hours, str):
+            return None
+        try:
+            hours = json.loads(bar.hours)
+        except ValueError:
+            return None
+        return hours if isinstance(hours, list) and hours else None
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         limit = options['limit']
         
         # Get all bars or limited subset
-        bars = Bar.objects.all()
+        bars = Bar.objects.only('id', 'place_id', 'name', 'hours').order_by('id')
         if limit > 0:
             bars = bars[:limit]
             
         total = bars.count()
-        fixed = 0
-        errors = 0
-        api_calls = 0
-        
         self.stdout.write(f"Checking hours data for {total} bars...")
         
+        to_fix = [bar for bar in bars.iterator(chunk_size=2000) if self.needs_fixing(bar)]
+        # JSON strings from older imports are decoded without an API call
+        decoded = {bar.pk: self.decode_legacy(bar) for bar in to_fix}
+        to_fetch = [bar for bar in to_fix if decoded[bar.pk] is None]
+        self.stdout.write(f"{len(to_fix)} bars need their hours fixed, {len(to_fetch)} from the Places API")
+        
+        if dry_run:
+            for bar in to_fix:
+                self.stdout.write(f"  - Would fix hours for {bar.name}")
+            self.stdout.write("\nSummary:")
+            self.stdout.write(f"Checked {total} bars")
+            self.stdout.write(f"Would fix: {len(to_fix)} bars")
+            self.stdout.write("\nThis was a dry run. Run without --dry-run to apply changes.")
+            return
+        
         # Set up Google Maps client
-        gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+        gmaps = places_client(options) if to_fetch else None
+        
+        def fetch(bar):
+            # Get fresh hours data from Google Places API
+            return fetch_place_details(gmaps, bar.place_id, DETAILS_MASK)
         
-        for bar in bars:
-            try:
-                # Check if hours field needs fixing
-                needs_fixing = False
-                try:
-                    if bar.hours:
-                        json.loads(bar.hours)
-                    else:
-                        needs_fixing = True  # Empty or null hours
-                except (json.JSONDecodeError, TypeError):
-                    needs_fixing = True  # Invalid JSON
-                
-                if needs_fixing:
-                    self.stdout.write(f"Fixing hours for: {bar.name}")
-                    
-                    # Get fresh hours data from Google Places API
-                    if not dry_run:
-                        try:
-                            place_details = gmaps.place(place_id=bar.place_id).get('result', {})
-                            api_calls += 1
-                            
-                            hours_data = place_details.get('opening_hours', {}).get('periods', [])
-                            if hours_data:
-                                bar.hours = json.dumps(hours_data)
-                                bar.save()
-                                fixed += 1
-                                self.stdout.write(f"  - Fixed hours for {bar.name}")
-                            else:
-                                self.stdout.write(f"  - No hours data available for {bar.name}")
-                                
-                            # Be nice to the API
-                            time.sleep(0.2)
-                        except Exception as api_error:
-                            self.stderr.write(f"  - API error for {bar.name}: {str(api_error)}")
-                            errors += 1
-                    else:
-                        self.stdout.write(f"  - Would fix hours for {bar.name}")
-                        fixed += 1
-                
-            except Exception as e:
-                self.stderr.write(f"Error processing {bar.name}: {str(e)}")
-                errors += 1
+        def apply(bar, place_details):
+            hours_data = place_details.get('opening_hours', {}).get('periods', [])
+            if hours_data:
+                writer.update(bar, hours=hours_data)
+            else:
+                self.stdout.write(f"  - No hours data available for {bar.name}")
+        
+        with bar_writer(options['batch_size']) as writer:
+            for bar in to_fix:
+                if decoded[bar.pk] is not None:
+                    writer.update(bar, hours=decoded[bar.pk])
+            stats = CommandRunner.from_options(self, options, label='bars').run(
+                to_fetch, fetch, apply, total=len(to_fetch)
+            )
         
         self.stdout.write("\nSummary:")
         self.stdout.write(f"Checked {total} bars")
-        self.stdout.write(f"Fixed (or would fix): {fixed} bars")
-        self.stdout.write(f"Errors: {errors}")
-        self.stdout.write(f"API calls: {api_calls}")
-        
-        if dry_run:
-            self.stdout.write("\nThis was a dry run. Run without --dry-run to apply changes.")
\ No newline at end of file
+        self.stdout.write(f"Fixed: {writer.updated} bars")
+        self.stdout.write(f"Errors: {len(stats.errors)}")
+        self.stdout.write(f"API calls: {stats.processed}")
@@ -2,7 +2,9 @@ import googlemaps
 import time
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from backend.ingest import upsert_bars
 from backend.models import Bar
+from backend.places import search_nearby_pages
 
 class Command(BaseCommand):
     help = 'Import bars from Google Places API'
@@ -28,48 +30,40 @@ class Command(BaseCommand):
         
         self.stdout.write(f"Searching for bars near {lat}, {lng} within {radius}m")
         
-        existing_bars = {bar.place_id: bar for bar in Bar.objects.all() if bar.place_id}
-        
-        response = client.places_nearby(
-            location=(lat, lng),
-            radius=radius,
-            type='bar'
-        )
-        
-        places_result = response.get('results', [])
-        count = 0
+        # Follows next_page_token for up to 60 results
+        places_result = search_nearby_pages(client, (lat, lng), radius, 'bar')[:limit]
         
         self.stdout.write(f"Found {len(places_result)} bars")
         
+        existing_bars = Bar.objects.filter(
+            place_id__in=[place['place_id'] for place in places_result]
+        ).only('place_id', 'rating', 'price_level').in_bulk(field_name='place_id')
+        
+        records = []
         for place in places_result:
             place_id = place['place_id']
+            existing = existing_bars.get(place_id)
             
-            if place_id in existing_bars:
+            if existing:
                 self.stdout.write(f"Updating existing bar: {place['name']}")
-                bar = existing_bars[place_id]
             else:
                 self.stdout.write(f"Creating new bar: {place['name']}")
-                bar = Bar(
-                    place_id=place_id,
-                    name=place['name'],
-                    address=place.get('vicinity', ''),
-                    latitude=place['geometry']['location']['lat'],
-                    longitude=place['geometry']['location']['lng']
-                )
             
-            # Set rating if available
-            if 'rating' in place and 'rating' in model_fields:
-                bar.rating = place['rating']
-                
-            # Set price level if available
-            if 'price_level' in place and 'price_level' in model_fields:
-                bar.price_level = place['price_level']
-                
-            try:
-                bar.save()
-                count += 1
-                self.stdout.write(f"Saved bar: {bar.name}")
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Error saving bar {place['name']}: {str(e)}"))
+            records.append({
+                'place_id': place_id,
+                'name': place['name'][:100],
+                'address': place.get('vicinity', '')[:200],
+                'latitude': place['geometry']['location']['lat'],
+                'longitude': place['geometry']['location']['lng'],
+                # Keep the stored values when the search result has none
+                'rating': place.get('rating', existing.rating if existing else None),
+                'price_level': place.get('price_level', existing.price_level if existing else None),
+            })
+        
+        # Existing bars only take the rating and price level from Nearby Search
+        result = upsert_bars(records, update_columns=['rating', 'price_level'])
         
-        self.stdout.write(self.style.SUCCESS(f"Successfully imported {count} bars"))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully imported {result.inserted} bars "
+            f"({result.updated} updated, {result.unchanged} unchanged)"
+        ))
@@ -0,0 +1,112 @@
+from collections import Counter
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from ...caching import invalidate_favorite_ids
+from ...ingest import insert_raw, upsert_bars
+from ...models import Bar, Favorite, WaitTime
+from ...snapshots import SnapshotReader, open_snapshot
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Load a snapshot written by export_snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Snapshot file to read')
+        parser.add_argument('--skip-favorites', action='store_true', help='Do not load favorites')
+        parser.add_argument('--skip-wait-times', action='store_true', help='Do not load the wait time history')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows written per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        try:
+            stream = open_snapshot(options['path'], 'r')
+            reader = SnapshotReader(stream)
+        except (OSError, ValueError) as e:
+            self.stderr.write(f"Cannot read snapshot: {e}")
+            return
+
+        with stream:
+            tables = reader.header['tables']
+            self.stdout.write(f"Snapshot of {', '.join(tables)} created at {reader.header['created_at']}")
+
+            # Bars go through the bulk upsert, so loading twice changes nothing
+            result = upsert_bars(reader.section('bar'), batch_size=batch_size)
+            self.stdout.write(
+                f"Bars: {result.inserted} inserted, {result.updated} updated, {result.unchanged} unchanged"
+            )
+
+            if 'favorite' in tables and not options['skip_favorites']:
+                self.load_favorites(reader.section('favorite'), batch_size)
+            if 'wait_time' in tables and not options['skip_wait_times']:
+                self.load_wait_times(reader.section('wait_time'), batch_size)
+
+        self.stdout.write(self.style.SUCCESS("Snapshot loaded"))
+
+    def bar_ids(self, place_ids):
+        return dict(Bar.objects.filter(place_id__in=set(place_ids)).values_list('place_id', 'id'))
+
+    def load_favorites(self, records, batch_size):
+        User = get_user_model()
+        created = skipped = 0
+        for batch in batched(records, batch_size):
+            users = dict(User.objects.filter(
+                username__in={record['username'] for record in batch}
+            ).values_list('username', 'id'))
+            bars = self.bar_ids(record['place_id'] for record in batch)
+            favorites = [
+                Favorite(user_id=users[record['username']], bar_id=bars[record['place_id']])
+                for record in batch
+                if record['username'] in users and record['place_id'] in bars
+            ]
+            existing = set(Favorite.objects.filter(
+                user_id__in={favorite.user_id for favorite in favorites},
+                bar_id__in={favorite.bar_id for favorite in favorites},
+            ).values_list('user_id', 'bar_id'))
+            new = [favorite for favorite in favorites if (favorite.user_id, favorite.bar_id) not in existing]
+            with transaction.atomic():
+                Favorite.objects.bulk_create(new, ignore_conflicts=True)
+                added = Counter(favorite.bar_id for favorite in new)
+                # One counter UPDATE per distinct increment, not per bar
+                for increment in set(added.values()):
+                    Bar.objects.adjust_favorites_count(
+                        [bar_id for bar_id, count in added.items() if count == increment], increment
+                    )
+            created += len(new)
+            skipped += len(batch) - len(favorites)
+            for user_id in {favorite.user_id for favorite in new}:
+                invalidate_favorite_ids(user_id)
+        self.stdout.write(f"Favorites: {created} created, {skipped} skipped (unknown user or bar)")
+
+    def load_wait_times(self, records, batch_size):
+        created = skipped = 0
+        for batch in batched(records, batch_size):
+            bars = self.bar_ids(record['place_id'] for record in batch)
+            wait_times = [
+                WaitTime(bar_id=bars[record['place_id']], timestamp=parse_datetime(record['timestamp']),
+                         estimated_wait=record['estimated_wait'])
+                for record in batch
+                if record['place_id'] in bars
+            ]
+            # Wait times have no natural key: skip the ones already loaded
+            existing = set(WaitTime.objects.filter(
+                bar_id__in={wait_time.bar_id for wait_time in wait_times},
+                timestamp__in={wait_time.timestamp for wait_time in wait_times},
+            ).values_list('bar_id', 'timestamp'))
+            new = [
+                wait_time for wait_time in wait_times
+                if (wait_time.bar_id, wait_time.timestamp) not in existing
+            ]
+            # Inserted as is: bulk_create() would replace the timestamps (auto_now_add)
+            insert_raw(WaitTime, new, batch_size=batch_size)
+            created += len(new)
+            skipped += len(batch) - len(new)
+        self.stdout.write(f"Wait times: {created} created, {skipped} skipped (unknown bar or already loaded)")
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from ...models import Bar, Favorite
+
+class Command(BaseCommand):
+    help = 'Repair Bar.favorites_count where it drifted from the Favorite rows (e.g. after raw SQL deletes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted counts without fixing them')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Bars fixed per UPDATE')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+
+        counts = Subquery(
+            Favorite.objects.filter(bar=OuterRef('pk')).order_by().values('bar')
+            .annotate(count=Count('id')).values('count')
+        )
+        actual = Coalesce(counts, Value(0))
+        drifted = list(
+            Bar.objects.annotate(actual=actual).exclude(favorites_count=F('actual'))
+            .order_by('pk').values_list('pk', 'name', 'favorites_count', 'actual')
+        )
+        self.stdout.write(f"{len(drifted)} bars with a wrong favorites_count")
+        for pk, name, stored, count in drifted[:20]:
+            self.stdout.write(f"  - {name} (#{pk}): {stored} stored, {count} favorites")
+        if len(drifted) > 20:
+            self.stdout.write(f"  ... and {len(drifted) - 20} more")
+        if dry_run or not drifted:
+            return
+
+        # Recounted in the UPDATE itself, so favorites written since the scan are included
+        fixed = 0
+        for start in range(0, len(drifted), batch_size):
+            ids = [row[0] for row in drifted[start:start + batch_size]]
+            fixed += Bar.objects.filter(pk__in=ids).update(favorites_count=actual)
+        self.stdout.write(self.style.SUCCESS(f"Fixed {fixed} favorite counts"))
@@ -1,10 +1,13 @@
 import time
-import json
 import googlemaps
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from django.utils import timezone
+from ...ingest import bar_record_from_place, upsert_bars
 from ...models import Bar
+from ...places import fetch_place_details, field_mask
+
+DETAILS_MASK = field_mask('identity', 'location', 'types', 'hours', 'contact', 'ratings')
 
 class Command(BaseCommand):
     help = 'Strategically import bars to minimize API usage'
@@ -76,7 +79,7 @@ class Command(BaseCommand):
                 
                 from ...models import Bar
                 processed_ids = set(Bar.objects.values_list('place_id', flat=True))
-                imported_count = 0
+                records = []
                 
                 # Process results
                 for place in results[:limit]:
@@ -87,7 +90,7 @@ class Command(BaseCommand):
                         continue
                     
                     # Get details
-                    place_details = gmaps.place(place_id=place_id).get('result', {})
+                    place_details = fetch_place_details(gmaps, place_id, DETAILS_MASK)
                     places_details_calls += 1
                     
                     name = place_details.get('name', 'Unknown Bar')
@@ -99,58 +102,21 @@ class Command(BaseCommand):
                             self.stdout.write(f"Skipping non-bar: {name}")
                             continue
                     
-                    # Determine the correct bar type
-                    bar_type = 'other'
-                    if 'bar' in types and 'night_club' in types:
-                        bar_type = 'bar+nightclub'
-                    elif 'bar' in types:
-                        bar_type = 'bar'
-                    elif 'night_club' in types:
-                        bar_type = 'nightclub'
-                    else:
-                        # Not a bar or nightclub, skip it
+                    # Normalize into a bar record with the correct bar type
+                    record = bar_record_from_place(place_id, place_details)
+                    if record is None:
+                        # Not a bar or nightclub, or no location
                         self.stdout.write(f"Skipping non-bar place: {name} (types: {types})")
                         continue
-                    
-                    location = place_details.get('geometry', {}).get('location', {})
-                    latitude = location.get('lat')
-                    longitude = location.get('lng')
-                    
-                    if not (name and latitude and longitude):
-                        continue
-                    
-                    address = place_details.get('formatted_address', '')
-                    phone = place_details.get('formatted_phone_number', '')
-                    website = place_details.get('website', '')
-                    
-                    hours_data = place_details.get('opening_hours', {}).get('periods', [])
-                    hours = json.dumps(hours_data) if hours_data else None
-                    
-                    rating = place_details.get('rating')
-                    price_level = place_details.get('price_level')
-                    
-                    # Create bar with proper type
-                    bar = Bar(
-                        place_id=place_id,
-                        name=name,
-                        address=address,
-                        latitude=latitude,
-                        longitude=longitude,
-                        phone_number=phone,
-                        website=website,
-                        hours=hours,
-                        price_level=price_level,
-                        rating=rating,
-                        type=bar_type 
-                    )
-                    bar.save()
-                    imported_count += 1
+                    records.append(record)
                     
                     self.stdout.write(f'Imported: {name}')
                     
                     # Be nice to the API
                     time.sleep(0.2)
                 
+                # One bulk upsert for the whole import
+                imported_count = upsert_bars(records).inserted
                 self.stdout.write(self.style.SUCCESS(f'Successfully imported {imported_count} bars'))
                 
             except Exception as e:
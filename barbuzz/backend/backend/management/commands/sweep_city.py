@@ -0,0 +1,167 @@
+import math
+from django.core.management.base import BaseCommand
+from ...batching import bar_writer
+from ...ingest import bar_record_from_place, upsert_bars
+from ...models import Bar
+from ...places import BAR_DETAILS_MASK, NEARBY_MAX_RESULTS, fetch_place_details, search_nearby_pages
+from ...runner import CommandRunner, add_runner_arguments, places_client
+from ...sweep import parse_bounds, subdivide, tile_bounds
+
+PLACE_TYPES = ('bar', 'night_club')
+
+NEARBY_SEARCH_COST = 0.032  # $ per Nearby Search request
+DETAILS_COST = 0.017  # $ per Details request with Contact and Atmosphere fields
+
+class Command(BaseCommand):
+    help = 'Import every bar and nightclub in a city with a tiled Nearby Search sweep'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--city', type=str, help='City to sweep, geocoded to its bounding box')
+        parser.add_argument('--bounds', type=str, help='Bounding box "south,west,north,east" to sweep instead of --city')
+        parser.add_argument('--tile-radius', type=int, default=2000, help='Search radius of the initial tiles in meters')
+        parser.add_argument('--min-radius', type=int, default=250, help='Smallest radius saturated tiles are split to')
+        parser.add_argument('--limit', type=int, default=0, help='Maximum number of new bars to import (0 for all)')
+        parser.add_argument('--estimate', action='store_true', help='Sweep and report the import cost without importing')
+        add_runner_arguments(parser)
+
+    def handle(self, *args, **options):
+        gmaps = places_client(options)
+
+        bounds = self.get_bounds(gmaps, options)
+        if bounds is None:
+            return
+
+        places, searches = self.sweep(gmaps, bounds, options)
+        self.stdout.write(f"Found {len(places)} distinct places with {searches} Nearby Search requests")
+
+        # Existing bars get the rating and price level from the search results;
+        # only new places cost a Details request
+        with bar_writer(options['batch_size']) as writer:
+            existing = set()
+            place_ids = list(places)
+            for start in range(0, len(place_ids), 1000):
+                for bar in Bar.objects.filter(place_id__in=place_ids[start:start + 1000]).only(
+                    'id', 'place_id', 'rating', 'price_level'
+                ):
+                    existing.add(bar.place_id)
+                    if not options['estimate']:
+                        place = places[bar.place_id]
+                        writer.update(bar, rating=place.get('rating', bar.rating),
+                                      price_level=place.get('price_level', bar.price_level))
+
+        new_ids = [place_id for place_id in place_ids if place_id not in existing]
+        if options['limit'] > 0:
+            new_ids = new_ids[:options['limit']]
+        self.stdout.write(f"{len(existing)} already imported ({writer.updated} updated), {len(new_ids)} new")
+
+        if options['estimate']:
+            self.write_cost(searches, len(new_ids))
+            return
+
+        imported = self.import_places(gmaps, new_ids, options)
+        self.write_cost(searches, len(new_ids))
+        self.stdout.write(self.style.SUCCESS(f"Successfully imported {imported} bars"))
+
+    def get_bounds(self, gmaps, options):
+        """Bounding box from --bounds, or from geocoding --city."""
+        if options['bounds']:
+            try:
+                return parse_bounds(options['bounds'])
+            except ValueError as e:
+                self.stderr.write(f"Invalid --bounds: {e}")
+                return None
+        if not options['city']:
+            self.stderr.write('Please provide a city or bounds')
+            return None
+
+        results = gmaps.geocode(options['city'])
+        if not results:
+            self.stderr.write(f"Could not geocode {options['city']}")
+            return None
+        geometry = results[0]['geometry']
+        box = geometry.get('bounds') or geometry['viewport']
+        self.stdout.write(f"Sweeping {results[0].get('formatted_address', options['city'])}")
+        return (box['southwest']['lat'], box['southwest']['lng'],
+                box['northeast']['lat'], box['northeast']['lng'])
+
+    def sweep(self, gmaps, bounds, options):
+        """
+        Search every tile for every place type, splitting saturated tiles.
+
+        Returns:
+            tuple: (place_id -> Nearby Search result, number of requests)
+        """
+        places = {}
+        searches = 0
+        truncated = 0
+        tiles = [(tile, place_type) for tile in tile_bounds(*bounds, options['tile_radius'])
+                 for place_type in PLACE_TYPES]
+
+        def fetch(item):
+            tile, place_type = item
+            return search_nearby_pages(gmaps, (tile.lat, tile.lng), round(tile.radius), place_type)
+
+        while tiles:
+            saturated = []
+
+            def collect(item, results):
+                nonlocal searches, truncated
+                tile, place_type = item
+                searches += max(1, math.ceil(len(results) / 20))
+                for place in results:
+                    if place.get('business_status') != 'CLOSED_PERMANENTLY':
+                        places.setdefault(place['place_id'], place)
+                if len(results) >= NEARBY_MAX_RESULTS:
+                    if tile.radius / 2 >= options['min_radius']:
+                        saturated.extend((sub_tile, place_type) for sub_tile in subdivide(tile))
+                    else:
+                        truncated += 1
+
+            depth = tiles[0][0].depth
+            self.stdout.write(f"Searching {len(tiles)} tiles of {round(tiles[0][0].radius)}m (level {depth})...")
+            CommandRunner.from_options(self, options, label='tiles').run(tiles, fetch, collect, total=len(tiles))
+            tiles = saturated
+
+        if truncated:
+            self.stdout.write(self.style.WARNING(
+                f"{truncated} tiles were still full at --min-radius, some places there may be missing"
+            ))
+        return places, searches
+
+    def import_places(self, gmaps, place_ids, options):
+        """Fetch Details for new places concurrently and bulk upsert their bars."""
+        batch = []
+        imported = 0
+
+        def save_batch():
+            nonlocal batch, imported
+            if batch:
+                imported += upsert_bars(batch, batch_size=options['batch_size']).inserted
+                batch = []
+
+        def fetch(place_id):
+            return fetch_place_details(gmaps, place_id, BAR_DETAILS_MASK)
+
+        def collect(place_id, place_details):
+            record = bar_record_from_place(place_id, place_details)
+            if record is None:
+                return
+            batch.append(record)
+            if len(batch) >= options['batch_size']:
+                save_batch()
+
+        try:
+            CommandRunner.from_options(self, options, label='places').run(
+                place_ids, fetch, collect, total=len(place_ids)
+            )
+        finally:
+            save_batch()
+        return imported
+
+    def write_cost(self, searches, details):
+        search_cost = searches * NEARBY_SEARCH_COST
+        details_cost = details * DETAILS_COST
+        self.stdout.write("\nAPI Usage Estimate:")
+        self.stdout.write(f"Nearby Search requests: {searches} (${search_cost:.4f})")
+        self.stdout.write(f"Details requests: {details} (${details_cost:.4f})")
+        self.stdout.write(f"Total estimated cost: ${search_cost + details_cost:.4f}")
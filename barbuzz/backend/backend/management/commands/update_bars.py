@@ -1,58 +1,115 @@
-from django.core.management.base import BaseCommand
-import googlemaps
 from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from backend.batching import bar_writer
+from backend.checkpoints import Checkpoint, add_checkpoint_arguments
 from backend.models import Bar
-import time
+from backend.places import fetch_place_details, field_mask
+from backend.refresh import format_freshness_report, freshness_report, plan_refresh
+from backend.runner import CommandRunner, add_runner_arguments, places_client
+
+DETAILS_MASK = field_mask('photos', 'hours', 'contact')
 
 class Command(BaseCommand):
     help = 'Update all bars with details from Google Places API'
     
+    def add_arguments(self, parser):
+        add_runner_arguments(parser)
+        add_checkpoint_arguments(parser)
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only refresh the highest-priority bars, within --budget')
+        parser.add_argument('--budget', type=int, default=settings.PLACES_REFRESH_BUDGET,
+                            help='Places Details calls per incremental run')
+    
     def handle(self, *args, **options):
         # Initialize Google Maps client
-        gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+        gmaps = places_client(options)
+        
+        # Only the columns this command compares and writes
+        bars = Bar.objects.only(
+            'id', 'place_id', 'name', 'photo_reference', 'hours', 'is_open', 'phone_number', 'website'
+        )
+        self.write_freshness()
+        checkpoint = None
+        
+        if options['incremental']:
+            if options['resume']:
+                # Refreshed bars drop in priority, so a re-run already continues where it stopped
+                self.stderr.write('--resume only applies to full runs')
+                return
+            plan = plan_refresh(Bar.objects.all(), options['budget'])
+            by_id = bars.in_bulk([candidate.bar_id for candidate in plan])
+            # Highest priority first, so an interrupted run covers the most important bars
+            items = [by_id[candidate.bar_id] for candidate in plan if candidate.bar_id in by_id]
+            total = len(items)
+            self.stdout.write(f"Refreshing the {total} highest-priority bars (budget {options['budget']})...")
+        else:
+            checkpoint = Checkpoint('update_bars', resume=options['resume'])
+            self.stdout.write(checkpoint.describe())
+            if checkpoint.finished:
+                return
+            bars = checkpoint.pending(bars)
+            total = bars.count()
+            items = bars.iterator(chunk_size=options['batch_size'])
+            self.stdout.write(f"Updating details for {total} bars...")
+        refreshed = []
         
-        # Get all bars
-        bars = Bar.objects.all()
-        self.stdout.write(f"Updating details for {bars.count()} bars...")
+        def mark_refreshed():
+            # Checked bars count as fresh even when nothing changed
+            if refreshed:
+                Bar.objects.filter(pk__in=refreshed).update(refreshed_at=timezone.now())
+                refreshed.clear()
         
-        # Update each bar
-        updated = 0
-        for bar in bars:
+        def fetch(bar):
+            # Fetch details from Google Places API
+            return fetch_place_details(gmaps, bar.place_id, DETAILS_MASK)
+        
+        def apply(bar, place_details):
+            changes = {}
+            
+            # Update photo reference
+            if place_details.get('photos'):
+                changes['photo_reference'] = place_details['photos'][0].get('photo_reference') or ''
+            
+            # Update hours
+            if 'opening_hours' in place_details:
+                changes['hours'] = place_details['opening_hours'].get('weekday_text', [])
+                changes['is_open'] = bool(place_details['opening_hours'].get('open_now'))
+            
+            # Update other fields
+            if 'formatted_phone_number' in place_details:
+                changes['phone_number'] = place_details['formatted_phone_number']
+            
+            if 'website' in place_details:
+                changes['website'] = place_details['website']
+            
+            # Only rows with actual changes are written, in batches
+            writer.update(bar, **changes)
+            refreshed.append(bar.pk)
+            if len(refreshed) >= options['batch_size']:
+                mark_refreshed()
+        
+        def flush():
+            writer.flush()
+            mark_refreshed()
+        
+        with bar_writer(options['batch_size']) as writer:
+            if checkpoint is not None:
+                checkpoint.flush = flush
             try:
-                # Fetch details from Google Places API
-                place_details = gmaps.place(
-                    place_id=bar.place_id,
-                    fields=['name', 'formatted_phone_number', 'website', 
-                           'opening_hours', 'photo', 'price_level', 'rating']
-                ).get('result', {})
-                
-                # Update photo reference
-                if 'photo' in place_details and place_details['photo']:
-                    bar.photo_reference = place_details['photo'][0].get('photo_reference')
-                
-                # Update hours
-                if 'opening_hours' in place_details:
-                    bar.hours = place_details['opening_hours'].get('weekday_text', [])
-                    bar.is_open = place_details['opening_hours'].get('open_now')
-                
-                # Update other fields
-                if 'formatted_phone_number' in place_details:
-                    bar.phone_number = place_details['formatted_phone_number']
-                
-                if 'website' in place_details:
-                    bar.website = place_details['website']
-                    
-                # Save updates
-                bar.save()
-                updated += 1
-                
-                # Report progress
-                self.stdout.write(f"Updated {bar.name} ({updated}/{bars.count()})")
-                
-                # Avoid hitting API rate limits
-                time.sleep(0.2)
-                
-            except Exception as e:
-                self.stderr.write(f"Error updating {bar.name}: {e}")
-        
-        self.stdout.write(self.style.SUCCESS(f"Successfully updated {updated} bars"))
\ No newline at end of file
+                CommandRunner.from_options(self, options, label='bars').run(
+                    items, fetch, apply, total=total, checkpoint=checkpoint
+                )
+            finally:
+                mark_refreshed()
+            if checkpoint is not None:
+                checkpoint.finish()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully updated {writer.updated} bars ({total - writer.updated} unchanged)"
+        ))
+        self.write_freshness()
+    
+    def write_freshness(self):
+        for line in format_freshness_report(freshness_report(Bar.objects.all())):
+            self.stdout.write(line)
@@ -1,8 +1,10 @@
-import googlemaps
-import time
 from django.core.management.base import BaseCommand
-from django.conf import settings
+from ...batching import bar_writer
 from ...models import Bar
+from ...places import fetch_place_details, field_mask
+from ...runner import CommandRunner, add_runner_arguments, places_client
+
+DETAILS_MASK = field_mask('photos')
 
 class Command(BaseCommand):
     help = 'Update photo references for bars that do not have them'
@@ -10,56 +12,52 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--dry-run', action='store_true', help='Show what would be updated without making changes')
         parser.add_argument('--limit', type=int, default=20, help='Maximum number of bars to update')
+        add_runner_arguments(parser)
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         limit = options['limit']
         
         # Initialize Google Maps client
-        gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+        gmaps = places_client(options)
         
         # Get bars without photo references but with place IDs
         bars_to_update = Bar.objects.filter(
             photo_reference='',
             place_id__isnull=False
-        ).exclude(place_id='')[:limit]
+        ).exclude(place_id='').only('id', 'place_id', 'name', 'photo_reference').order_by('id')[:limit]
         
         count = bars_to_update.count()
         self.stdout.write(f"Found {count} bars without photos")
         
         updated = 0
-        for bar in bars_to_update:
-            self.stdout.write(f"Processing: {bar.name}")
+        
+        def fetch(bar):
+            # Get place details including photos
+            return fetch_place_details(gmaps, bar.place_id, DETAILS_MASK)
+        
+        def apply(bar, place_details):
+            nonlocal updated
             
-            try:
-                # Get place details including photos
-                place_details = gmaps.place(place_id=bar.place_id).get('result', {})
-                
-                # Extract photo reference
-                photos = place_details.get('photos', [])
-                if photos and len(photos) > 0:
-                    photo_reference = photos[0].get('photo_reference')
-                    
-                    if photo_reference:
-                        self.stdout.write(f"  Found photo for: {bar.name}")
-                        
-                        if not dry_run:
-                            bar.photo_reference = photo_reference
-                            bar.save()
-                            updated += 1
-                        else:
-                            self.stdout.write(f"  Would update: {bar.name}")
-                            updated += 1
-                else:
-                    self.stdout.write(f"  No photos found for: {bar.name}")
-                
-                # Be nice to the API
-                time.sleep(0.2)
-                
-            except Exception as e:
-                self.stderr.write(f"  Error updating {bar.name}: {str(e)}")
+            # Extract photo reference
+            photos = place_details.get('photos', [])
+            photo_reference = photos[0].get('photo_reference') if photos else None
+            if not photo_reference:
+                self.stdout.write(f"  No photos found for: {bar.name}")
+                return
+            
+            if not dry_run:
+                writer.update(bar, photo_reference=photo_reference)
+            else:
+                self.stdout.write(f"  Would update: {bar.name}")
+            updated += 1
+        
+        with bar_writer(options['batch_size']) as writer:
+            CommandRunner.from_options(self, options, label='bars').run(
+                bars_to_update.iterator(chunk_size=options['batch_size']), fetch, apply, total=count
+            )
         
         if dry_run:
             self.stdout.write(self.style.SUCCESS(f"Would update {updated} bars (dry run)"))
         else:
-            self.stdout.write(self.style.SUCCESS(f"Updated {updated} bars"))
\ No newline at end of file
+            self.stdout.write(self.style.SUCCESS(f"Updated {updated} bars"))
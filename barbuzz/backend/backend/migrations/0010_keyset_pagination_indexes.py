@@ -0,0 +1,23 @@
+# Generated by Django 5.0.11 on 2026-10-19 00:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_userprofile_is_over_21'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['user', '-id'], name='favorite_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waittime',
+            index=models.Index(models.OrderBy(models.F('timestamp'), descending=True), models.OrderBy(models.F('id'), descending=True), name='waittime_recent_keyset_idx'),
+        ),
+    ]
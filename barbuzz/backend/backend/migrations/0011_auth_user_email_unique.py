@@ -0,0 +1,26 @@
+# Generated by Django 5.0.11 on 2026-10-19 01:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Enforce unique non-empty emails on auth_user, ignoring case.
+
+    Registration relies on this index (and the username unique constraint)
+    to reject duplicates with an IntegrityError instead of pre-check queries.
+    User belongs to django.contrib.auth, so the index is created with SQL
+    and has no model state.
+    """
+
+    dependencies = [
+        ('backend', '0010_keyset_pagination_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE UNIQUE INDEX auth_user_email_uniq ON auth_user (LOWER(email)) WHERE email <> ''",
+            reverse_sql="DROP INDEX auth_user_email_uniq",
+        ),
+    ]
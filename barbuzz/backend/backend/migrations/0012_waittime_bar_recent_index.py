@@ -0,0 +1,17 @@
+# Generated by Django 5.0.11 on 2026-10-19 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0011_auth_user_email_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='waittime',
+            index=models.Index(models.F('bar'), models.OrderBy(models.F('timestamp'), descending=True), models.OrderBy(models.F('id'), descending=True), name='waittime_bar_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.11 on 2026-10-19 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0012_waittime_bar_recent_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bar',
+            index=models.Index(condition=models.Q(('type__in', ('bar', 'nightclub', 'bar+nightclub'))), fields=['latitude', 'longitude'], name='bar_geo_served_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bar',
+            index=models.Index(condition=models.Q(('type__in', ('bar', 'nightclub', 'bar+nightclub'))), fields=['price_level', 'rating'], name='bar_price_rating_served_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bar',
+            index=models.Index(condition=models.Q(('type__in', ('bar', 'nightclub', 'bar+nightclub'))), fields=['type', 'rating'], name='bar_type_rating_served_idx'),
+        ),
+    ]
@@ -0,0 +1,196 @@
+# Generated by Django 5.0.11 on 2026-10-19 00:15
+
+import json
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of backend.hours.parse_hours and its helpers as of this
+# migration, so later parser changes do not change what it does.
+
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+
+WEEKDAYS = ('sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday')
+
+_TIME_RE = re.compile(r'^(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?$', re.IGNORECASE)
+_RANGE_SEPARATOR_RE = re.compile(r'\s*(?:–|—|-|\bto\b)\s*')
+
+
+def parse_hours(value):
+    """
+    Compile a Bar.hours value into minute-of-week intervals.
+
+    Args:
+        value: Places periods (list or JSON string), weekday_text lines, or None
+
+    Returns:
+        list: Sorted, merged (open_minute, close_minute) tuples
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    if not isinstance(value, list) or not value:
+        return []
+    if all(isinstance(item, dict) for item in value):
+        intervals = _parse_periods(value)
+    elif all(isinstance(item, str) for item in value):
+        intervals = _parse_weekday_text(value)
+    else:
+        return []
+    return _normalize(intervals)
+
+
+def _parse_hhmm(value):
+    value = str(value)
+    if len(value) != 4 or not value.isdigit():
+        raise ValueError(f"Invalid time {value!r}")
+    return int(value[:2]) * 60 + int(value[2:])
+
+
+def _parse_periods(periods):
+    """Compile Google Places ``opening_hours.periods``."""
+    intervals = []
+    for period in periods:
+        opening = period.get('open')
+        if not isinstance(opening, dict):
+            continue
+        try:
+            start = opening['day'] * DAY_MINUTES + _parse_hhmm(opening['time'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        closing = period.get('close')
+        if not isinstance(closing, dict):
+            # Places reports "always open" as a single open without close
+            intervals.append((0, WEEK_MINUTES))
+            continue
+        try:
+            end = closing['day'] * DAY_MINUTES + _parse_hhmm(closing['time'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if end <= start:
+            end += WEEK_MINUTES
+        intervals.append((start, end))
+    return intervals
+
+
+def _parse_clock(text, default_meridiem=None):
+    """
+    Parse '5', '5:30', '5:30 PM' or '17:30' into (minutes, meridiem).
+
+    A 12-hour time without AM/PM takes `default_meridiem`, since Places
+    omits it on the first time of a range when both times share it.
+    """
+    match = _TIME_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"Invalid time {text!r}")
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = match.group(3).lower().replace('.', '') if match.group(3) else None
+    effective = meridiem or (default_meridiem if hour <= 12 else None)
+    if effective:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Invalid time {text!r}")
+        hour = hour % 12 + (12 if effective == 'pm' else 0)
+    if hour > 24 or minute > 59:
+        raise ValueError(f"Invalid time {text!r}")
+    return hour * 60 + minute, meridiem
+
+
+def _parse_weekday_text(lines):
+    """Compile Google Places ``opening_hours.weekday_text`` lines."""
+    intervals = []
+    for line in lines:
+        # Newer responses use thin and narrow no-break spaces
+        line = re.sub(r'[\u2009\u202f\xa0]', ' ', line)
+        day_name, _, schedule = line.partition(':')
+        day_name = day_name.strip().lower()
+        if day_name not in WEEKDAYS:
+            continue
+        day_start = WEEKDAYS.index(day_name) * DAY_MINUTES
+        schedule = schedule.strip().lower()
+        if not schedule or schedule == 'closed':
+            continue
+        if 'open 24 hours' in schedule:
+            intervals.append((day_start, day_start + DAY_MINUTES))
+            continue
+        for time_range in schedule.split(','):
+            parts = _RANGE_SEPARATOR_RE.split(time_range.strip())
+            if len(parts) != 2:
+                continue
+            try:
+                end, end_meridiem = _parse_clock(parts[1])
+                start, _ = _parse_clock(parts[0], end_meridiem)
+            except ValueError:
+                continue
+            if end <= start:
+                end += DAY_MINUTES
+            intervals.append((day_start + start, day_start + end))
+    return intervals
+
+
+def _normalize(intervals):
+    """Wrap intervals into the week, split at the week boundary and merge."""
+    pieces = []
+    for start, end in intervals:
+        if end - start >= WEEK_MINUTES:
+            return [(0, WEEK_MINUTES)]
+        offset = start - start % WEEK_MINUTES
+        start, end = start - offset, end - offset
+        if end > WEEK_MINUTES:
+            pieces.append((start, WEEK_MINUTES))
+            pieces.append((0, end - WEEK_MINUTES))
+        else:
+            pieces.append((start, end))
+
+    merged = []
+    for start, end in sorted(pieces):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def compile_opening_intervals(apps, schema_editor):
+    """
+    Parse the existing Bar.hours values (Places periods, as a list or a JSON
+    string, or weekday_text lines) into opening intervals.
+    """
+    Bar = apps.get_model('backend', 'Bar')
+    BarOpeningInterval = apps.get_model('backend', 'BarOpeningInterval')
+    batch = []
+    for bar_id, hours in Bar.objects.exclude(hours=None).values_list('id', 'hours').iterator(chunk_size=2000):
+        batch.extend(
+            BarOpeningInterval(bar_id=bar_id, open_minute=open_minute, close_minute=close_minute)
+            for open_minute, close_minute in parse_hours(hours)
+        )
+        if len(batch) >= 5000:
+            BarOpeningInterval.objects.bulk_create(batch)
+            batch = []
+    BarOpeningInterval.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0013_bar_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarOpeningInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_minute', models.PositiveSmallIntegerField()),
+                ('close_minute', models.PositiveSmallIntegerField()),
+                ('bar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_intervals', to='backend.bar')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bar', 'open_minute', 'close_minute'], name='bar_interval_lookup_idx')],
+            },
+        ),
+        migrations.RunPython(compile_opening_intervals, migrations.RunPython.noop),
+    ]
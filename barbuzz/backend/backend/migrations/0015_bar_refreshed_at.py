@@ -0,0 +1,18 @@
+# Generated by Django 5.0.11 on 2026-10-19 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0014_bar_opening_intervals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bar',
+            name='refreshed_at',
+            field=models.DateTimeField(blank=True, help_text='Last time the bar was checked against Google Places', null=True),
+        ),
+    ]
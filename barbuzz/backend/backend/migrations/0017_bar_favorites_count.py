@@ -0,0 +1,31 @@
+# Generated by Django 5.0.11 on 2026-10-19 00:52
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef, Subquery
+
+
+def count_favorites(apps, schema_editor):
+    """
+    Set favorites_count of the bars that already have favorites, in one UPDATE.
+    """
+    Bar = apps.get_model('backend', 'Bar')
+    Favorite = apps.get_model('backend', 'Favorite')
+    favorites = Favorite.objects.filter(bar=OuterRef('pk'))
+    counts = favorites.order_by().values('bar').annotate(count=Count('id')).values('count')
+    Bar.objects.filter(Exists(favorites)).update(favorites_count=Subquery(counts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0016_command_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bar',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of users who favorited the bar'),
+        ),
+        migrations.RunPython(count_favorites, migrations.RunPython.noop),
+    ]
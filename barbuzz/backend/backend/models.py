@@ -2,12 +2,15 @@ import logging
 from django.db import models
 from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.db.models import F, ExpressionWrapper, FloatField
 import math
 from math import radians, sin, cos, sqrt, asin
 from .utils import haversine_distance
+from .caching import bump_bar_data_version
+from .filters import BAR_TYPES, filter_bars, open_at_condition
+from .hours import parse_hours
 
 logger = logging.getLogger(__name__)
 
@@ -17,23 +20,46 @@ class BarManager(models.Manager):
         """
         Returns only establishments that are actual bars or nightclubs.
         """
-        return self.filter(
-            models.Q(type='bar') | 
-            models.Q(type='nightclub') | 
-            models.Q(type='bar+nightclub')
-        )
+        return self.filter(type__in=BAR_TYPES)
     
-    def search_by_query(self, query):
+    def open_at(self, moment=None):
+        """
+        Returns bars open at `moment` (default: now), evaluated in SQL.
+        """
+        return self.filter(open_at_condition(moment))
+    
+    def adjust_favorites_count(self, bar_ids, delta):
+        """
+        Add `delta` to favorites_count of the given bars.
+        
+        The increment is an F() expression evaluated in the UPDATE, so
+        concurrent favorite writes never lose a count. It bypasses save()
+        and its signals: the count is not bar data and does not change
+        updated_at or the bar data version.
+        
+        Args:
+            bar_ids (iterable): Primary keys of the bars
+            delta (int): Change of each count
+        """
+        bar_ids = list(bar_ids)
+        if bar_ids and delta:
+            self.filter(pk__in=bar_ids).update(favorites_count=F('favorites_count') + delta)
+    
+    def search_by_query(self, query, filters=None):
         """
         Search bars with text filtering and type filtering combined.
+        
+        Args:
+            query (str): Text matched against name, address and description.
+            filters (BarFilters, optional): Price, rating, type and open-now filters.
         """
-        return self.get_only_bars().filter(
+        return filter_bars(self.get_only_bars(), filters).filter(
             models.Q(name__icontains=query) | 
             models.Q(address__icontains=query) | 
             models.Q(description__icontains=query)
         )
     
-    def nearby(self, lat, lng, radius=5000):
+    def nearby(self, lat, lng, radius=5000, filters=None):
         """
         Get bars near a location with Python-based distance calculation.
         
@@ -41,6 +67,8 @@ class BarManager(models.Manager):
             lat (float): Latitude of the location.
             lng (float): Longitude of the location.
             radius (int, optional): Radius in meters to search within. Defaults to 5000.
+            filters (BarFilters, optional): Price, rating, type and open-now filters,
+                applied in the database query.
         
         Returns:
             list: Sorted list of bars within the radius, each with a 'distance' attribute in miles.
@@ -58,7 +86,7 @@ class BarManager(models.Manager):
             lng_range = radius_km / (111 * math.cos(math.radians(lat)))
             
             # Filter bars within bounding box
-            queryset = self.get_only_bars().filter(
+            queryset = filter_bars(self.get_only_bars(), filters).filter(
                 latitude__gte=lat - lat_range,
                 latitude__lte=lat + lat_range,
                 longitude__gte=lng - lng_range,
@@ -98,12 +126,31 @@ class Bar(models.Model):
     rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True, help_text="Average rating from Google (e.g., 4.3)")
     type = models.CharField(max_length=50, default='bar')
     is_open = models.BooleanField(default=False, help_text="Is the bar currently open?")
+    refreshed_at = models.DateTimeField(null=True, blank=True, help_text="Last time the bar was checked against Google Places")
+    favorites_count = models.PositiveIntegerField(default=0, help_text="Number of users who favorited the bar")
 
     created_at = models.DateTimeField(auto_now_add=True, null=True)
     updated_at = models.DateTimeField(auto_now=True, null=True)
 
     objects = BarManager()
 
+    class Meta:
+        indexes = [
+            # List filters, restricted to the rows get_only_bars() can return
+            models.Index(
+                fields=['latitude', 'longitude'], name='bar_geo_served_idx',
+                condition=models.Q(type__in=BAR_TYPES),
+            ),
+            models.Index(
+                fields=['price_level', 'rating'], name='bar_price_rating_served_idx',
+                condition=models.Q(type__in=BAR_TYPES),
+            ),
+            models.Index(
+                fields=['type', 'rating'], name='bar_type_rating_served_idx',
+                condition=models.Q(type__in=BAR_TYPES),
+            ),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -115,39 +162,179 @@ class Bar(models.Model):
         latest_wait = self.wait_times.order_by('-timestamp').first()
         return latest_wait.estimated_wait if latest_wait else None
 
+class BarOpeningIntervalManager(models.Manager):
+    def sync(self, bars):
+        """
+        Recompile the opening intervals of `bars` from their `hours` field.
+        
+        Bar.save() calls this through the sync_opening_intervals signal;
+        bulk writes of Bar.hours (bulk_update, QuerySet.update, raw SQL)
+        send no signal and must call it themselves. It replaces the bars'
+        intervals with one DELETE and one INSERT.
+        
+        Args:
+            bars (iterable): Saved Bar instances
+        """
+        bars = list(bars)
+        intervals = [
+            self.model(bar=bar, open_minute=open_minute, close_minute=close_minute)
+            for bar in bars
+            for open_minute, close_minute in parse_hours(bar.hours)
+        ]
+        self.filter(bar__in=bars).delete()
+        self.bulk_create(intervals)
+
+class BarOpeningInterval(models.Model):
+    """
+    One opening interval of a bar, compiled from Bar.hours.
+    
+    Minutes count from Sunday 00:00 in bar local time (BAR_TIME_ZONE) and the
+    interval is half-open, so a bar is open at minute m when
+    open_minute <= m < close_minute.
+    """
+    bar = models.ForeignKey(Bar, on_delete=models.CASCADE, related_name='opening_intervals')
+    open_minute = models.PositiveSmallIntegerField()
+    close_minute = models.PositiveSmallIntegerField()
+
+    objects = BarOpeningIntervalManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bar', 'open_minute', 'close_minute'], name='bar_interval_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.bar_id}: {self.open_minute}-{self.close_minute}"
+
 class WaitTime(models.Model):
     bar = models.ForeignKey(Bar, on_delete=models.CASCADE, related_name='wait_times')
     timestamp = models.DateTimeField(auto_now_add=True)
     estimated_wait = models.PositiveIntegerField(help_text="Estimated wait time in minutes")
 
+    class Meta:
+        indexes = [
+            models.Index(F('timestamp').desc(), F('id').desc(), name='waittime_recent_keyset_idx'),
+            # Per-bar history, time windows and latest-per-bar lookups
+            models.Index(F('bar'), F('timestamp').desc(), F('id').desc(), name='waittime_bar_recent_idx'),
+        ]
+
     def __str__(self):
         return f"{self.bar.name} - {self.timestamp}"
 
+class UserProfileManager(models.Manager):
+    def with_favorite_bars(self):
+        """
+        Returns profiles with their users and favorite bars loaded.
+        
+        Favorites and their bars come from one prefetch query for the whole
+        queryset, so listing any number of profiles costs three queries.
+        """
+        return self.select_related('user').prefetch_related(
+            models.Prefetch(
+                'user__favorites',
+                queryset=Favorite.objects.select_related('bar').order_by('-id'),
+            )
+        )
+    
+    def with_counts(self):
+        """
+        Returns profiles annotated with favorites_count, in a single query.
+        """
+        return self.annotate(favorites_count=models.Count('user__favorites'))
+
 class UserProfile(models.Model):
     user = models.OneToOneField(get_user_model(), on_delete=models.CASCADE)
     is_over_21 = models.BooleanField(default=False, help_text="Whether the user is 21+")
 
+    objects = UserProfileManager()
+
     def __str__(self):
         return self.user.username
     
+    @property
+    def favorite_bars(self):
+        """
+        The user's favorite bars, most recently favorited first.
+        
+        Served from the prefetch of UserProfile.objects.with_favorite_bars()
+        when available, otherwise one query.
+        """
+        return [favorite.bar for favorite in self.user.favorites.all()]
+    
 class Favorite(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorites')
     bar = models.ForeignKey(Bar, on_delete=models.CASCADE, related_name='favorited_by')
     
     class Meta:
         unique_together = ('user', 'bar')
+        indexes = [
+            models.Index(fields=['user', '-id'], name='favorite_user_recent_idx'),
+        ]
+
+class CommandCheckpoint(models.Model):
+    """
+    Progress of a resumable management command, one row per command.
+    
+    last_pk is a low-water mark: every item with a lower or equal primary
+    key was processed and its writes committed. Items that failed are kept
+    in failed_pks and retried on resume.
+    """
+    command = models.CharField(max_length=100, unique=True)
+    last_pk = models.BigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    failed_pks = models.JSONField(default=list, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        state = 'finished' if self.finished_at else f'at pk {self.last_pk}'
+        return f"{self.command} ({state})"
 
 @receiver(post_save, sender=get_user_model())
-def create_user_profile(sender, instance, created, **kwargs):
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
     """
     Signal to create a UserProfile instance when a new user is created.
+    
+    This is the only profile write for a new user: callers that need
+    non-default profile values set them on `instance.profile_defaults`
+    before saving. Later user saves (e.g. last_login updates) write nothing.
     """
-    if created:
-        UserProfile.objects.create(user=instance)
+    if created and not raw:
+        UserProfile.objects.create(user=instance, **getattr(instance, 'profile_defaults', {}))
 
-@receiver(post_save, sender=get_user_model())
-def save_user_profile(sender, instance, **kwargs):
+
+@receiver(pre_delete, sender=get_user_model())
+def release_user_favorites(sender, instance, **kwargs):
+    """
+    Signal to take a deleted user's favorites off their bars' favorites_count.
+    
+    Runs before the favorites cascade with the user, in the same
+    transaction. A user favorites a bar at most once, so every count drops
+    by one.
     """
-    Signal to save the UserProfile instance when the user is saved.
+    Bar.objects.adjust_favorites_count(instance.favorites.values_list('bar_id', flat=True), -1)
+
+
+@receiver(post_save, sender=Bar)
+@receiver(post_delete, sender=Bar)
+def invalidate_bar_caches(sender, **kwargs):
+    """
+    Signal to bump the bar data version whenever a bar is written or deleted.
+    """
+    bump_bar_data_version()
+
+
+@receiver(post_save, sender=Bar)
+def sync_opening_intervals(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Signal to recompile a bar's opening intervals when its hours are saved.
+
+    Covers the API, the admin and any other Bar.save(); saves restricted to
+    other fields and new bars without hours are skipped.
     """
-    instance.userprofile.save()
+    if raw or (update_fields is not None and 'hours' not in update_fields):
+        return
+    if created and instance.hours is None:
+        return
+    BarOpeningInterval.objects.sync([instance])
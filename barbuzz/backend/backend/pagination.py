@@ -0,0 +1,223 @@
+"""
+Keyset (cursor) pagination for the BarBuzz API.
+
+Pages are fetched with a WHERE clause on an indexed ``(value, id)`` ordering
+instead of an OFFSET, so every page costs the same regardless of depth and
+rows inserted concurrently never shift or duplicate items across pages.
+"""
+
+import base64
+import binascii
+import datetime
+import decimal
+import json
+from bisect import bisect_right
+
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    """Convert a keyset value into something JSON can round-trip exactly."""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination with opaque cursors.
+
+    Views declare the orderings they support in ``keyset_orderings``, a dict
+    mapping the ``?ordering=`` name to a tuple of field names (``-`` prefix
+    for descending). The last field must be unique, e.g. ``id``. Nulls sort
+    last in either direction.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_requested(self, request):
+        """
+        Whether the client asked for a paginated response.
+
+        Used by endpoints that predate pagination and keep returning a plain
+        list unless the client sends a cursor or page size.
+        """
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, request, orderings):
+        """
+        Resolve the requested ordering against the supported orderings.
+
+        Returns:
+            tuple: (ordering name, tuple of field names)
+        """
+        orderings = orderings or {'id': ('id',)}
+        name = request.query_params.get(self.ordering_query_param)
+        if name is None:
+            name = next(iter(orderings))
+        if name not in orderings:
+            raise ParseError(f"Invalid ordering, expected one of: {', '.join(orderings)}")
+        return name, orderings[name]
+
+    def decode_cursor(self, request, ordering_name):
+        """
+        Decode the cursor for `ordering_name`.
+
+        Returns:
+            list: Keyset values of the last row of the previous page, or None
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if payload['o'] != ordering_name or not isinstance(payload['v'], list):
+                raise ValueError
+            return payload['v']
+        except (TypeError, KeyError, ValueError, binascii.Error, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, ordering_name, values):
+        payload = json.dumps({'o': ordering_name, 'v': [_encode_value(value) for value in values]})
+        return base64.urlsafe_b64encode(payload.encode()).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def keyset_filter(fields, values):
+        """
+        Build the WHERE clause selecting rows strictly after `values`.
+
+        Args:
+            fields (tuple): Ordering field names, '-' prefixed for descending
+            values (list): Keyset values of the last row already returned
+
+        Returns:
+            Q: Lexicographic "after" condition with nulls last
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(fields, values):
+            name = field.lstrip('-')
+            if value is None:
+                # Nothing sorts after NULL at this level (nulls last)
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            after = Q(**{f'{name}__{lookup}': value}) | Q(**{f'{name}__isnull': True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        return condition
+
+    @staticmethod
+    def order_by(fields):
+        return [
+            F(field[1:]).desc(nulls_last=True) if field.startswith('-') else F(field).asc(nulls_last=True)
+            for field in fields
+        ]
+
+    @staticmethod
+    def value_of(obj, field):
+        for attr in field.lstrip('-').split('__'):
+            obj = getattr(obj, attr)
+        return obj
+
+    def paginate_queryset(self, queryset, request, view=None, orderings=None):
+        """
+        Return one page of `queryset` in keyset order.
+
+        Orderings come from `orderings` or else the view's keyset_orderings,
+        so function-based views can paginate too.
+        """
+        self.request = request
+        if orderings is None:
+            orderings = getattr(view, 'keyset_orderings', None)
+        ordering_name, fields = self.get_ordering(request, orderings)
+        page_size = self.get_page_size(request)
+        values = self.decode_cursor(request, ordering_name)
+        if values is not None and len(values) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+
+        queryset = queryset.order_by(*self.order_by(fields))
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(fields, values))
+
+        rows = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            self.next_cursor = self.encode_cursor(
+                ordering_name, [self.value_of(last, field) for field in fields]
+            )
+        return rows
+
+    def paginate_list(self, items, request, key, ordering_name):
+        """
+        Return one page of an in-memory list (e.g. bars sorted by distance).
+
+        Args:
+            items (list): Items to paginate
+            request: HTTP request with cursor/page size parameters
+            key (callable): Returns a unique, non-null sort tuple for an item
+            ordering_name (str): Name stored in the cursor
+
+        Returns:
+            list: Items of the requested page
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        items = sorted(items, key=key)
+        keys = [key(item) for item in items]
+
+        start = 0
+        values = self.decode_cursor(request, ordering_name)
+        if values is not None:
+            try:
+                start = bisect_right(keys, tuple(values))
+            except TypeError:
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = items[start:start + page_size]
+        self.next_cursor = None
+        if start + page_size < len(items):
+            self.next_cursor = self.encode_cursor(ordering_name, keys[start + page_size - 1])
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
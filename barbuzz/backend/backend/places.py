@@ -0,0 +1,187 @@
+"""
+Field-masked Google Places Details requests.
+
+A Details call without ``fields`` returns (and bills) every field Google
+has, including reviews and Atmosphere data. Each consumer here declares the
+fields it needs as a FieldMask built from named groups; masks of consumers
+sharing a call are merged with ``|``.
+
+Responses are cached per place and mask. A lookup is served by any cached
+response whose mask is a superset of the requested one, so a wide fetch
+(e.g. by update_bars) also serves later narrow ones (e.g. cleanup_bars).
+
+Nearby Search helpers follow ``next_page_token`` pagination, which the API
+caps at three pages of 20 results.
+"""
+
+import hashlib
+import time
+
+import googlemaps
+from django.conf import settings
+from django.core.cache import cache
+from googlemaps.places import PLACES_DETAIL_FIELDS
+
+# Named groups of Places Details fields. Contact (phone, website, hours) and
+# Atmosphere (rating, price level) fields are billed on top of Basic ones.
+FIELD_GROUPS = {
+    'identity': ('place_id', 'name'),
+    'location': ('formatted_address', 'geometry/location'),
+    'types': ('type',),
+    'photos': ('photo',),
+    'hours': ('opening_hours',),
+    'contact': ('formatted_phone_number', 'website'),
+    'ratings': ('price_level', 'rating'),
+}
+
+# Most masks kept in a place's cache index
+MAX_CACHED_MASKS = 8
+
+# Nearby Search returns at most 3 pages of 20 results. A next_page_token
+# becomes valid a short time after it is issued; using it earlier fails
+# with INVALID_REQUEST.
+NEARBY_MAX_PAGES = 3
+NEARBY_MAX_RESULTS = 60
+NEXT_PAGE_DELAY = 2.0
+NEXT_PAGE_ATTEMPTS = 3
+
+
+class FieldMask(frozenset):
+    """Immutable set of Places Details field names."""
+
+    def __new__(cls, fields=()):
+        fields = frozenset(fields)
+        invalid = fields - PLACES_DETAIL_FIELDS
+        if invalid:
+            raise ValueError(f"Invalid Places Details fields: {', '.join(sorted(invalid))}")
+        return super().__new__(cls, fields)
+
+    def __or__(self, other):
+        return FieldMask(frozenset.__or__(self, other))
+
+    @property
+    def key(self):
+        """Short stable identifier of the mask, for cache keys."""
+        return hashlib.sha1(','.join(sorted(self)).encode()).hexdigest()[:16]
+
+    def as_list(self):
+        return sorted(self)
+
+
+def field_mask(*groups):
+    """
+    Build a FieldMask from FIELD_GROUPS names.
+
+    Args:
+        *groups (str): Group names, e.g. 'types', 'hours'
+
+    Returns:
+        FieldMask: Union of the groups' fields
+    """
+    return FieldMask(field for group in groups for field in FIELD_GROUPS[group])
+
+
+# Everything a Bar row stores
+BAR_DETAILS_MASK = field_mask(*FIELD_GROUPS)
+
+
+def details_cache_key(place_id, mask):
+    return f"place_details_{place_id}_{mask.key}"
+
+
+def details_index_key(place_id):
+    return f"place_details_masks_{place_id}"
+
+
+def get_cached_details(place_id, mask):
+    """
+    Return a cached Details result covering `mask`, or None.
+
+    Args:
+        place_id (str): Google Places ID
+        mask (FieldMask): Fields the caller needs
+
+    Returns:
+        dict: Cached result (possibly with more fields than asked), or None
+    """
+    supersets = [
+        details_cache_key(place_id, FieldMask(fields))
+        for fields in cache.get(details_index_key(place_id)) or ()
+        if mask <= frozenset(fields)
+    ]
+    if not supersets:
+        return None
+    found = cache.get_many(supersets)
+    return next(iter(found.values()), None)
+
+
+def cache_details(place_id, mask, result, timeout=None):
+    """
+    Cache a Details result fetched with `mask` and register the mask.
+
+    Masks made redundant by `mask` are dropped from the place's index.
+    """
+    timeout = settings.PLACE_DETAILS_CACHE_TIMEOUT if timeout is None else timeout
+    index_key = details_index_key(place_id)
+    masks = [
+        fields for fields in cache.get(index_key) or ()
+        if not frozenset(fields) <= mask
+    ]
+    masks = [tuple(mask.as_list())] + masks[:MAX_CACHED_MASKS - 1]
+    cache.set_many({details_cache_key(place_id, mask): result, index_key: masks}, timeout=timeout)
+
+
+def fetch_place_details(client, place_id, mask, use_cache=True):
+    """
+    Fetch the `mask` fields of a place, reusing any covering cached result.
+
+    Args:
+        client (googlemaps.Client): Client for the Places API
+        place_id (str): Google Places ID
+        mask (FieldMask): Fields to request
+        use_cache (bool): Read and write the Details cache
+
+    Returns:
+        dict: The 'result' of the Details response
+    """
+    if use_cache:
+        cached = get_cached_details(place_id, mask)
+        if cached is not None:
+            return cached
+    result = client.place(place_id=place_id, fields=mask.as_list()).get('result', {})
+    if use_cache:
+        cache_details(place_id, mask, result)
+    return result
+
+
+def search_nearby_pages(client, location, radius, place_type, max_pages=NEARBY_MAX_PAGES):
+    """
+    Run a Nearby Search and follow its next_page_token pages.
+
+    Args:
+        client (googlemaps.Client): Client for the Places API
+        location (tuple): (lat, lng) of the circle center
+        radius (int): Circle radius in meters
+        place_type (str): Places type, e.g. 'bar'
+        max_pages (int): Most pages to fetch
+
+    Returns:
+        list: Results of all fetched pages, in API order
+    """
+    response = client.places_nearby(location=location, radius=radius, type=place_type)
+    results = list(response.get('results', []))
+    pages = 1
+    while response.get('next_page_token') and pages < max_pages:
+        token = response['next_page_token']
+        for attempt in range(NEXT_PAGE_ATTEMPTS):
+            time.sleep(NEXT_PAGE_DELAY)
+            try:
+                response = client.places_nearby(page_token=token)
+                break
+            except googlemaps.exceptions.ApiError as e:
+                # The token is not valid yet
+                if e.status != 'INVALID_REQUEST' or attempt == NEXT_PAGE_ATTEMPTS - 1:
+                    raise
+        results.extend(response.get('results', []))
+        pages += 1
+    return results
@@ -0,0 +1,154 @@
+"""
+"Best bars near me" ranking for the nearby search (sort=score).
+
+Each candidate gets a score in [0, 1] that combines these signals, each
+normalized to [0, 1] and weighted by settings.BAR_RANKING_WEIGHTS:
+
+    distance    exp(-km / BAR_RANKING_DISTANCE_SCALE_KM)
+    rating      (rating - 1) / 4
+    price       1 - |price_level - target| / 4
+    wait        1 - recent average wait / BAR_RANKING_MAX_WAIT
+    popularity  log(1 + favorites) / log(1 + most favorites among candidates)
+
+The arithmetic runs on NumPy arrays over the whole candidate set and the
+top k are selected with argpartition, so no Python code runs per candidate
+beyond building the input arrays. Missing values score 0.5.
+
+The wait and popularity signals need a database query each. Ranking runs
+within settings.BAR_RANKING_BUDGET_MS: a lookup that would start after the
+budget is spent is skipped and its weight dropped from the score.
+"""
+
+import datetime
+import logging
+import math
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Avg
+from django.utils import timezone
+
+from .models import Bar, WaitTime
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+NEUTRAL = 0.5
+
+
+def haversine_km(lat, lng, latitudes, longitudes):
+    """Vectorized haversine distance in km from (lat, lng) to each point."""
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2, lng2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _column(bars, attribute):
+    """Float array of an attribute, with NaN for missing values."""
+    values = (getattr(bar, attribute) for bar in bars)
+    return np.fromiter((np.nan if value is None else float(value) for value in values), dtype=float, count=len(bars))
+
+
+def _recent_waits(place_ids):
+    """Average estimated wait over the recent window, by place_id."""
+    since = timezone.now() - datetime.timedelta(hours=settings.BAR_RANKING_WAIT_WINDOW_HOURS)
+    return dict(
+        WaitTime.objects.filter(bar__place_id__in=place_ids, timestamp__gte=since)
+        .values('bar__place_id').annotate(wait=Avg('estimated_wait'))
+        .values_list('bar__place_id', 'wait')
+    )
+
+
+def _favorite_counts(place_ids):
+    """Number of favorites by place_id, from the Bar.favorites_count counter."""
+    return dict(
+        Bar.objects.filter(place_id__in=place_ids, favorites_count__gt=0)
+        .values_list('place_id', 'favorites_count')
+    )
+
+
+def _lookup(place_ids, lookup, default=np.nan):
+    values = lookup(place_ids)
+    return np.fromiter((values.get(place_id, default) for place_id in place_ids), dtype=float, count=len(place_ids))
+
+
+def rank_bars(bars, lat, lng, k, price_target=None, weights=None, budget_ms=None):
+    """
+    Score bars and return the k best, best first.
+
+    Sets `score` (rounded to 3 decimals) and `distance` (miles, rounded to
+    0.1 as in the distance sort) on the returned bars.
+
+    Args:
+        bars (list): Candidate Bar instances, saved or built from Places results
+        lat (float): Latitude of the user
+        lng (float): Longitude of the user
+        k (int): Number of bars to return
+        price_target (float, optional): Preferred price level, defaults to
+            settings.BAR_RANKING_PRICE_TARGET
+        weights (dict, optional): Signal weights, defaults to
+            settings.BAR_RANKING_WEIGHTS
+        budget_ms (float, optional): Time budget, defaults to
+            settings.BAR_RANKING_BUDGET_MS
+
+    Returns:
+        list: At most k bars sorted by descending score
+    """
+    started = time.monotonic()
+    weights = dict(settings.BAR_RANKING_WEIGHTS if weights is None else weights)
+    budget = (settings.BAR_RANKING_BUDGET_MS if budget_ms is None else budget_ms) / 1000
+    price_target = settings.BAR_RANKING_PRICE_TARGET if price_target is None else price_target
+    if not bars or k <= 0:
+        return []
+
+    distances = haversine_km(lat, lng, _column(bars, 'latitude'), _column(bars, 'longitude'))
+    signals = {
+        'distance': np.exp(-distances / settings.BAR_RANKING_DISTANCE_SCALE_KM),
+        'rating': np.clip((_column(bars, 'rating') - 1) / 4, 0.0, 1.0),
+        'price': 1 - np.abs(_column(bars, 'price_level') - price_target) / 4,
+    }
+
+    place_ids = [bar.place_id for bar in bars]
+    skipped = []
+    for name, lookup in (('wait', _recent_waits), ('popularity', _favorite_counts)):
+        if not weights.get(name):
+            continue
+        if time.monotonic() - started >= budget:
+            skipped.append(name)
+            weights[name] = 0.0
+            continue
+        if name == 'wait':
+            waits = _lookup(place_ids, lookup)
+            signals[name] = 1 - np.clip(waits / settings.BAR_RANKING_MAX_WAIT, 0.0, 1.0)
+        else:
+            counts = np.log1p(_lookup(place_ids, lookup, default=0.0))
+            top = counts.max()
+            signals[name] = counts / top if top > 0 else np.zeros(len(bars))
+    if skipped:
+        logger.warning("Bar ranking over its %.0f ms budget, skipped %s", budget * 1000, ', '.join(skipped))
+
+    total = sum(weights.get(name, 0.0) for name in signals)
+    scores = np.zeros(len(bars))
+    if total > 0:
+        for name, values in signals.items():
+            if weights.get(name):
+                scores += weights[name] * np.nan_to_num(values, nan=NEUTRAL)
+        scores /= total
+
+    k = min(k, len(bars))
+    # argpartition finds the top k in linear time; only those k are sorted
+    top = np.argpartition(-scores, k - 1)[:k] if k < len(bars) else np.arange(len(bars))
+    top = top[np.lexsort((top, -scores[top]))]
+
+    ranked = []
+    for index in top.tolist():
+        bar = bars[index]
+        bar.score = round(float(scores[index]), 3)
+        bar.distance = round(float(distances[index]) * 0.621371, 1)
+        ranked.append(bar)
+    elapsed = time.monotonic() - started
+    if elapsed > budget:
+        logger.warning("Ranked %d bars in %.1f ms, over the %.0f ms budget", len(bars), elapsed * 1000, budget * 1000)
+    return ranked
@@ -0,0 +1,168 @@
+"""
+Refresh planning for the Google Places maintenance commands.
+
+A full refresh calls Places Details for every bar. Incremental mode instead
+spends a fixed per-run budget of calls on the bars that need it most, by a
+priority that combines how long ago the bar was last checked, how many users
+favorited it, how often it was requested recently, and whether it is missing
+a photo or opening hours.
+"""
+
+import datetime
+import heapq
+import math
+from collections import namedtuple
+
+from django.db.models import Case, Count, DateTimeField, F, FloatField, Func, Q, Value, When
+from django.db.models.functions import Coalesce, Ln
+from django.utils import timezone
+
+from .caching import get_bar_request_counts
+
+# Priority points per unit of each signal. Staleness is counted in days,
+# favorites and requests on a log scale so popular bars do not starve the
+# long tail.
+STALENESS_WEIGHT = 1.0
+FAVORITES_WEIGHT = 5.0
+REQUESTS_WEIGHT = 3.0
+MISSING_DATA_WEIGHT = 30.0
+
+REQUEST_WINDOW_DAYS = 7
+
+# Request counts live in the cache, not the table, so they are only read for
+# this many times `budget` bars of highest priority without them.
+REQUEST_CANDIDATES_FACTOR = 3
+
+# Bars never checked rank as stale as this many days
+NEVER_CHECKED_DAYS = 365.0
+
+# Hours that count as missing: never fetched, or fetched empty
+MISSING_HOURS = Q(hours__isnull=True) | Q(hours=[]) | Q(hours='')
+MISSING_DATA = Q(photo_reference='') | MISSING_HOURS
+
+# (key, label, lower bound in days, upper bound in days)
+FRESHNESS_BUCKETS = (
+    ('day', '< 1 day', 0, 1),
+    ('week', '1-7 days', 1, 7),
+    ('month', '7-30 days', 7, 30),
+    ('older', '> 30 days', 30, None),
+)
+
+RefreshCandidate = namedtuple('RefreshCandidate', ['priority', 'bar_id', 'place_id'])
+
+
+def refresh_priority(stale_days, favorites, requests, missing_data):
+    """
+    Compute the refresh priority of one bar.
+
+    Args:
+        stale_days (float): Days since the bar was last checked
+        favorites (int): Number of users who favorited the bar
+        requests (int): Detail requests over the request window
+        missing_data (bool): Whether the bar has no photo or no hours
+
+    Returns:
+        float: Higher values are refreshed first
+    """
+    return (
+        STALENESS_WEIGHT * stale_days
+        + FAVORITES_WEIGHT * math.log1p(favorites)
+        + REQUESTS_WEIGHT * math.log1p(requests)
+        + (MISSING_DATA_WEIGHT if missing_data else 0.0)
+    )
+
+
+class _DaysSince(Func):
+    """Fractional days from a datetime expression to `now`."""
+    arg_joiner = ' - '
+    template = 'CAST(EXTRACT(EPOCH FROM (%(expressions)s)) AS double precision) / 86400'
+    output_field = FloatField()
+
+    def __init__(self, expression, now):
+        super().__init__(Value(now, output_field=DateTimeField()), expression)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template='(julianday(%(expressions)s))', arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+
+def _priority_without_requests(now):
+    """refresh_priority() without the request term, as a SQL expression."""
+    last_checked = Coalesce('refreshed_at', 'updated_at', 'created_at')
+    stale_days = Coalesce(_DaysSince(last_checked, now), Value(NEVER_CHECKED_DAYS))
+    return (
+        Value(STALENESS_WEIGHT) * stale_days
+        + Value(FAVORITES_WEIGHT) * Ln(F('favorites_count') + Value(1.0))
+        + Case(When(MISSING_DATA, then=Value(MISSING_DATA_WEIGHT)), default=Value(0.0), output_field=FloatField())
+    )
+
+
+def plan_refresh(queryset, budget):
+    """
+    Pick the `budget` bars of `queryset` with the highest refresh priority.
+
+    The priority is computed in the query; only the best
+    REQUEST_CANDIDATES_FACTOR * `budget` rows are loaded and re-ranked with
+    their cached request counts.
+
+    Args:
+        queryset (QuerySet): Bars eligible for refresh
+        budget (int): Maximum number of bars to return
+
+    Returns:
+        list: RefreshCandidate tuples, highest priority first
+    """
+    if budget <= 0:
+        return []
+    rows = list(
+        queryset.annotate(priority=_priority_without_requests(timezone.now()))
+        .order_by('-priority', 'pk')
+        .values_list('priority', 'id', 'place_id')[:budget * REQUEST_CANDIDATES_FACTOR]
+    )
+    requests = get_bar_request_counts((row[1] for row in rows), days=REQUEST_WINDOW_DAYS)
+    candidates = (
+        RefreshCandidate(priority + REQUESTS_WEIGHT * math.log1p(requests.get(bar_id, 0)), bar_id, place_id)
+        for priority, bar_id, place_id in rows
+    )
+    return heapq.nlargest(budget, candidates)
+
+
+def freshness_report(queryset):
+    """
+    Summarize how recently the bars of `queryset` were checked.
+
+    Args:
+        queryset (QuerySet): Bars to summarize
+
+    Returns:
+        dict: 'total', 'never' and one count per FRESHNESS_BUCKETS key,
+            plus 'missing_photo' and 'missing_hours'
+    """
+    now = timezone.now()
+    aggregates = {
+        'total': Count('id'),
+        'never': Count('id', filter=Q(refreshed_at__isnull=True)),
+        'missing_photo': Count('id', filter=Q(photo_reference='')),
+        'missing_hours': Count('id', filter=MISSING_HOURS),
+    }
+    for key, _, low, high in FRESHNESS_BUCKETS:
+        condition = Q(refreshed_at__lte=now - datetime.timedelta(days=low))
+        if high is not None:
+            condition &= Q(refreshed_at__gt=now - datetime.timedelta(days=high))
+        aggregates[key] = Count('id', filter=condition)
+    return queryset.aggregate(**aggregates)
+
+
+def format_freshness_report(report):
+    """Render a freshness_report() result as lines for command output."""
+    total = report['total'] or 1
+    lines = [f"Freshness of {report['total']} bars:"]
+    for key, label, _, _ in FRESHNESS_BUCKETS:
+        lines.append(f"  {label:>10}: {report[key]:>7} ({100 * report[key] / total:.1f}%)")
+    lines.append(f"  {'never':>10}: {report['never']:>7} ({100 * report['never'] / total:.1f}%)")
+    checked = report['day'] + report['week']
+    lines.append(f"  Checked in the last 7 days: {100 * checked / total:.1f}%")
+    lines.append(f"  Missing photo: {report['missing_photo']}, missing hours: {report['missing_hours']}")
+    return lines
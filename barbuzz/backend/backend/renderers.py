@@ -0,0 +1,90 @@
+"""
+Renderers for the BarBuzz REST API.
+
+Provides an orjson-backed JSON renderer that is a drop-in replacement for
+DRF's JSONRenderer, falling back to the stdlib encoder whenever orjson is
+unavailable or cannot represent the data.
+"""
+
+import datetime
+import decimal
+
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+def orjson_default(obj):
+    """
+    Encode the types orjson does not handle natively, matching DRF's JSONEncoder.
+    
+    Args:
+        obj: Object orjson could not serialize
+        
+    Returns:
+        A JSON-serializable representation of the object
+    """
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, decimal.Decimal):
+        # Serializers coerce decimals to strings by default; raw Decimals
+        # in hand-built responses are encoded as numbers like DRF does.
+        return float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, QuerySet):
+        return tuple(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, 'tolist'):
+        # Numpy arrays and scalars not covered by OPT_SERIALIZE_NUMPY
+        return obj.tolist()
+    if hasattr(obj, '__getitem__'):
+        cls = list if isinstance(obj, (list, tuple)) else dict
+        return cls(obj)
+    if hasattr(obj, '__iter__'):
+        return tuple(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson.
+    
+    Datetimes, UUIDs and numpy scalars/arrays are encoded natively by orjson;
+    Decimals and other DRF-supported types go through orjson_default. Indented
+    output (e.g. the browsable API) and anything orjson rejects are rendered
+    by the stdlib-based JSONRenderer instead.
+    """
+    options = (
+        orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if orjson is not None else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render `data` into JSON, returning a bytestring.
+        """
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if (orjson is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=orjson_default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Keep the output a strict javascript subset, as JSONRenderer does
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,238 @@
+"""
+Shared execution engine for the Google Places maintenance commands.
+
+Commands hand the runner an iterable of items, a `fetch` callable and a
+`handle` callable. `fetch` (the Places API call) runs on a bounded thread
+pool behind a token-bucket limiter set to our Places QPS quota; `handle`
+(the database work) runs on the calling thread, so commands never share a
+database connection between threads. Failures are captured per item and
+progress is reported with throughput and an ETA. With a Checkpoint the
+run's position is saved along with each progress line.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import googlemaps
+from django.conf import settings
+
+ItemError = namedtuple('ItemError', ['item', 'error'])
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing `rate` acquisitions per second.
+
+    Up to `capacity` tokens accumulate while idle, so short bursts are
+    allowed without exceeding the average rate.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class RunStats:
+    """Counters and captured errors of one CommandRunner.run()."""
+
+    def __init__(self, total=None):
+        self.total = total
+        self.processed = 0
+        self.errors = []
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def succeeded(self):
+        return self.processed - len(self.errors)
+
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+def add_runner_arguments(parser):
+    """
+    Add the --workers, --qps and --batch-size options shared by
+    runner-based commands.
+    """
+    parser.add_argument('--workers', type=int, default=settings.PLACES_API_WORKERS,
+                        help='Concurrent Places API requests')
+    parser.add_argument('--qps', type=float, default=settings.PLACES_API_QPS,
+                        help='Places API requests per second (0 for no limit)')
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='Rows written per bulk update transaction')
+
+
+def places_client(options):
+    """
+    Return a Google Maps client for a runner-based command.
+
+    The client's own limiter is set to the same rate as the runner's token
+    bucket so it never adds delays of its own.
+
+    Args:
+        options (dict): Command options including 'qps'
+
+    Returns:
+        googlemaps.Client: Client for the Places API
+    """
+    qps = int(options['qps']) if options['qps'] >= 1 else 60
+    return googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY, queries_per_second=qps)
+
+
+class CommandRunner:
+    """
+    Run a fetch/handle pipeline over items with bounded concurrency.
+
+    Args:
+        command (BaseCommand): Command whose stdout, stderr and style are used
+        workers (int): Thread pool size for `fetch`
+        qps (float): Maximum `fetch` calls per second (0 for no limit)
+        label (str): Plural noun for progress lines, e.g. 'bars'
+        report_every (float): Seconds between progress lines
+    """
+
+    def __init__(self, command, workers=8, qps=0, label='items', report_every=5.0):
+        self.command = command
+        self.workers = max(1, workers)
+        self.limiter = TokenBucket(qps)
+        self.label = label
+        self.report_every = report_every
+
+    @classmethod
+    def from_options(cls, command, options, **kwargs):
+        """Build a runner from the --workers/--qps command options."""
+        return cls(command, workers=options['workers'], qps=options['qps'], **kwargs)
+
+    def _fetch(self, fetch, item):
+        self.limiter.acquire()
+        return fetch(item)
+
+    def run(self, items, fetch, handle=None, total=None, checkpoint=None):
+        """
+        Fetch every item concurrently and handle the results as they finish.
+
+        At most two items per worker are in flight, so `items` may be a lazy
+        iterator (e.g. QuerySet.iterator()) over any number of rows. An
+        exception from `fetch` or `handle` is recorded against its item and
+        the run continues.
+        
+        With a checkpoint, items must be model instances in primary key
+        order; the checkpoint is saved with every progress line, when the
+        run is interrupted, and at the end. Marking it finished is left to
+        the command, which knows whether the run covered everything.
+
+        Args:
+            items (iterable): Items to process
+            fetch (callable): fetch(item) -> result, called on a worker thread
+            handle (callable, optional): handle(item, result), called on this thread
+            total (int, optional): Number of items, for progress and ETA
+            checkpoint (Checkpoint, optional): Progress tracker to update
+
+        Returns:
+            RunStats: Processed count, captured errors and elapsed time
+        """
+        stats = RunStats(total)
+        last_report = stats.started
+        items = iter(items)
+        exhausted = False
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            try:
+                while True:
+                    while not exhausted and len(in_flight) < self.workers * 2:
+                        try:
+                            item = next(items)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        in_flight[pool.submit(self._fetch, fetch, item)] = item
+                        if checkpoint is not None:
+                            checkpoint.started(item.pk)
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        item = in_flight.pop(future)
+                        succeeded = True
+                        try:
+                            result = future.result()
+                            if handle is not None:
+                                handle(item, result)
+                        except Exception as e:
+                            succeeded = False
+                            stats.errors.append(ItemError(item, e))
+                            self.command.stderr.write(f"Error processing {item}: {e}")
+                        stats.processed += 1
+                        if checkpoint is not None:
+                            checkpoint.done(item.pk, succeeded)
+
+                    if time.monotonic() - last_report >= self.report_every:
+                        self.report(stats)
+                        if checkpoint is not None:
+                            checkpoint.save()
+                        last_report = time.monotonic()
+            except BaseException:
+                for future in in_flight:
+                    future.cancel()
+                if checkpoint is not None:
+                    # Items still in flight stay above the saved position
+                    checkpoint.save()
+                raise
+
+        if checkpoint is not None:
+            checkpoint.save()
+        self.report(stats, final=True)
+        return stats
+
+    def report(self, stats, final=False):
+        """Write a progress line, or the final summary line."""
+        elapsed = stats.elapsed
+        rate = stats.processed / elapsed if elapsed > 0 else 0.0
+        if final:
+            line = (f"Processed {stats.processed} {self.label} in {_format_duration(elapsed)} "
+                    f"({rate:.1f}/s), {len(stats.errors)} errors")
+            style = self.command.style.WARNING if stats.errors else self.command.style.SUCCESS
+            self.command.stdout.write(style(line))
+            return
+        if stats.total:
+            remaining = max(0, stats.total - stats.processed)
+            eta = _format_duration(remaining / rate) if rate > 0 else '?'
+            line = (f"  {stats.processed}/{stats.total} {self.label} "
+                    f"({100 * stats.processed / stats.total:.1f}%), {rate:.1f}/s, ETA {eta}, "
+                    f"{len(stats.errors)} errors")
+        else:
+            line = f"  {stats.processed} {self.label}, {rate:.1f}/s, {len(stats.errors)} errors"
+        self.command.stdout.write(line)
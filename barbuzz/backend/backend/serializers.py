@@ -6,7 +6,10 @@ This module defines the serializers that convert complex data types
 into JSON for the REST API.
 """
 
+import datetime
+
 from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
 from django.contrib.auth import get_user_model
 from .models import Bar, WaitTime, UserProfile
 from .settings import GOOGLE_MAPS_API_KEY
@@ -47,15 +50,29 @@ class BarSerializer(serializers.ModelSerializer):
     """
     Serializer for Bar model.
     
-    Includes calculated fields like distance and image URL
-    generated from the bar's photo reference.
+    Includes calculated fields like distance and ranking score, the image
+    URL generated from the bar's photo reference, and whether the requesting
+    user has favorited the bar (from the 'favorite_ids' context entry).
     """
     distance = serializers.FloatField(read_only=True, required=False)
+    score = serializers.FloatField(read_only=True, required=False)
     image = serializers.SerializerMethodField()
+    is_favorite = serializers.SerializerMethodField()
 
     class Meta:
         model = Bar
-        fields = '__all__'
+        # Internal bookkeeping of the refresh commands and favorite counter
+        exclude = ('refreshed_at', 'favorites_count')
+
+    def __init__(self, *args, **kwargs):
+        """
+        Accept an optional `fields` argument limiting the output fields.
+        """
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     def get_image(self, obj):
         """
@@ -72,6 +89,241 @@ class BarSerializer(serializers.ModelSerializer):
             return f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={obj.photo_reference}&key={api_key}"
         return None
 
+    def get_is_favorite(self, obj):
+        """
+        Check the bar against the user's cached favorite set.
+        
+        Bars built from Places results are not saved yet, so they are
+        matched by place_id instead of primary key.
+        
+        Args:
+            obj (Bar): Bar instance being serialized
+            
+        Returns:
+            bool: Whether the bar is a favorite, or None without a favorite set
+        """
+        favorite_ids = self.context.get('favorite_ids')
+        if favorite_ids is None:
+            return None
+        if obj.pk is not None:
+            return obj.pk in favorite_ids.bar_ids
+        return obj.place_id in favorite_ids.place_ids
+
+class FastBarSerializer:
+    """
+    Read-only serializer producing the same output as BarSerializer.
+
+    The per-field converters are compiled once from BarSerializer's own
+    field list, so each row is built with a flat loop of attribute lookups
+    instead of DRF's per-field get_attribute/to_representation machinery.
+    Only usable for output; writes still go through BarSerializer.
+    """
+    source_serializer_class = BarSerializer
+    # Model fields read by each SerializerMethodField, for QuerySet.only()
+    method_field_sources = {'image': ('photo_reference',), 'is_favorite': ('place_id',)}
+    _compiled = None
+
+    def __init__(self, instance=None, many=False, context=None, fields=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        self.fields = None if fields is None else frozenset(fields)
+
+    @classmethod
+    def compile(cls):
+        """
+        Build the (name, attribute, converter, on_missing) plan for each field.
+
+        ``on_missing`` mirrors Field.get_attribute for attributes that are not
+        set on the instance (e.g. ``distance`` on bars loaded from the
+        database): 'skip' omits the key, 'null' emits None, 'raise' re-raises.
+        Method fields are stored with a None attribute and their method name,
+        and are bound to a serializer carrying this serializer's context in
+        bind(); the method receives the instance. ISO 8601 datetime fields
+        are stored as the field itself and bound to the active timezone once
+        per batch in bind().
+
+        Returns:
+            list: One tuple per output field, in BarSerializer's field order
+        """
+        if cls.__dict__.get('_compiled') is not None:
+            return cls._compiled
+
+        template = cls.source_serializer_class()
+        plan = []
+        for name, field in template.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                plan.append((name, None, field.method_name, 'raise'))
+                continue
+            if isinstance(field, serializers.BooleanField):
+                convert = bool
+            elif isinstance(field, serializers.IntegerField):
+                convert = int
+            elif isinstance(field, serializers.FloatField):
+                convert = float
+            elif isinstance(field, serializers.CharField):
+                convert = str
+            elif isinstance(field, serializers.JSONField) and not field.binary:
+                convert = None
+            elif (isinstance(field, serializers.DateTimeField)
+                    and str(getattr(field, 'format', api_settings.DATETIME_FORMAT)).lower() == ISO_8601):
+                convert = field
+            else:
+                convert = field.to_representation
+            if field.allow_null:
+                on_missing = 'null'
+            elif not field.required and field.default is serializers.empty:
+                on_missing = 'skip'
+            else:
+                on_missing = 'raise'
+            plan.append((name, field.source, convert, on_missing))
+        cls._compiled = plan
+        return plan
+
+    @classmethod
+    def field_names(cls):
+        """
+        Return the names of all output fields, in output order.
+        """
+        return [name for name, _, _, _ in cls.compile()]
+
+    @classmethod
+    def model_fields(cls, fields=None):
+        """
+        Return the model fields needed to render `fields`, for QuerySet.only().
+
+        Args:
+            fields (iterable, optional): Output field names, or None for all
+
+        Returns:
+            list: Model field names, or None if a field's sources are unknown
+        """
+        model = cls.source_serializer_class.Meta.model
+        concrete = {field.name for field in model._meta.concrete_fields}
+        names = []
+        for name, source, _, _ in cls.compile():
+            if fields is not None and name not in fields:
+                continue
+            if source is None:
+                if name not in cls.method_field_sources:
+                    return None
+                names.extend(cls.method_field_sources[name])
+            elif source in concrete:
+                names.append(source)
+        return names
+
+    def bind(self):
+        """
+        Resolve per-request state (the active timezone, the context and the
+        requested fields) into the compiled plan.
+
+        Returns:
+            list: The compiled plan with method and datetime fields replaced
+            by converters
+        """
+        method_source = self.source_serializer_class(context=self.context)
+        bound = []
+        for name, source, convert, on_missing in self.compile():
+            if self.fields is not None and name not in self.fields:
+                continue
+            if source is None:
+                convert = getattr(method_source, convert)
+            elif isinstance(convert, serializers.DateTimeField):
+                convert = _iso_datetime_converter(convert)
+            bound.append((name, source, convert, on_missing))
+        return bound
+
+    def to_representation(self, instance, plan=None):
+        """
+        Convert a single bar into a plain dict.
+
+        Args:
+            instance (Bar): Bar instance being serialized
+            plan (list, optional): Bound plan from bind(), reused across a list
+
+        Returns:
+            dict: Field name to primitive value, matching BarSerializer
+        """
+        ret = {}
+        for name, source, convert, on_missing in plan or self.bind():
+            if source is None:
+                ret[name] = convert(instance)
+                continue
+            try:
+                value = getattr(instance, source)
+            except AttributeError:
+                if on_missing == 'skip':
+                    continue
+                if on_missing == 'raise':
+                    raise
+                value = None
+            if value is None or convert is None:
+                ret[name] = value
+            else:
+                ret[name] = convert(value)
+        return ret
+
+    @property
+    def data(self):
+        plan = self.bind()
+        if self.many:
+            to_representation = self.to_representation
+            return [to_representation(item, plan) for item in self.instance]
+        return self.to_representation(self.instance, plan)
+
+def parse_fieldset(query_params, available):
+    """
+    Resolve ``?fields=`` and ``?exclude=`` into the output fields of a response.
+
+    Args:
+        query_params: Request query parameters
+        available (list): All output field names, in output order
+
+    Returns:
+        tuple: Selected field names in output order, or None for all fields
+
+    Raises:
+        ValueError: If an unknown field name is requested
+    """
+    requested = query_params.get('fields')
+    excluded = query_params.get('exclude')
+    if not requested and not excluded:
+        return None
+
+    requested = {name.strip() for name in (requested or '').split(',') if name.strip()}
+    excluded = {name.strip() for name in (excluded or '').split(',') if name.strip()}
+    unknown = (requested | excluded) - set(available)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    return tuple(
+        name for name in available
+        if (not requested or name in requested) and name not in excluded
+    )
+
+def _iso_datetime_converter(field):
+    """
+    Return a converter matching DateTimeField.to_representation for ISO 8601.
+
+    The field timezone is looked up once here rather than once per value;
+    anything other than an aware datetime falls back to the field itself.
+    """
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if not isinstance(value, datetime.datetime) or value.utcoffset() is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    return convert
+
 class WaitTimeSerializer(serializers.ModelSerializer):
     """
     Serializer for wait time data reported by users.
@@ -88,10 +340,23 @@ class UserProfileSerializer(serializers.ModelSerializer):
     """
     Serializer for user profiles.
     
-    Includes nested serialization of the user's favorite bars.
+    Includes nested serialization of the user's favorite bars. Use
+    UserProfile.objects.with_favorite_bars() to avoid a query per profile.
     """
     favorite_bars = BarSerializer(many=True, read_only=True)
     
     class Meta:
         model = UserProfile
-        fields = ['user', 'favorite_bars']
\ No newline at end of file
+        fields = ['user', 'favorite_bars']
+
+class UserProfileSummarySerializer(serializers.ModelSerializer):
+    """
+    Lightweight serializer for user profiles with counts only.
+    
+    Expects profiles from UserProfile.objects.with_counts().
+    """
+    favorites_count = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = UserProfile
+        fields = ['user', 'is_over_21', 'favorites_count']
\ No newline at end of file
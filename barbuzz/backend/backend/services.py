@@ -3,11 +3,14 @@ Service classes for external API interactions.
 """
 
 import logging
+import time
 import requests
 import googlemaps
 from django.conf import settings
 from django.core.cache import cache
 
+from .places import BAR_DETAILS_MASK, fetch_place_details
+
 logger = logging.getLogger(__name__)
 
 class PlacesService:
@@ -23,19 +26,60 @@ class PlacesService:
         )
         self.client = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
 
+    @staticmethod
+    def nearby_cache_key(lat, lng, radius=5000):
+        """Cache key for search_nearby results, shared by every limit."""
+        return f"nearby_{lat}_{lng}_{radius}"
+
+    @staticmethod
+    def text_cache_key(query):
+        """Cache key for search_text results, shared by every limit."""
+        return f"text_{query}"
+
+    @staticmethod
+    def get_result_version(cache_key):
+        """
+        Return the version stamp of a cached search result.
+        
+        A new stamp is written every time results are fetched from the API,
+        so it can be used to build ETags without looking at the results.
+        
+        Args:
+            cache_key (str): Key from nearby_cache_key or text_cache_key
+            
+        Returns:
+            str: Version stamp, or None if nothing is cached
+        """
+        return cache.get(f"{cache_key}_version")
+
+    @staticmethod
+    def _cache_results(cache_key, results, timeout):
+        """Cache search results together with a fresh version stamp."""
+        cache.set_many(
+            {cache_key: results, f"{cache_key}_version": format(time.time_ns(), 'x')},
+            timeout=timeout,
+        )
+
     def search_nearby(self, lat, lng, radius=5000, limit=12):
-        """Search for bars near a location with caching."""
-        cache_key = f"nearby_{lat}_{lng}_{radius}_{limit}"
+        """
+        Search for bars near a location with caching.
+        
+        The whole first page of results (at most 20) is cached, so searches
+        of the same area with different limits share one API call. A limit
+        of None returns the whole page.
+        """
+        cache_key = self.nearby_cache_key(lat, lng, radius)
         cached = cache.get(cache_key)
         if cached is not None:
             logger.info("Cache hit for %s", cache_key)
-            return cached
+            return cached[:limit]
         try:
             resp = self.client.places_nearby(
                 location=(lat, lng), radius=radius, type="bar"
             )
-            results = resp.get("results", [])[:limit]
-            cache.set(cache_key, results, timeout=900)
+            page = resp.get("results", [])
+            self._cache_results(cache_key, page, timeout=900)
+            results = page[:limit]
             logger.info(
                 "Fetched %d nearby bars from API and cached under %s",
                 len(results),
@@ -47,16 +91,22 @@ class PlacesService:
             return []
 
     def search_text(self, query, limit=12):
-        """Search for bars by text using Google Places."""
-        cache_key = f"text_{query}_{limit}"
+        """
+        Search for bars by text using Google Places.
+        
+        Like search_nearby, the whole first page is cached and a limit of
+        None returns all of it.
+        """
+        cache_key = self.text_cache_key(query)
         cached = cache.get(cache_key)
         if cached is not None:
             logger.info("Cache hit for %s", cache_key)
-            return cached
+            return cached[:limit]
         try:
             resp = self.client.places(query=query, type="bar")
-            results = resp.get("results", [])[:limit]
-            cache.set(cache_key, results, timeout=900)
+            page = resp.get("results", [])
+            self._cache_results(cache_key, page, timeout=900)
+            results = page[:limit]
             logger.info(
                 "Fetched %d bars by text from API and cached under %s",
                 len(results),
@@ -67,25 +117,29 @@ class PlacesService:
             logger.error("Error fetching bars by text: %s", e)
             return []
     
-    def get_place_details(self, place_id):
+    def get_place_details(self, place_id, *masks):
         """
         Fetch detailed information about a place from Google Places API.
         
+        Only the fields in `masks` are requested; callers sharing one call
+        pass their masks together and they are merged. A cached response
+        for any superset of the fields is reused.
+        
         Args:
             place_id (str): Google Places ID
+            *masks (FieldMask): Fields needed, defaults to everything a Bar stores
             
         Returns:
             dict: Place details
         """
-        cache_key = f"place_details_{place_id}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            logger.info("Cache hit for place details %s", place_id)
-            return cached_data
+        mask = BAR_DETAILS_MASK
+        if masks:
+            mask = masks[0]
+            for other in masks[1:]:
+                mask |= other
         try:
-            data = self.client.place(place_id=place_id).get("result", {})
-            cache.set(cache_key, data, timeout=600)  # Cache for 10 minutes
-            logger.info("Fetched place details for %s from API and cached", place_id)
+            data = fetch_place_details(self.client, place_id, mask)
+            logger.info("Fetched place details for %s (%s)", place_id, ", ".join(mask.as_list()))
             return data
         except Exception as e:
             logger.error("Error fetching place details: %s", e)
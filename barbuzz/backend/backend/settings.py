@@ -97,6 +97,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'cache-control',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -213,12 +214,22 @@ MFA_PASSKEY_SIGNUP_ENABLED = True
 
 REST_FRAMEWORK = {
    'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'backend.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
    ),
    'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAdminUser', 
    ),
+   # orjson for API clients, browsable API kept for humans
+   'DEFAULT_RENDERER_CLASSES': (
+        'backend.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+   ),
+   'DEFAULT_PARSER_CLASSES': (
+        'backend.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+   ),
 }
 SPECTACULAR_SETTINGS = {
     "EXTERNAL_DOCS": {"description": "allauth", "url": "/_allauth/openapi.html"},
@@ -249,6 +260,54 @@ else:
         }
     }
 
+# Rendered-response cache for bar lists
+BAR_LIST_CACHE_TIMEOUT = int(os.environ.get("BAR_LIST_CACHE_TIMEOUT", 300))
+# Decimal places kept from lat/lng in bar list cache keys (3 ~= 110 m)
+BAR_LIST_CACHE_COORD_PRECISION = int(os.environ.get("BAR_LIST_CACHE_COORD_PRECISION", 3))
+# Per-user favorite bar id sets, invalidated whenever favorites change
+FAVORITE_IDS_CACHE_TIMEOUT = int(os.environ.get("FAVORITE_IDS_CACHE_TIMEOUT", 3600))
+# Token -> user lookups, shared across workers and per process. Logout drops
+# both; other processes keep their local copy for the local timeout at most,
+# so keep it to a second or two (0 disables the local tier).
+# Deactivated users stay authenticated until both timeouts have passed.
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.environ.get("AUTH_TOKEN_CACHE_TIMEOUT", 60))
+AUTH_TOKEN_LOCAL_CACHE_TIMEOUT = int(os.environ.get("AUTH_TOKEN_LOCAL_CACHE_TIMEOUT", 1))
+AUTH_TOKEN_LOCAL_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_LOCAL_CACHE_SIZE", 4096))
+
+# Local time zone of the bars, used to evaluate opening hours
+BAR_TIME_ZONE = os.environ.get("BAR_TIME_ZONE", "America/Chicago")
+
+# Places maintenance commands: request rate (our Places API quota) and concurrency
+PLACES_API_QPS = float(os.environ.get("PLACES_API_QPS", 50))
+PLACES_API_WORKERS = int(os.environ.get("PLACES_API_WORKERS", 16))
+
+# Cached Places Details responses, shared by the API and the commands
+PLACE_DETAILS_CACHE_TIMEOUT = int(os.environ.get("PLACE_DETAILS_CACHE_TIMEOUT", 600))
+
+# Incremental refresh: Places Details calls per run and request counter retention
+PLACES_REFRESH_BUDGET = int(os.environ.get("PLACES_REFRESH_BUDGET", 1000))
+BAR_REQUESTS_RETENTION_DAYS = int(os.environ.get("BAR_REQUESTS_RETENTION_DAYS", 8))
+
+# Nearby sort=score ranking (backend/ranking.py): signal weights, the
+# candidates fetched from Places, and the time budget of one ranking
+BAR_RANKING_WEIGHTS = {
+    'distance': float(os.environ.get("BAR_RANKING_WEIGHT_DISTANCE", 0.35)),
+    'rating': float(os.environ.get("BAR_RANKING_WEIGHT_RATING", 0.25)),
+    'price': float(os.environ.get("BAR_RANKING_WEIGHT_PRICE", 0.1)),
+    'wait': float(os.environ.get("BAR_RANKING_WEIGHT_WAIT", 0.15)),
+    'popularity': float(os.environ.get("BAR_RANKING_WEIGHT_POPULARITY", 0.15)),
+}
+# Distance (km) at which the distance signal drops to 1/e
+BAR_RANKING_DISTANCE_SCALE_KM = float(os.environ.get("BAR_RANKING_DISTANCE_SCALE_KM", 1.0))
+# Price level that scores best when the request does not filter on price
+BAR_RANKING_PRICE_TARGET = float(os.environ.get("BAR_RANKING_PRICE_TARGET", 2))
+# Recorded wait times averaged over this window; waits from the maximum up score 0
+BAR_RANKING_WAIT_WINDOW_HOURS = int(os.environ.get("BAR_RANKING_WAIT_WINDOW_HOURS", 3))
+BAR_RANKING_MAX_WAIT = int(os.environ.get("BAR_RANKING_MAX_WAIT", 60))
+# Only the first Places page (at most 20 results) is fetched, so more has no effect
+BAR_RANKING_CANDIDATES = int(os.environ.get("BAR_RANKING_CANDIDATES", 20))
+BAR_RANKING_BUDGET_MS = float(os.environ.get("BAR_RANKING_BUDGET_MS", 50))
+
 # API URL prefix for routing (set to 'api' or '' depending on environment)
 # API_URL_PREFIX = os.environ.get("API_URL_PREFIX", "api")
 
@@ -0,0 +1,159 @@
+"""
+Snapshot files of the bar dataset.
+
+A snapshot is NDJSON, compressed with zstd (or gzip when the zstandard
+package is not installed). The first line is a header; it is followed by
+one section per table, each a run of records tagged with the table name:
+
+    {"snapshot": "barbuzz", "version": 1, "created_at": "...", "tables": [...]}
+    {"t": "bar", "place_id": "...", "name": "...", ...}
+    {"t": "favorite", "username": "...", "place_id": "..."}
+    {"t": "wait_time", "place_id": "...", "timestamp": "...", "estimated_wait": 15}
+
+Rows reference bars by place_id and users by username rather than by
+primary key, so a snapshot loads into any database.
+"""
+
+import datetime
+import gzip
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is listed in requirements.txt
+    zstandard = None
+
+SNAPSHOT_FORMAT = 'barbuzz'
+SNAPSHOT_VERSION = 1
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Bar fields that identify rows in one database only, and the favorite
+# counter, which follows the favorites actually loaded
+BAR_EXCLUDED_FIELDS = ('id', 'created_at', 'updated_at', 'favorites_count')
+
+
+def default_compression():
+    return 'zstd' if zstandard is not None else 'gzip'
+
+
+def open_snapshot(path, mode, compression=None):
+    """
+    Open a snapshot file as a text stream.
+
+    Args:
+        path (str): File path
+        mode (str): 'w' to write, 'r' to read
+        compression (str, optional): 'zstd', 'gzip' or 'none' when writing,
+            defaults to zstd if available; detected from the file when reading
+
+    Returns:
+        file: Text stream of NDJSON lines
+    """
+    if mode == 'w':
+        compression = compression or default_compression()
+        if compression == 'zstd':
+            if zstandard is None:
+                raise ValueError("zstd compression needs the zstandard package")
+            raw = zstandard.ZstdCompressor(level=10, threads=-1).stream_writer(open(path, 'wb'))
+        elif compression == 'gzip':
+            raw = gzip.open(path, 'wb', compresslevel=6)
+        else:
+            raw = open(path, 'wb')
+        return io.TextIOWrapper(raw, encoding='utf-8')
+
+    with open(path, 'rb') as file:
+        magic = file.read(4)
+    if magic.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ValueError("The snapshot is zstd compressed but zstandard is not installed")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    elif magic.startswith(GZIP_MAGIC):
+        raw = gzip.open(path, 'rb')
+    else:
+        raw = open(path, 'rb')
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+class SnapshotEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder keeping microseconds, which it rounds to milliseconds."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def write_line(stream, record):
+    stream.write(json.dumps(record, cls=SnapshotEncoder, separators=(',', ':')))
+    stream.write('\n')
+
+
+def snapshot_header(tables):
+    return {
+        'snapshot': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'created_at': timezone.now(),
+        'tables': list(tables),
+    }
+
+
+class SnapshotReader:
+    """
+    Iterate a snapshot section by section.
+
+    Sections are read in file order. Reading a section skips what is left
+    of earlier sections and stops at the first record of a later one.
+
+    Raises:
+        ValueError: If the file is not a snapshot of a supported version
+    """
+
+    def __init__(self, stream):
+        self._lines = iter(stream)
+        header = json.loads(next(self._lines, 'null') or 'null')
+        if not isinstance(header, dict) or header.get('snapshot') != SNAPSHOT_FORMAT:
+            raise ValueError("Not a BarBuzz snapshot")
+        if header.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {header.get('version')}")
+        self.header = header
+        self._order = header.get('tables', [])
+        self._pending = None
+
+    def _next(self):
+        if self._pending is not None:
+            record, self._pending = self._pending, None
+            return record
+        for line in self._lines:
+            if line.strip():
+                return json.loads(line)
+        return None
+
+    def section(self, table):
+        """
+        Yield the records of `table` with their 't' tag removed.
+
+        Args:
+            table (str): 'bar', 'favorite' or 'wait_time'
+        """
+        while True:
+            record = self._next()
+            if record is None:
+                return
+            if record.get('t') != table:
+                if self._comes_before(record.get('t'), table):
+                    continue
+                self._pending = record
+                return
+            del record['t']
+            yield record
+
+    def _comes_before(self, table, other):
+        if table not in self._order or other not in self._order:
+            return False
+        return self._order.index(table) < self._order.index(other)
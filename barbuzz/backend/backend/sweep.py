@@ -0,0 +1,89 @@
+"""
+Grid tiling for city-scale Nearby Search sweeps.
+
+A Nearby Search returns at most 60 places, so a city is covered by tiling
+its bounding box into square cells and searching the circle circumscribed
+around each cell. Neighbouring circles overlap, so no point of the box is
+missed. A tile whose search comes back full is split into four quadrant
+tiles of half the radius, recursively, until results fit or the radius
+reaches a floor.
+"""
+
+import math
+from collections import namedtuple
+
+# Meters per degree of latitude
+METERS_PER_DEGREE = 111_320
+
+Tile = namedtuple('Tile', ['lat', 'lng', 'radius', 'depth'])
+
+
+def _cell_degrees(lat, side):
+    """Degrees of latitude and longitude spanned by `side` meters at `lat`."""
+    lat_step = side / METERS_PER_DEGREE
+    lng_step = side / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return lat_step, lng_step
+
+
+def tile_bounds(south, west, north, east, radius):
+    """
+    Cover a bounding box with circles of `radius` meters.
+
+    Args:
+        south (float): Minimum latitude
+        west (float): Minimum longitude
+        north (float): Maximum latitude
+        east (float): Maximum longitude
+        radius (float): Circle radius in meters
+
+    Returns:
+        list: Tile tuples at depth 0, row by row from the south-west corner
+    """
+    # A square cell of side r * sqrt(2) is exactly covered by its circumcircle
+    side = radius * math.sqrt(2)
+    lat_step, _ = _cell_degrees((south + north) / 2, side)
+    rows = max(1, math.ceil((north - south) / lat_step))
+    tiles = []
+    for row in range(rows):
+        lat = south + (row + 0.5) * lat_step
+        _, lng_step = _cell_degrees(lat, side)
+        columns = max(1, math.ceil((east - west) / lng_step))
+        for column in range(columns):
+            tiles.append(Tile(lat, west + (column + 0.5) * lng_step, radius, 0))
+    return tiles
+
+
+def subdivide(tile):
+    """
+    Split a tile into the four tiles covering its cell's quadrants.
+
+    Args:
+        tile (Tile): Tile whose search was saturated
+
+    Returns:
+        list: Four tiles of half the radius, one level deeper
+    """
+    radius = tile.radius / 2
+    # Quadrant centers sit a quarter of the cell side from the center
+    lat_offset, lng_offset = _cell_degrees(tile.lat, radius * math.sqrt(2) / 2)
+    return [
+        Tile(tile.lat + lat_sign * lat_offset, tile.lng + lng_sign * lng_offset, radius, tile.depth + 1)
+        for lat_sign in (-1, 1)
+        for lng_sign in (-1, 1)
+    ]
+
+
+def parse_bounds(value):
+    """
+    Parse a 'south,west,north,east' bounding box.
+
+    Raises:
+        ValueError: If the value is malformed or the box is empty
+    """
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError("Expected south,west,north,east")
+    south, west, north, east = parts
+    if not (-90 <= south < north <= 90 and -180 <= west < east <= 180):
+        raise ValueError("Invalid bounding box")
+    return south, west, north, east
@@ -0,0 +1,27 @@
+"""
+Shared setup for the backend test suite.
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..models import Bar
+
+# Tests never talk to Redis or Google (the key only has to look like one)
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=TEST_CACHES, GOOGLE_MAPS_API_KEY='AIza-test-key')
+class BarBuzzTestCase(TestCase):
+    """TestCase with a local memory cache, emptied before each test."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+def make_bar(place_id, **fields):
+    """Create a bar with defaults for the required fields."""
+    values = {'name': place_id, 'address': '', 'latitude': 30.0, 'longitude': -97.0, 'type': 'bar'}
+    values.update(fields)
+    return Bar.objects.create(place_id=place_id, **values)
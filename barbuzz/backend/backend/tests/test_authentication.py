@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from ..authentication import CachedTokenAuthentication, local_token_cache, token_cache_key
+from .base import BarBuzzTestCase
+
+
+class CachedTokenAuthenticationTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        local_token_cache.clear()
+        self.addCleanup(local_token_cache.clear)
+        self.user = User.objects.create_user('token', 'token@example.com', 'pw')
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_miss_loads_once_then_hits(self):
+        with self.assertNumQueries(1):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual((user.pk, user.username, token.key), (self.user.pk, 'token', self.token.key))
+        entry = cache.get(token_cache_key(self.token.key))
+        self.assertNotIn('password', entry[1])
+        with self.assertNumQueries(0):
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user.email, 'token@example.com')
+
+    def test_local_tier(self):
+        with mock.patch.object(local_token_cache, 'timeout', 5):
+            self.auth.authenticate_credentials(self.token.key)
+            cache.clear()
+            with self.assertNumQueries(0):
+                self.auth.authenticate_credentials(self.token.key)
+        # Without the local tier the shared cache is the first stop
+        with mock.patch.object(local_token_cache, 'timeout', 0):
+            local_token_cache.clear()
+            self.auth.authenticate_credentials(self.token.key)
+            self.assertIsNone(local_token_cache.get(token_cache_key(self.token.key)))
+
+    def test_unknown_token(self):
+        with self.assertRaisesMessage(AuthenticationFailed, 'Invalid token.'):
+            self.auth.authenticate_credentials('not-a-token')
+        self.assertIsNone(cache.get(token_cache_key('not-a-token')))
+
+    def test_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaisesMessage(AuthenticationFailed, 'User inactive or deleted.'):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_logout_invalidates(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(client.get('/api/auth/user/').json()['username'], 'token')
+        self.assertEqual(client.post('/api/auth/logout/').status_code, 200)
+        self.assertIsNone(cache.get(token_cache_key(self.token.key)))
+        self.assertIsNone(local_token_cache.get(token_cache_key(self.token.key)))
+        self.assertEqual(client.get('/api/auth/user/').status_code, 401)
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..batching import BatchWriter, bar_writer
+from ..caching import get_bar_data_version
+from ..models import Bar, BarOpeningInterval
+from .base import BarBuzzTestCase, make_bar
+
+FRIDAY_NIGHT = [{'open': {'day': 5, 'time': '2000'}, 'close': {'day': 6, 'time': '0200'}}]
+
+
+def updates(queries):
+    return [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+
+
+class BatchWriterTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bars = [make_bar(f'bar{index}', rating=Decimal('4.20'), website='') for index in range(5)]
+
+    def test_unchanged_values_are_not_written(self):
+        bars = list(Bar.objects.order_by('pk'))
+        stamp = bars[0].updated_at
+        with CaptureQueriesContext(connection) as queries, bar_writer() as writer:
+            for bar in bars:
+                # 4.2 normalizes to the stored Decimal
+                self.assertFalse(writer.update(bar, rating=4.2, website='', name=bar.name))
+        self.assertEqual(queries.captured_queries, [])
+        self.assertEqual(writer.updated, 0)
+        self.assertEqual(Bar.objects.get(pk=bars[0].pk).updated_at, stamp)
+
+    def test_writes_only_changed_fields(self):
+        bars = list(Bar.objects.order_by('pk'))
+        with CaptureQueriesContext(connection) as queries, bar_writer() as writer:
+            writer.update(bars[0], website='https://one.example.com')
+            writer.update(bars[1], website='https://two.example.com', rating=4.2)
+            writer.update(bars[2], rating='3.5')
+        statements = updates(queries)
+        # One bulk_update per set of changed fields, touching updated_at
+        self.assertEqual(len(statements), 2)
+        website_update = next(sql for sql in statements if '"website"' in sql)
+        self.assertNotIn('"rating"', website_update)
+        self.assertNotIn('"name"', ' '.join(statements))
+        self.assertTrue(all('"updated_at"' in sql for sql in statements))
+        self.assertEqual(writer.updated, 3)
+
+        stored = {bar.place_id: bar for bar in Bar.objects.all()}
+        self.assertEqual(stored['bar1'].website, 'https://two.example.com')
+        self.assertEqual(stored['bar2'].rating, Decimal('3.50'))
+        self.assertGreater(stored['bar0'].updated_at, self.bars[0].updated_at)
+        self.assertEqual(stored['bar3'].updated_at, self.bars[3].updated_at)
+
+    def test_flushes_every_batch_size_rows(self):
+        flushes = []
+        writer = BatchWriter(Bar, batch_size=2, after_flush=lambda changed, deleted: flushes.append(
+            (sorted(bar.place_id for bar in changed), sorted(deleted))
+        ))
+        with writer:
+            for bar in Bar.objects.order_by('pk').iterator():
+                if bar.place_id == 'bar4':
+                    writer.delete(bar)
+                else:
+                    writer.update(bar, name=bar.name.upper())
+        self.assertEqual(flushes, [(['bar0', 'bar1'], []), (['bar2', 'bar3'], []), ([], [self.bars[4].pk])])
+        self.assertEqual((writer.updated, writer.deleted), (4, 1))
+        self.assertEqual(sorted(Bar.objects.values_list('name', flat=True)), ['BAR0', 'BAR1', 'BAR2', 'BAR3'])
+
+    def test_interrupted_run_keeps_processed_rows(self):
+        with self.assertRaises(KeyboardInterrupt), bar_writer() as writer:
+            writer.update(self.bars[0], name='Renamed')
+            raise KeyboardInterrupt
+        self.assertEqual(Bar.objects.get(pk=self.bars[0].pk).name, 'Renamed')
+
+    def test_bar_bookkeeping(self):
+        version = get_bar_data_version()
+        with self.captureOnCommitCallbacks(execute=True), bar_writer() as writer:
+            writer.update(self.bars[0], hours=FRIDAY_NIGHT)
+            writer.update(self.bars[1], name='Renamed')
+        self.assertEqual(list(BarOpeningInterval.objects.values_list('bar_id', flat=True)), [self.bars[0].pk])
+        self.assertNotEqual(get_bar_data_version(), version)
@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..models import Bar, Favorite
+from ..views import BULK_FAVORITES_MAX_IDS
+from .base import BarBuzzTestCase, make_bar
+
+
+class BulkFavoritesTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('fan', 'fan@example.com', 'pw')
+        self.bars = [make_bar(f'bar{index}') for index in range(3)]
+        self.ids = [bar.pk for bar in self.bars]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, **data):
+        return self.client.post('/api/favorites/bulk/', data, format='json')
+
+    def counts(self):
+        return list(Bar.objects.order_by('pk').values_list('favorites_count', flat=True))
+
+    def test_add_and_remove(self):
+        missing = max(self.ids) + 100
+        response = self.bulk(add=[self.ids[0], self.ids[1], missing])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'favorites': self.ids[:2], 'not_found': [missing]})
+        self.assertEqual(self.counts(), [1, 1, 0])
+
+        response = self.bulk(add=[self.ids[2]], remove=[self.ids[0]])
+        self.assertEqual(response.json(), {'favorites': self.ids[1:], 'not_found': []})
+        self.assertEqual(self.counts(), [0, 1, 1])
+
+    def test_idempotent(self):
+        Favorite.objects.create(user=self.user, bar=self.bars[0])
+        Bar.objects.filter(pk=self.ids[0]).update(favorites_count=1)
+        for _ in range(2):
+            self.bulk(add=self.ids[:2], remove=[self.ids[2]])
+            self.assertEqual(self.counts(), [1, 1, 0])
+        for _ in range(2):
+            self.bulk(remove=self.ids)
+            self.assertEqual(self.counts(), [0, 0, 0])
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_constant_query_count(self):
+        self.bulk(add=self.ids[:1])
+        with CaptureQueriesContext(connection) as few:
+            self.bulk(add=self.ids[1:2], remove=self.ids[:1])
+        more = [make_bar(f'more{index}').pk for index in range(10)]
+        with CaptureQueriesContext(connection) as many:
+            self.bulk(add=more, remove=self.ids[1:2])
+        self.assertEqual(len(many), len(few))
+
+    def test_invalid_requests(self):
+        cases = [
+            ({'add': 'bar0'}, "'add' and 'remove' must be lists of bar IDs"),
+            ({'add': [1, 'two']}, "'add' and 'remove' must be lists of bar IDs"),
+            ({'add': [True]}, "'add' and 'remove' must be lists of bar IDs"),
+            ({'add': [self.ids[0]], 'remove': [self.ids[0]]}, "Bar IDs cannot be both added and removed"),
+            ({'add': list(range(1, BULK_FAVORITES_MAX_IDS + 2))},
+             f"At most {BULK_FAVORITES_MAX_IDS} bar IDs per request"),
+        ]
+        for data, error in cases:
+            with self.subTest(data=str(data)[:40]):
+                response = self.bulk(**data)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'error': error})
+        self.assertFalse(Favorite.objects.exists())
@@ -0,0 +1,123 @@
+import io
+import threading
+
+from django.core.management.base import BaseCommand
+
+from ..checkpoints import Checkpoint
+from ..models import Bar, CommandCheckpoint
+from ..runner import CommandRunner
+from .base import BarBuzzTestCase, make_bar
+
+
+class CheckpointTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pks = [make_bar(f'bar{index}').pk for index in range(6)]
+
+    def saved(self):
+        return CommandCheckpoint.objects.get(command='test')
+
+    def test_low_water_mark(self):
+        checkpoint = Checkpoint('test')
+        for pk in self.pks[:4]:
+            checkpoint.started(pk)
+        # Items finish out of order; the mark only passes fully done prefixes
+        checkpoint.done(self.pks[1])
+        checkpoint.done(self.pks[2], succeeded=False)
+        self.assertEqual(checkpoint.state.last_pk, 0)
+        checkpoint.done(self.pks[0])
+        self.assertEqual(checkpoint.state.last_pk, self.pks[2])
+        checkpoint.save()
+        self.assertEqual((self.saved().last_pk, self.saved().failed_pks, self.saved().processed),
+                         (self.pks[2], [self.pks[2]], 3))
+
+    def test_resume_skips_done_items_and_retries_failures(self):
+        checkpoint = Checkpoint('test')
+        for pk in self.pks[:3]:
+            checkpoint.started(pk)
+            checkpoint.done(pk, succeeded=pk != self.pks[1])
+        checkpoint.save()
+
+        checkpoint = Checkpoint('test', resume=True)
+        self.assertTrue(checkpoint.resuming)
+        self.assertIn('1 failed to retry', checkpoint.describe())
+        pending = list(checkpoint.pending(Bar.objects.all()).values_list('pk', flat=True))
+        self.assertEqual(pending, [self.pks[1]] + self.pks[3:])
+
+        for pk in pending:
+            checkpoint.started(pk)
+            checkpoint.done(pk)
+        checkpoint.finish()
+        self.assertEqual(self.saved().failed_pks, [])
+        self.assertIsNotNone(self.saved().finished_at)
+        # The retried item counts once per attempt
+        self.assertEqual(self.saved().processed, 7)
+
+    def test_failures_keep_the_run_open(self):
+        checkpoint = Checkpoint('test')
+        checkpoint.started(self.pks[0])
+        checkpoint.done(self.pks[0], succeeded=False)
+        checkpoint.finish()
+        self.assertIsNone(self.saved().finished_at)
+        self.assertTrue(Checkpoint('test', resume=True).resuming)
+
+    def test_finished_and_fresh_runs(self):
+        checkpoint = Checkpoint('test')
+        checkpoint.started(self.pks[0])
+        checkpoint.done(self.pks[0])
+        checkpoint.finish()
+
+        finished = Checkpoint('test', resume=True)
+        self.assertTrue(finished.finished)
+        self.assertIn('nothing to resume', finished.describe())
+        fresh = Checkpoint('test')
+        self.assertFalse(fresh.resuming)
+        self.assertEqual(fresh.pending(Bar.objects.all()).count(), 6)
+        fresh.save()
+        self.assertEqual((self.saved().last_pk, self.saved().processed), (0, 0))
+
+    def test_flushes_before_saving(self):
+        flushed = []
+        checkpoint = Checkpoint('test', flush=lambda: flushed.append(CommandCheckpoint.objects.get().last_pk))
+        checkpoint.started(self.pks[0])
+        checkpoint.done(self.pks[0])
+        checkpoint.save()
+        # The flush runs while the previous position is still saved
+        self.assertEqual(flushed, [0])
+
+
+class InterruptedRunTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bars = [make_bar(f'bar{index}') for index in range(10)]
+        self.command = BaseCommand(stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_resume_costs_only_the_remaining_work(self):
+        fetched, interrupt_at = [], [self.bars[6].pk]
+        lock = threading.Lock()
+
+        def fetch(bar):
+            if bar.pk in interrupt_at:
+                raise KeyboardInterrupt
+            with lock:
+                fetched.append(bar.pk)
+
+        checkpoint = Checkpoint('test')
+        with self.assertRaises(KeyboardInterrupt):
+            CommandRunner(self.command, workers=1).run(
+                checkpoint.pending(Bar.objects.all()).iterator(), fetch, checkpoint=checkpoint
+            )
+        saved = CommandCheckpoint.objects.get(command='test')
+        # The item in flight next to the interrupted one may not be recorded
+        self.assertIn(saved.last_pk, (self.bars[4].pk, self.bars[5].pk))
+        self.assertIsNone(saved.finished_at)
+
+        fetched.clear()
+        interrupt_at.clear()
+        checkpoint = Checkpoint('test', resume=True)
+        CommandRunner(self.command, workers=1).run(
+            checkpoint.pending(Bar.objects.all()).iterator(), fetch, checkpoint=checkpoint
+        )
+        checkpoint.finish()
+        self.assertEqual(sorted(fetched), [bar.pk for bar in self.bars if bar.pk > saved.last_pk])
+        self.assertIsNotNone(CommandCheckpoint.objects.get(command='test').finished_at)
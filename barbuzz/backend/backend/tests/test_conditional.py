@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from ..models import Favorite
+from .base import BarBuzzTestCase, make_bar
+
+
+class ConditionalGetTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('etag', 'etag@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.bar = make_bar('bar', rating='4.50')
+
+    def assertRevalidates(self, url, params=None):
+        """GET `url`, then check that its ETag answers a 304; return the ETag."""
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Authorization', response['Vary'])
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        return etag
+
+    def test_bar(self):
+        url = f'/api/bars/{self.bar.pk}/'
+        etag = self.assertRevalidates(url)
+        self.assertNotEqual(self.assertRevalidates(url, {'fields': 'name'}), etag)
+
+        self.bar.name = 'Renamed'
+        self.bar.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Renamed')
+
+    def test_bar_etag_follows_favorites(self):
+        url = f'/api/bars/{self.bar.pk}/'
+        etag = self.assertRevalidates(url)
+        self.client.post(f'/api/favorites/{self.bar.pk}/toggle/')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_favorite'])
+
+    def test_favorites(self):
+        etag = self.assertRevalidates('/api/favorites/')
+        Favorite.objects.create(user=self.user, bar=self.bar)
+        response = self.client.get('/api/favorites/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([bar['place_id'] for bar in response.json()], ['bar'])
+
+    def test_profile(self):
+        for params in (None, {'summary': 'true'}):
+            with self.subTest(params=params):
+                etag = self.assertRevalidates('/api/user-profiles/me/', params)
+                favorite = Favorite.objects.create(user=self.user, bar=self.bar)
+                response = self.client.get('/api/user-profiles/me/', params, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                favorite.delete()
+
+    @mock.patch('googlemaps.Client.places_nearby')
+    def test_nearby_list(self, places_nearby):
+        places_nearby.return_value = {'results': [{
+            'place_id': 'place', 'name': 'Place', 'vicinity': '1 Main St', 'types': ['bar'],
+            'geometry': {'location': {'lat': 30.0, 'lng': -97.0}},
+        }]}
+        params = {'lat': 30.0, 'lng': -97.0}
+        etag = self.assertRevalidates('/api/bars/', params)
+        self.assertEqual(places_nearby.call_count, 1)
+        # Another sparse fieldset is another representation
+        self.assertNotEqual(self.assertRevalidates('/api/bars/', {**params, 'fields': 'name'}), etag)
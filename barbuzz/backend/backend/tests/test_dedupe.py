@@ -0,0 +1,77 @@
+import random
+
+from django.contrib.auth.models import User
+
+from ..dedupe import cluster_pairs, find_duplicates, merge_cluster, normalize_address, normalize_name
+from ..models import Bar, Favorite, WaitTime
+from ..utils import haversine_distance
+from .base import BarBuzzTestCase, make_bar
+
+
+class NormalizeTests(BarBuzzTestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize_name("The Joe's Bar & Grill"), 'joes bar grill')
+        self.assertEqual(normalize_address('12 North Main Street, Austin, USA'), '12 n main st austin')
+
+
+class FindDuplicatesTests(BarBuzzTestCase):
+    def test_pair_in_non_adjacent_columns(self):
+        # 46 m apart, but their own latitudes used to put them two grid columns apart
+        first = make_bar('a', name="Joe's Tavern", address='1 Ocean Ave', latitude=37.774875, longitude=-122.492371)
+        second = make_bar('b', name='Joes Tavern', address='1 Ocean Ave', latitude=37.774551, longitude=-122.492693)
+        pairs = find_duplicates()
+        self.assertEqual([{pair.bar_id, pair.other_id} for pair in pairs], [{first.pk, second.pk}])
+        self.assertAlmostEqual(pairs[0].distance, 46, delta=1)
+
+    def test_matches_brute_force(self):
+        generator = random.Random(7)
+        for latitude in (30.0, 61.0, -45.0):
+            Bar.objects.all().delete()
+            bars = [
+                make_bar(f'{latitude}-{index}', name='Same Name', latitude=latitude + generator.uniform(0, 0.004),
+                         longitude=-97.0 + generator.uniform(0, 0.004))
+                for index in range(60)
+            ]
+            expected = {
+                frozenset((bar.pk, other.pk))
+                for index, bar in enumerate(bars) for other in bars[index + 1:]
+                if haversine_distance(bar.latitude, bar.longitude, other.latitude, other.longitude) * 1000 <= 75
+            }
+            found = {frozenset((pair.bar_id, pair.other_id)) for pair in find_duplicates(threshold=0)}
+            with self.subTest(latitude=latitude):
+                self.assertTrue(expected)
+                self.assertEqual(found, expected)
+
+    def test_different_names_or_far_apart(self):
+        make_bar('a', name='Joes Tavern', latitude=30.0, longitude=-97.0)
+        make_bar('b', name='Rainey Street Lounge', latitude=30.0001, longitude=-97.0)
+        make_bar('c', name='Joes Tavern', latitude=30.01, longitude=-97.0)
+        self.assertEqual(find_duplicates(), [])
+
+    def test_cluster_pairs(self):
+        first = make_bar('a', name='Joes Tavern')
+        second = make_bar('b', name="Joe's Tavern")
+        third = make_bar('c', name='Joes Tavern', longitude=-97.0002)
+        self.assertEqual(cluster_pairs(find_duplicates()), [[first.pk, second.pk, third.pk]])
+
+
+class MergeClusterTests(BarBuzzTestCase):
+    def test_merge(self):
+        kept = make_bar('kept', name='Joes Tavern')
+        removed = make_bar('removed', name="Joe's Tavern", website='https://joes.example.com')
+        users = [User.objects.create_user(name, f'{name}@example.com', 'pw') for name in 'abcd']
+        # "a" favorited both bars and keeps a single favorite
+        for user, bar in ((users[0], kept), (users[1], kept), (users[2], kept), (users[0], removed), (users[3], removed)):
+            Favorite.objects.create(user=user, bar=bar)
+        Bar.objects.filter(pk=kept.pk).update(favorites_count=3)
+        Bar.objects.filter(pk=removed.pk).update(favorites_count=2)
+        WaitTime.objects.create(bar=removed, estimated_wait=20)
+
+        survivor, removed_ids = merge_cluster([kept.pk, removed.pk])
+        self.assertEqual((survivor.pk, removed_ids), (kept.pk, [removed.pk]))
+        kept.refresh_from_db()
+        self.assertEqual(kept.website, 'https://joes.example.com')
+        self.assertEqual(kept.favorites_count, 4)
+        self.assertEqual(set(Favorite.objects.values_list('user', 'bar')), {(user.pk, kept.pk) for user in users})
+        self.assertEqual(WaitTime.objects.get().bar_id, kept.pk)
+        self.assertFalse(Bar.objects.filter(pk=removed.pk).exists())
@@ -0,0 +1,46 @@
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from ..models import Bar, Favorite
+from .base import BarBuzzTestCase, make_bar
+
+
+def counts():
+    return dict(Bar.objects.values_list('place_id', 'favorites_count'))
+
+
+class FavoritesCountTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('fan', 'fan@example.com', 'pw')
+        self.other = User.objects.create_user('other', 'other@example.com', 'pw')
+        self.bars = [make_bar(f'bar{index}') for index in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_toggle(self):
+        bar = self.bars[0]
+        self.assertEqual(self.client.post(f'/api/favorites/{bar.pk}/toggle/').status_code, 200)
+        self.assertEqual(counts()['bar0'], 1)
+        self.client.post(f'/api/favorites/{bar.pk}/toggle/')
+        self.assertEqual(counts()['bar0'], 0)
+
+    def test_deleting_a_user_releases_their_favorites(self):
+        for user, bar in ((self.user, self.bars[0]), (self.user, self.bars[1]), (self.other, self.bars[1])):
+            Favorite.objects.create(user=user, bar=bar)
+        Bar.objects.filter(pk=self.bars[0].pk).update(favorites_count=1)
+        Bar.objects.filter(pk=self.bars[1].pk).update(favorites_count=2)
+
+        self.user.delete()
+        self.assertEqual(counts(), {'bar0': 0, 'bar1': 1, 'bar2': 0})
+        User.objects.filter(pk=self.other.pk).delete()
+        self.assertEqual(counts(), {'bar0': 0, 'bar1': 0, 'bar2': 0})
+
+    def test_reconcile(self):
+        Favorite.objects.create(user=self.user, bar=self.bars[0])
+        Bar.objects.filter(pk=self.bars[1].pk).update(favorites_count=5)
+        call_command('reconcile_favorite_counts', stdout=io.StringIO())
+        self.assertEqual(counts(), {'bar0': 1, 'bar1': 0, 'bar2': 0})
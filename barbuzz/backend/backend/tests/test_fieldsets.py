@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..models import Favorite
+from ..serializers import FastBarSerializer, parse_fieldset
+from .base import BarBuzzTestCase, make_bar
+
+
+class ParseFieldsetTests(BarBuzzTestCase):
+    available = ['id', 'name', 'rating', 'image']
+
+    def test_all_fields(self):
+        self.assertIsNone(parse_fieldset({}, self.available))
+
+    def test_fields_and_exclude_keep_output_order(self):
+        self.assertEqual(parse_fieldset({'fields': 'image, name'}, self.available), ('name', 'image'))
+        self.assertEqual(parse_fieldset({'exclude': 'rating'}, self.available), ('id', 'name', 'image'))
+        self.assertEqual(parse_fieldset({'fields': 'name,rating', 'exclude': 'rating'}, self.available), ('name',))
+
+    def test_unknown_field(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown fields: color, size'):
+            parse_fieldset({'fields': 'name,size', 'exclude': 'color'}, self.available)
+
+
+class SparseFieldsetApiTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('sparse', 'sparse@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.bar = make_bar('bar', description='A long description', photo_reference='ref')
+
+    def bar_queries(self, queries):
+        return [query['sql'] for query in queries.captured_queries if 'FROM "backend_bar"' in query['sql']]
+
+    def test_retrieve(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/bars/{self.bar.pk}/', {'fields': 'name,image'})
+        self.assertEqual(response.json(), {'name': 'bar', 'image': mock.ANY})
+        self.assertIn('photoreference=ref', response.json()['image'])
+        [sql] = self.bar_queries(queries)
+        self.assertNotIn('"description"', sql)
+
+    def test_retrieve_exclude(self):
+        data = self.client.get(f'/api/bars/{self.bar.pk}/', {'exclude': 'description,hours'}).json()
+        self.assertNotIn('description', data)
+        self.assertNotIn('hours', data)
+        self.assertEqual(data['name'], 'bar')
+
+    def test_unknown_field_is_a_bad_request(self):
+        for url in (f'/api/bars/{self.bar.pk}/', '/api/bars/', '/api/favorites/'):
+            with self.subTest(url=url):
+                response = self.client.get(url, {'fields': 'name,secret', 'lat': 30.0, 'lng': -97.0})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'error': 'Unknown fields: secret'})
+
+    def test_favorites(self):
+        Favorite.objects.create(user=self.user, bar=self.bar)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/favorites/', {'fields': 'id,name,is_favorite'})
+        self.assertEqual(response.json(), [{'id': self.bar.pk, 'name': 'bar', 'is_favorite': True}])
+        self.assertFalse(any('"description"' in sql for sql in self.bar_queries(queries)))
+
+    @mock.patch('googlemaps.Client.places_nearby')
+    def test_nearby_list(self, places_nearby):
+        places_nearby.return_value = {'results': [{
+            'place_id': 'place', 'name': 'Place', 'vicinity': '1 Main St', 'types': ['bar'],
+            'geometry': {'location': {'lat': 30.0, 'lng': -97.0}},
+        }]}
+        response = self.client.get('/api/bars/', {'lat': 30.0, 'lng': -97.0, 'fields': 'name,distance'})
+        self.assertEqual(response.json(), [{'distance': 0.0, 'name': 'Place'}])
+
+    def test_model_fields(self):
+        self.assertEqual(FastBarSerializer.model_fields(('name', 'image', 'distance')), ['photo_reference', 'name'])
@@ -0,0 +1,95 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from ..filters import NO_FILTERS, bar_matches, filter_bars, parse_bar_filters
+from ..models import Bar
+from .base import BarBuzzTestCase, make_bar
+
+
+class ParseBarFiltersTests(BarBuzzTestCase):
+    def test_no_parameters(self):
+        self.assertEqual(parse_bar_filters({}), NO_FILTERS)
+
+    def test_normalizes_values(self):
+        filters = parse_bar_filters({'price_level': '3,1,3', 'rating': '4.5', 'type': ' nightclub,bar ',
+                                     'open_now': 'TRUE'})
+        self.assertEqual(filters.price_levels, (1, 3))
+        self.assertEqual(filters.min_rating, Decimal('4.5'))
+        self.assertEqual(filters.types, ('bar', 'nightclub'))
+        self.assertTrue(filters.open_now)
+
+    def test_rejects_malformed_values(self):
+        for params in (
+            {'price_level': 'cheap'}, {'price_level': '5'}, {'price_level': '-1'},
+            {'rating': 'good'}, {'rating': '5.5'}, {'rating': '-1'},
+            {'rating': 'NaN'}, {'rating': 'sNaN'}, {'rating': 'Infinity'}, {'rating': '-inf'},
+            {'type': 'restaurant'},
+        ):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                parse_bar_filters(params)
+
+
+class ApplyBarFiltersTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        make_bar('cheap', price_level=1, rating=Decimal('4.80'), type='bar')
+        make_bar('pricey', price_level=4, rating=Decimal('3.90'), type='nightclub')
+        make_bar('both', price_level=2, rating=None, type='bar+nightclub')
+
+    def matching(self, **params):
+        filters = parse_bar_filters(params)
+        in_sql = set(filter_bars(Bar.objects.all(), filters).values_list('place_id', flat=True))
+        in_memory = {bar.place_id for bar in Bar.objects.all() if bar_matches(bar, filters)}
+        self.assertEqual(in_sql, in_memory)
+        return in_sql
+
+    def test_price_rating_and_type(self):
+        self.assertEqual(self.matching(price_level='1,2'), {'cheap', 'both'})
+        # Unknown ratings never match a rating filter
+        self.assertEqual(self.matching(rating='3.9'), {'cheap', 'pricey'})
+        self.assertEqual(self.matching(type='nightclub'), {'pricey', 'both'})
+        self.assertEqual(self.matching(type='bar', rating='4'), {'cheap'})
+
+
+class BarListFilterParamsTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('filters', 'filters@example.com', 'pw'))
+
+    def test_non_finite_rating_is_a_bad_request(self):
+        for rating in ('NaN', 'Infinity'):
+            with self.subTest(rating=rating):
+                response = self.client.get('/api/bars/', {'lat': 30.0, 'lng': -97.0, 'rating': rating})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'error': 'Invalid rating'})
+
+    def places(self, count):
+        """Places results rated 3.0 except the last two, rated 4.5."""
+        return {'results': [{
+            'place_id': f'place{index}', 'name': f'Place {index}', 'vicinity': '1 Main St',
+            'formatted_address': '1 Main St', 'types': ['bar'], 'rating': 4.5 if index >= count - 2 else 3.0,
+            'geometry': {'location': {'lat': 30.0, 'lng': -97.0}},
+        } for index in range(count)]}
+
+    def test_nearby_matches_beyond_limit(self):
+        with mock.patch('googlemaps.Client.places_nearby', return_value=self.places(8)) as places_nearby:
+            for params in ({'limit': 3, 'rating': '4.3'}, {'limit': 1, 'rating': '4.3'}, {'limit': 3}):
+                with self.subTest(params=params):
+                    data = self.client.get('/api/bars/', {'lat': 30.0, 'lng': -97.0, **params}).json()
+                    expected = ['place6', 'place7'] if 'rating' in params else ['place0', 'place1', 'place2']
+                    self.assertEqual([bar['place_id'] for bar in data], expected[:params['limit']])
+        # Every limit and filter is served from one cached Places page
+        self.assertEqual(places_nearby.call_count, 1)
+
+    def test_global_search_matches_beyond_limit(self):
+        with mock.patch('googlemaps.Client.places', return_value=self.places(8)) as places:
+            for limit in (3, 1):
+                with self.subTest(limit=limit):
+                    data = self.client.get('/api/bars/', {'global': 'true', 'query': 'dive', 'limit': limit,
+                                                          'rating': '4.3'}).json()
+                    self.assertEqual([bar['place_id'] for bar in data], ['place6', 'place7'][:limit])
+        self.assertEqual(places.call_count, 1)
@@ -0,0 +1,121 @@
+from datetime import datetime
+import io
+import json
+import zoneinfo
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from ..hours import DAY_MINUTES, WEEK_MINUTES, minute_of_week, parse_hours
+from ..models import Bar, BarOpeningInterval
+from .base import BarBuzzTestCase, make_bar
+
+CHICAGO = zoneinfo.ZoneInfo('America/Chicago')
+
+# Friday 20:00 to Saturday 02:00
+FRIDAY_NIGHT = [{'open': {'day': 5, 'time': '2000'}, 'close': {'day': 6, 'time': '0200'}}]
+
+
+def intervals(bar):
+    return list(
+        BarOpeningInterval.objects.filter(bar=bar).order_by('open_minute').values_list('open_minute', 'close_minute')
+    )
+
+
+class ParseHoursTests(BarBuzzTestCase):
+    def test_periods(self):
+        self.assertEqual(parse_hours(FRIDAY_NIGHT), [(5 * DAY_MINUTES + 1200, 6 * DAY_MINUTES + 120)])
+
+    def test_legacy_json_string(self):
+        self.assertEqual(parse_hours('[{"open": {"day": 1, "time": "1700"}, "close": {"day": 1, "time": "2300"}}]'),
+                         [(DAY_MINUTES + 1020, DAY_MINUTES + 1380)])
+
+    def test_period_wrapping_the_week_is_split(self):
+        periods = [{'open': {'day': 6, 'time': '2200'}, 'close': {'day': 0, 'time': '0200'}}]
+        self.assertEqual(parse_hours(periods), [(0, 120), (6 * DAY_MINUTES + 1320, WEEK_MINUTES)])
+
+    def test_always_open(self):
+        self.assertEqual(parse_hours([{'open': {'day': 0, 'time': '0000'}}]), [(0, WEEK_MINUTES)])
+
+    def test_weekday_text(self):
+        lines = [
+            'Monday: Closed',
+            'Tuesday: 5:00 – 11:30 PM',
+            'Wednesday: 4 PM – 2 AM',
+            'Sunday: Open 24 hours',
+        ]
+        self.assertEqual(parse_hours(lines), [
+            (0, DAY_MINUTES),
+            (2 * DAY_MINUTES + 1020, 2 * DAY_MINUTES + 1410),
+            (3 * DAY_MINUTES + 960, 4 * DAY_MINUTES + 120),
+        ])
+
+    def test_unparseable_values(self):
+        for value in (None, '', [], 'not json', [{'open': {'day': 1, 'time': 'late'}}], ['Someday: 5 PM – 2 AM'],
+                      [1, 'Monday: 5 PM – 2 AM']):
+            with self.subTest(value=value):
+                self.assertEqual(parse_hours(value), [])
+
+
+class MinuteOfWeekTests(BarBuzzTestCase):
+    def test_counts_from_sunday_in_bar_time(self):
+        self.assertEqual(minute_of_week(datetime(2026, 10, 18, 0, 0, tzinfo=CHICAGO)), 0)
+        self.assertEqual(minute_of_week(datetime(2026, 10, 23, 21, 30, tzinfo=CHICAGO)),
+                         5 * DAY_MINUTES + 21 * 60 + 30)
+
+
+class OpeningIntervalSyncTests(BarBuzzTestCase):
+    def test_created_bar_gets_intervals(self):
+        bar = make_bar('friday', hours=FRIDAY_NIGHT)
+        self.assertEqual(intervals(bar), parse_hours(FRIDAY_NIGHT))
+
+    def test_saves_of_other_fields_leave_intervals_alone(self):
+        bar = make_bar('friday', hours=FRIDAY_NIGHT)
+        BarOpeningInterval.objects.filter(bar=bar).delete()
+        bar.name = 'Renamed'
+        bar.save(update_fields=['name'])
+        self.assertEqual(intervals(bar), [])
+
+    def test_api_update_recompiles_intervals(self):
+        bar = make_bar('friday', hours=FRIDAY_NIGHT)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('editor', 'editor@example.com', 'pw'))
+        response = client.patch(f'/api/bars/{bar.pk}/', {'hours': ['Monday: 5 PM – 11 PM']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(intervals(bar), [(DAY_MINUTES + 1020, DAY_MINUTES + 1380)])
+
+        response = client.patch(f'/api/bars/{bar.pk}/', {'hours': None}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(intervals(bar), [])
+
+    def test_open_at(self):
+        friday = make_bar('friday', hours=FRIDAY_NIGHT)
+        make_bar('unknown', is_open=True)
+        make_bar('closed', hours=['Monday: 5 PM – 11 PM'], is_open=True)
+
+        late_friday = datetime(2026, 10, 24, 1, 0, tzinfo=CHICAGO)
+        self.assertEqual(
+            set(Bar.objects.open_at(late_friday).values_list('place_id', flat=True)), {'friday', 'unknown'}
+        )
+        friday.hours = ['Monday: 5 PM – 11 PM']
+        friday.save()
+        self.assertEqual(set(Bar.objects.open_at(late_friday).values_list('place_id', flat=True)), {'unknown'})
+
+
+class FixExistingHoursTests(BarBuzzTestCase):
+    @mock.patch('backend.management.commands.fix_existing_hours.places_client')
+    def test_decodes_legacy_strings_and_fetches_missing_hours(self, places_client):
+        places_client.return_value.place.return_value = {'result': {'opening_hours': {'periods': FRIDAY_NIGHT}}}
+        stored = make_bar('stored', hours=FRIDAY_NIGHT)
+        legacy = make_bar('legacy', hours=json.dumps(FRIDAY_NIGHT))
+        missing = make_bar('missing')
+
+        call_command('fix_existing_hours', workers=1, qps=0, stdout=io.StringIO())
+        self.assertEqual(places_client.return_value.place.call_args.kwargs['place_id'], 'missing')
+        self.assertEqual(places_client.return_value.place.call_count, 1)
+        for bar in (stored, legacy, missing):
+            bar.refresh_from_db()
+            self.assertEqual(bar.hours, FRIDAY_NIGHT)
+            self.assertEqual(intervals(bar), parse_hours(FRIDAY_NIGHT))
@@ -0,0 +1,68 @@
+import datetime
+
+from django.utils import timezone
+
+from ..caching import get_bar_data_version
+from ..ingest import bar_record_from_place, upsert_bars
+from ..models import Bar, BarOpeningInterval
+from .base import BarBuzzTestCase
+
+
+def place(index, **fields):
+    details = {
+        'name': f'Bar {index}',
+        'types': ['bar'],
+        'geometry': {'location': {'lat': 30.0 + index / 1000, 'lng': -97.0}},
+        'formatted_address': f'{index} Main St',
+        'opening_hours': {'periods': [{'open': {'day': 5, 'time': '2000'}, 'close': {'day': 6, 'time': '0200'}}]},
+        'rating': 4.5,
+    }
+    details.update(fields)
+    return bar_record_from_place(f'place-{index}', details)
+
+
+class UpsertBarsTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.result = upsert_bars(place(index) for index in range(5))
+
+    def test_insert(self):
+        self.assertEqual(tuple(self.result), (5, 0, 0))
+        self.assertEqual(Bar.objects.count(), 5)
+        self.assertEqual(BarOpeningInterval.objects.count(), 5)
+        # Periods are stored as a list, not a JSON string
+        self.assertEqual(Bar.objects.get(place_id='place-0').hours, place(0)['hours'])
+        self.assertIsInstance(place(0)['hours'], list)
+
+    def test_reupsert_is_unchanged(self):
+        updated_at = dict(Bar.objects.values_list('place_id', 'updated_at'))
+        version = get_bar_data_version()
+        later = timezone.now() + datetime.timedelta(hours=1)
+        records = [dict(place(index), refreshed_at=later) for index in range(5)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(tuple(upsert_bars(records)), (0, 0, 5))
+        self.assertEqual(dict(Bar.objects.values_list('place_id', 'updated_at')), updated_at)
+        self.assertEqual(get_bar_data_version(), version)
+        # The check itself is still recorded
+        self.assertEqual(set(Bar.objects.values_list('refreshed_at', flat=True)), {later})
+
+    def test_changed_rows_are_updated(self):
+        version = get_bar_data_version()
+        records = [place(0, rating=3.9), place(1, opening_hours={}), place(2), place(5)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(tuple(upsert_bars(records)), (1, 2, 1))
+        self.assertNotEqual(get_bar_data_version(), version)
+        self.assertEqual(float(Bar.objects.get(place_id='place-0').rating), 3.9)
+        self.assertIsNone(Bar.objects.get(place_id='place-1').hours)
+        self.assertFalse(BarOpeningInterval.objects.filter(bar__place_id='place-1').exists())
+
+    def test_update_columns(self):
+        records = [place(0, name='Renamed', rating=3.9)]
+        self.assertEqual(tuple(upsert_bars(records, update_columns=['rating'])), (0, 1, 0))
+        bar = Bar.objects.get(place_id='place-0')
+        self.assertEqual((bar.name, float(bar.rating)), ('Bar 0', 3.9))
+
+    def test_missing_required_fields(self):
+        with self.assertRaises(ValueError):
+            upsert_bars([{'place_id': 'incomplete', 'name': 'Incomplete'}])
@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..caching import favorite_ids_cache_key, get_favorite_ids
+from ..models import Favorite
+from .base import BarBuzzTestCase, make_bar
+
+
+def place(place_id):
+    return {
+        'place_id': place_id, 'name': place_id, 'vicinity': '1 Main St', 'types': ['bar'],
+        'geometry': {'location': {'lat': 30.0, 'lng': -97.0}},
+    }
+
+
+class FavoriteIdsTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('fan', 'fan@example.com', 'pw')
+        self.bar = make_bar('liked')
+        Favorite.objects.create(user=self.user, bar=self.bar)
+
+    def test_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            favorite_ids = get_favorite_ids(self.user)
+        self.assertEqual(favorite_ids.bar_ids, {self.bar.pk})
+        self.assertEqual(favorite_ids.place_ids, {'liked'})
+        with self.assertNumQueries(0):
+            self.assertEqual(get_favorite_ids(self.user), favorite_ids)
+
+    def test_anonymous(self):
+        self.assertIsNone(get_favorite_ids(AnonymousUser()))
+
+
+class IsFavoriteApiTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('fan', 'fan@example.com', 'pw')
+        self.bar = make_bar('liked')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_toggle_invalidates(self):
+        url = f'/api/bars/{self.bar.pk}/'
+        self.assertFalse(self.client.get(url).json()['is_favorite'])
+        self.assertIsNotNone(cache.get(favorite_ids_cache_key(self.user.pk)))
+        self.client.post(f'/api/favorites/{self.bar.pk}/toggle/')
+        self.assertIsNone(cache.get(favorite_ids_cache_key(self.user.pk)))
+        self.assertTrue(self.client.get(url).json()['is_favorite'])
+        self.client.post(f'/api/favorites/{self.bar.pk}/toggle/')
+        self.assertFalse(self.client.get(url).json()['is_favorite'])
+
+    def test_bulk_invalidates(self):
+        get_favorite_ids(self.user)
+        self.client.post('/api/favorites/bulk/', {'add': [self.bar.pk]}, format='json')
+        self.assertEqual(get_favorite_ids(self.user).bar_ids, {self.bar.pk})
+
+    @mock.patch('googlemaps.Client.places_nearby')
+    def test_nearby_list_matches_place_ids_without_per_bar_queries(self, places_nearby):
+        Favorite.objects.create(user=self.user, bar=self.bar)
+        params = {'lat': 30.0, 'lng': -97.0}
+        places_nearby.return_value = {'results': [place('liked'), place('other')]}
+        with CaptureQueriesContext(connection) as few:
+            data = self.client.get('/api/bars/', params, HTTP_CACHE_CONTROL='no-cache').json()
+        self.assertEqual({bar['place_id']: bar['is_favorite'] for bar in data}, {'liked': True, 'other': False})
+
+        places_nearby.return_value = {'results': [place('liked')] + [place(f'other{index}') for index in range(10)]}
+        cache.clear()
+        with CaptureQueriesContext(connection) as many:
+            data = self.client.get('/api/bars/', params).json()
+        self.assertEqual(len(data), 11)
+        self.assertEqual(len(many), len(few))
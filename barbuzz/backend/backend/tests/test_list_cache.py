@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from ..caching import get_bar_data_version
+from ..views import BarViewSet
+from .base import BarBuzzTestCase, make_bar
+
+PARAMS = {'lat': 30.0, 'lng': -97.0}
+
+
+class BarListCacheTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('cache', 'cache@example.com', 'pw'))
+        places = mock.patch('googlemaps.Client.places_nearby', return_value={'results': [{
+            'place_id': 'place', 'name': 'Place', 'vicinity': '1 Main St', 'types': ['bar'], 'rating': 4.5,
+            'geometry': {'location': {'lat': 30.0, 'lng': -97.0}},
+        }]})
+        places.start()
+        self.addCleanup(places.stop)
+        search = mock.patch.object(BarViewSet, '_search_nearby', autospec=True,
+                                   side_effect=BarViewSet._search_nearby)
+        self.search = search.start()
+        self.addCleanup(search.stop)
+
+    def test_hit_for_the_same_normalized_parameters(self):
+        first = self.client.get('/api/bars/', PARAMS)
+        # Coordinates within the cache grid and reordered parameters share the entry
+        second = self.client.get('/api/bars/', {'lng': -97.0001, 'lat': 30.0002})
+        self.assertEqual(self.search.call_count, 1)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second['Content-Type'], 'application/json')
+
+    def test_other_parameters_miss(self):
+        self.client.get('/api/bars/', PARAMS)
+        self.client.get('/api/bars/', {**PARAMS, 'rating': '4'})
+        self.client.get('/api/bars/', {**PARAMS, 'fields': 'name'})
+        self.client.get('/api/bars/', {**PARAMS, 'lat': 30.01})
+        self.assertEqual(self.search.call_count, 4)
+
+    def test_bar_writes_invalidate(self):
+        self.client.get('/api/bars/', PARAMS)
+        version = get_bar_data_version()
+        bar = make_bar('written')
+        self.assertNotEqual(get_bar_data_version(), version)
+        self.client.get('/api/bars/', PARAMS)
+        self.assertEqual(self.search.call_count, 2)
+
+        bar.delete()
+        self.client.get('/api/bars/', PARAMS)
+        self.assertEqual(self.search.call_count, 3)
+
+    def test_no_cache_request_bypasses(self):
+        self.client.get('/api/bars/', PARAMS)
+        self.client.get('/api/bars/', PARAMS, HTTP_CACHE_CONTROL='no-cache')
+        self.assertEqual(self.search.call_count, 2)
+
+    def test_failed_searches_are_not_cached(self):
+        with mock.patch('googlemaps.Client.places_nearby', side_effect=Exception('Places is down')):
+            response = self.client.get('/api/bars/', PARAMS)
+        self.assertEqual(response.json(), [])
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self.client.get('/api/bars/', PARAMS).json()[0]['place_id'], 'place')
+        self.assertEqual(self.search.call_count, 2)
+
+    def test_cached_response_revalidates(self):
+        etag = self.client.get('/api/bars/', PARAMS)['ETag']
+        response = self.client.get('/api/bars/', PARAMS, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.search.call_count, 1)
@@ -0,0 +1,49 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+# Friday 20:00 to Saturday 02:00, as stored by the ingest pipeline
+FRIDAY_NIGHT = [{'open': {'day': 5, 'time': '2000'}, 'close': {'day': 6, 'time': '0200'}}]
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Migrate the backend app to `migrate_from`, then run `migrate_to`."""
+
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        super().setUp()
+        self.executor = MigrationExecutor(connection)
+        latest = self.executor.loader.graph.leaf_nodes('backend')
+        self.addCleanup(self.migrate, latest)
+        self.apps = self.migrate([('backend', self.migrate_from)])
+
+    def migrate(self, targets):
+        self.executor.loader.build_graph()
+        self.executor.migrate(targets)
+        return self.executor.loader.project_state(targets).apps
+
+    def run_migration(self):
+        return self.migrate([('backend', self.migrate_to)])
+
+
+class CompileOpeningIntervalsTests(MigrationTestCase):
+    migrate_from = '0013_bar_filter_indexes'
+    migrate_to = '0014_bar_opening_intervals'
+
+    def test_compiles_existing_hours(self):
+        Bar = self.apps.get_model('backend', 'Bar')
+        fields = {'address': '', 'latitude': 30.0, 'longitude': -97.0, 'type': 'bar'}
+        friday = Bar.objects.create(place_id='friday', name='Friday', hours=FRIDAY_NIGHT, **fields)
+        Bar.objects.create(place_id='unknown', name='Unknown', hours=None, **fields)
+        text = Bar.objects.create(place_id='text', name='Text', hours=['Monday: 5:00 – 11:00 PM'], **fields)
+
+        apps = self.run_migration()
+        BarOpeningInterval = apps.get_model('backend', 'BarOpeningInterval')
+        intervals = sorted(BarOpeningInterval.objects.values_list('bar_id', 'open_minute', 'close_minute'))
+        day = 24 * 60
+        self.assertEqual(intervals, [
+            (friday.pk, 5 * day + 20 * 60, 6 * day + 2 * 60),
+            (text.pk, day + 17 * 60, day + 23 * 60),
+        ])
@@ -0,0 +1,118 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from ..models import Favorite
+from ..pagination import KeysetPagination
+from .base import BarBuzzTestCase, make_bar
+
+
+def request(**params):
+    return Request(APIRequestFactory().get('/', params))
+
+
+class KeysetPaginationTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('pager', 'pager@example.com', 'pw')
+        ratings = [Decimal('4.50'), None, Decimal('3.00'), Decimal('4.50'), None, Decimal('5.00')]
+        for index, rating in enumerate(ratings):
+            Favorite.objects.create(user=self.user, bar=make_bar(f'p{index}', rating=rating))
+        self.favorites = Favorite.objects.filter(user=self.user).select_related('bar')
+        self.orderings = {'rating': ('-bar__rating', '-id')}
+
+    def walk(self, queryset, orderings, page_size):
+        """Follow cursors to the end and return the pages."""
+        pages, cursor = [], None
+        while True:
+            params = {'page_size': page_size, 'ordering': next(iter(orderings))}
+            if cursor:
+                params['cursor'] = cursor
+            paginator = KeysetPagination()
+            pages.append(paginator.paginate_queryset(queryset, request(**params), orderings=orderings))
+            cursor = paginator.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_row_once_with_nulls_last(self):
+        pages = self.walk(self.favorites, self.orderings, page_size=2)
+        rows = [favorite for page in pages for favorite in page]
+        self.assertEqual([len(page) for page in pages], [2, 2, 2])
+        ratings = [favorite.bar.rating for favorite in rows]
+        self.assertEqual(ratings, [Decimal('5.00'), Decimal('4.50'), Decimal('4.50'), Decimal('3.00'), None, None])
+        # Ties on rating are broken by descending id
+        self.assertGreater(rows[1].pk, rows[2].pk)
+        self.assertGreater(rows[4].pk, rows[5].pk)
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPagination()
+        cursor = paginator.encode_cursor('rating', [Decimal('4.50'), 7])
+        self.assertEqual(paginator.decode_cursor(request(cursor=cursor), 'rating'), ['4.50', 7])
+
+    def test_invalid_or_foreign_cursor_is_not_found(self):
+        paginator = KeysetPagination()
+        cursor = paginator.encode_cursor('recent', [7])
+        with self.assertRaises(NotFound):
+            paginator.decode_cursor(request(cursor=cursor), 'rating')
+        with self.assertRaises(NotFound):
+            paginator.decode_cursor(request(cursor='not-a-cursor'), 'rating')
+
+    def test_paginate_list(self):
+        items = [(3, 'c'), (1, 'a'), (2, 'b'), (1, 'd')]
+        paginator = KeysetPagination()
+        page = paginator.paginate_list(items, request(page_size=3), key=lambda item: item, ordering_name='distance')
+        self.assertEqual(page, [(1, 'a'), (1, 'd'), (2, 'b')])
+        cursor = paginator.next_cursor
+        page = paginator.paginate_list(items, request(page_size=3, cursor=cursor), key=lambda item: item,
+                                       ordering_name='distance')
+        self.assertEqual(page, [(3, 'c')])
+        self.assertIsNone(paginator.next_cursor)
+
+
+class UserProfileListTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(3):
+            User.objects.create_user(f'user{index}', f'user{index}@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.first())
+
+    def test_plain_list_without_pagination_parameters(self):
+        response = self.client.get('/api/user-profiles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 3)
+
+    def test_envelope_with_page_size(self):
+        response = self.client.get('/api/user-profiles/', {'page_size': 2})
+        data = response.json()
+        self.assertEqual(len(data['results']), 2)
+        response = self.client.get(data['next'])
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertIsNone(response.json()['next'])
+
+
+class FavoritesPaginationTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('fan', 'fan@example.com', 'pw')
+        for index in range(3):
+            Favorite.objects.create(user=self.user, bar=make_bar(f'f{index}', rating=Decimal(index)))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_newest_favorite_first(self):
+        data = self.client.get('/api/favorites/', {'page_size': 2}).json()
+        self.assertEqual([bar['place_id'] for bar in data['results']], ['f2', 'f1'])
+        data = self.client.get(data['next']).json()
+        self.assertEqual([bar['place_id'] for bar in data['results']], ['f0'])
+        self.assertIsNone(data['next'])
+
+    def test_only_indexed_orderings(self):
+        for ordering in ('rating', 'updated_at'):
+            with self.subTest(ordering=ordering):
+                response = self.client.get('/api/favorites/', {'page_size': 2, 'ordering': ordering})
+                self.assertEqual(response.status_code, 400)
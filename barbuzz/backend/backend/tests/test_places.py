@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.core.cache import cache
+
+from ..places import (
+    BAR_DETAILS_MASK, FieldMask, details_index_key, fetch_place_details, field_mask,
+)
+from ..services import PlacesService
+from .base import BarBuzzTestCase
+
+
+def places_client(result=None):
+    client = mock.Mock()
+    client.place.return_value = {'result': result or {'place_id': 'place', 'name': 'Place'}}
+    return client
+
+
+class FieldMaskTests(BarBuzzTestCase):
+    def test_groups_and_union(self):
+        mask = field_mask('types') | field_mask('photos')
+        self.assertIsInstance(mask, FieldMask)
+        self.assertEqual(mask.as_list(), ['photo', 'type'])
+        self.assertEqual(mask.key, FieldMask(['type', 'photo']).key)
+        self.assertNotEqual(mask.key, field_mask('types').key)
+        self.assertLessEqual(field_mask('hours', 'contact'), BAR_DETAILS_MASK)
+
+    def test_rejects_unknown_fields(self):
+        with self.assertRaisesMessage(ValueError, 'Invalid Places Details fields: reviewz'):
+            FieldMask(['name', 'reviewz'])
+
+
+class FetchPlaceDetailsTests(BarBuzzTestCase):
+    def test_requests_only_the_mask(self):
+        client = places_client()
+        fetch_place_details(client, 'place', field_mask('types', 'photos'))
+        client.place.assert_called_once_with(place_id='place', fields=['photo', 'type'])
+
+    def test_superset_serves_narrower_masks(self):
+        client = places_client({'place_id': 'place', 'types': ['bar'], 'photos': []})
+        wide = field_mask('identity', 'types', 'photos')
+        self.assertEqual(fetch_place_details(client, 'place', wide)['types'], ['bar'])
+        for mask in (field_mask('types'), field_mask('photos', 'types'), wide):
+            with self.subTest(mask=mask.as_list()):
+                self.assertEqual(fetch_place_details(client, 'place', mask)['types'], ['bar'])
+        self.assertEqual(client.place.call_count, 1)
+
+        # A mask the cached fetch does not cover goes to the API
+        fetch_place_details(client, 'place', field_mask('types', 'hours'))
+        self.assertEqual(client.place.call_count, 2)
+        fetch_place_details(client, 'other', field_mask('types'))
+        self.assertEqual(client.place.call_count, 3)
+
+    def test_wider_fetch_replaces_covered_masks(self):
+        client = places_client()
+        fetch_place_details(client, 'place', field_mask('types'))
+        fetch_place_details(client, 'place', field_mask('hours'))
+        fetch_place_details(client, 'place', field_mask('types', 'hours', 'photos'))
+        self.assertEqual(cache.get(details_index_key('place')), [('opening_hours', 'photo', 'type')])
+
+    def test_without_cache(self):
+        client = places_client()
+        for _ in range(2):
+            fetch_place_details(client, 'place', field_mask('types'), use_cache=False)
+        self.assertEqual(client.place.call_count, 2)
+        self.assertIsNone(cache.get(details_index_key('place')))
+
+
+class PlacesServiceDetailsTests(BarBuzzTestCase):
+    @mock.patch('googlemaps.Client.place')
+    def test_merges_masks(self, place):
+        place.return_value = {'result': {'place_id': 'place'}}
+        service = PlacesService()
+        service.get_place_details('place', field_mask('types'), field_mask('photos'))
+        self.assertEqual(place.call_args.kwargs['fields'], ['photo', 'type'])
+        service.get_place_details('place')
+        self.assertEqual(place.call_args.kwargs['fields'], BAR_DETAILS_MASK.as_list())
+        # Both narrower masks are now covered by the full fetch
+        service.get_place_details('place', field_mask('photos'))
+        self.assertEqual(place.call_count, 2)
@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..models import Favorite
+from .base import BarBuzzTestCase, make_bar
+
+
+class UserProfileQueryTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bars = [make_bar(f'bar{index}') for index in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.add_users(2)[0])
+
+    def add_users(self, count):
+        """Create `count` users, the n-th of them with n favorite bars."""
+        start = User.objects.count()
+        users = []
+        for index in range(start, start + count):
+            user = User.objects.create_user(f'user{index}', f'user{index}@example.com', 'pw')
+            for bar in self.bars[:index % (len(self.bars) + 1)]:
+                Favorite.objects.create(user=user, bar=bar)
+            users.append(user)
+        return users
+
+    def query_count(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/user-profiles/', params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_list_query_count_is_constant(self):
+        for params in (None, {'page_size': 50}):
+            with self.subTest(params=params):
+                few, _ = self.query_count(params)
+                self.add_users(5)
+                many, data = self.query_count(params)
+                self.assertEqual(many, few)
+                profiles = data['results'] if params else data
+                self.assertEqual(len(profiles), User.objects.count())
+
+    def test_list_favorite_bars(self):
+        _, data = self.query_count()
+        favorites = {profile['user']: [bar['place_id'] for bar in profile['favorite_bars']] for profile in data}
+        users = dict(User.objects.values_list('pk', 'username'))
+        self.assertEqual({users[pk]: bars for pk, bars in favorites.items()}, {'user0': [], 'user1': ['bar0']})
+
+    def test_summary_query_count_and_counts(self):
+        self.add_users(3)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/user-profiles/', {'summary': 'true'})
+        counts = sorted(profile['favorites_count'] for profile in response.json())
+        self.assertEqual(counts, [0, 0, 1, 2, 3])
+        self.assertNotIn('favorite_bars', response.json()[0])
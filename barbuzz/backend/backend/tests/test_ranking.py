@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from ..models import Bar, WaitTime
+from ..ranking import rank_bars
+from .base import BarBuzzTestCase, make_bar
+
+LAT, LNG = 30.0, -97.0
+
+
+def place(index, **fields):
+    result = {
+        'place_id': f'place-{index}',
+        'name': f'Bar {index}',
+        'vicinity': f'{index} Main St',
+        'geometry': {'location': {'lat': LAT + index / 10000, 'lng': LNG}},
+        'types': ['bar'],
+        'rating': 4.0,
+    }
+    result.update(fields)
+    return result
+
+
+class RankBarsTests(BarBuzzTestCase):
+    def test_distance_and_rating(self):
+        bars = [Bar(place_id='far', latitude=LAT + 0.05, longitude=LNG, rating=4.0),
+                Bar(place_id='near', latitude=LAT, longitude=LNG, rating=4.0),
+                Bar(place_id='best', latitude=LAT, longitude=LNG, rating=5.0)]
+        ranked = rank_bars(bars, LAT, LNG, 2)
+        self.assertEqual([bar.place_id for bar in ranked], ['best', 'near'])
+        self.assertGreater(ranked[0].score, ranked[1].score)
+        self.assertEqual(ranked[0].distance, 0.0)
+
+    def test_waits_and_favorites(self):
+        busy = make_bar('busy')
+        popular = make_bar('popular', favorites_count=10)
+        WaitTime.objects.create(bar=busy, estimated_wait=60)
+        ranked = rank_bars(list(Bar.objects.all()), LAT, LNG, 2)
+        self.assertEqual([bar.pk for bar in ranked], [popular.pk, busy.pk])
+
+    def test_skipped_signals_over_budget(self):
+        make_bar('popular', favorites_count=10)
+        make_bar('other')
+        bars = list(Bar.objects.all())
+        with self.assertLogs('backend.ranking', 'WARNING'), self.assertNumQueries(0):
+            ranked = rank_bars(bars, LAT, LNG, 2, budget_ms=0)
+        self.assertEqual(ranked[0].score, ranked[1].score)
+
+    def test_empty(self):
+        self.assertEqual(rank_bars([], LAT, LNG, 5), [])
+
+
+@override_settings(BAR_RANKING_CANDIDATES=20)
+class ScoreSortTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ranker', 'ranker@example.com', 'pw'))
+        patcher = mock.patch('googlemaps.Client.places_nearby',
+                             return_value={'results': [place(index) for index in range(20)]})
+        self.places_nearby = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, **params):
+        return self.client.get('/api/bars/', {'lat': LAT, 'lng': LNG, 'limit': 3, **params})
+
+    def test_sorts_share_one_places_call(self):
+        by_distance = self.get()
+        by_score = self.get(sort='score')
+        self.assertEqual(self.places_nearby.call_count, 1)
+        self.assertEqual([bar['place_id'] for bar in by_distance.json()], ['place-0', 'place-1', 'place-2'])
+        self.assertEqual(len(by_score.json()), 3)
+
+    def test_candidates_come_from_the_whole_page(self):
+        make_bar('place-19', favorites_count=50)
+        response = self.get(sort='score')
+        self.assertEqual(response.json()[0]['place_id'], 'place-19')
+
+    def test_score_responses_follow_new_favorites(self):
+        self.assertIn('ETag', self.get())
+        first = self.get(sort='score')
+        self.assertNotIn('ETag', first)
+        self.assertNotEqual(first.json()[0]['place_id'], 'place-10')
+
+        make_bar('place-10', favorites_count=50)
+        self.assertEqual(self.get(sort='score').json()[0]['place_id'], 'place-10')
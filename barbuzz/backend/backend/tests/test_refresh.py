@@ -0,0 +1,65 @@
+import datetime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..caching import record_bar_request
+from ..models import Bar
+from ..refresh import freshness_report, plan_refresh, refresh_priority
+from .base import BarBuzzTestCase, make_bar
+
+HOURS = ['Monday: 5 PM – 11 PM']
+
+
+def checked(bar, days_ago):
+    Bar.objects.filter(pk=bar.pk).update(refreshed_at=timezone.now() - datetime.timedelta(days=days_ago))
+
+
+class PlanRefreshTests(BarBuzzTestCase):
+    def test_priority_matches_refresh_priority(self):
+        bar = make_bar('stale', photo_reference='photo', hours=HOURS, favorites_count=4)
+        checked(bar, 10)
+        [candidate] = plan_refresh(Bar.objects.all(), 1)
+        self.assertEqual(candidate.place_id, 'stale')
+        self.assertAlmostEqual(candidate.priority, refresh_priority(10, 4, 0, False), places=3)
+
+    def test_order(self):
+        fresh = make_bar('fresh', photo_reference='photo', hours=HOURS)
+        stale = make_bar('stale', photo_reference='photo', hours=HOURS)
+        popular = make_bar('popular', photo_reference='photo', hours=HOURS, favorites_count=50)
+        no_photo = make_bar('no-photo', hours=HOURS)
+        for bar, days in ((fresh, 1), (stale, 20), (popular, 1), (no_photo, 1)):
+            checked(bar, days)
+        plan = plan_refresh(Bar.objects.all(), 4)
+        self.assertEqual([candidate.place_id for candidate in plan], ['no-photo', 'popular', 'stale', 'fresh'])
+        self.assertEqual([candidate.place_id for candidate in plan_refresh(Bar.objects.all(), 2)],
+                         ['no-photo', 'popular'])
+
+    def test_empty_hours_count_as_missing(self):
+        for place_id, hours in (('none', None), ('empty-list', []), ('empty-string', ''), ('known', HOURS)):
+            checked(make_bar(place_id, photo_reference='photo', hours=hours), 1)
+        plan = plan_refresh(Bar.objects.all(), 4)
+        self.assertEqual(plan[-1].place_id, 'known')
+        self.assertEqual(freshness_report(Bar.objects.all())['missing_hours'], 3)
+
+    def test_requests_rerank_the_candidates(self):
+        quiet = make_bar('quiet', photo_reference='photo', hours=HOURS)
+        requested = make_bar('requested', photo_reference='photo', hours=HOURS)
+        checked(quiet, 3)
+        checked(requested, 2)
+        for _ in range(20):
+            record_bar_request(requested.pk)
+        self.assertEqual(plan_refresh(Bar.objects.all(), 1)[0].place_id, 'requested')
+
+    def test_one_query(self):
+        for index in range(10):
+            make_bar(f'bar{index}')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(plan_refresh(Bar.objects.all(), 2)), 2)
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertIn('LIMIT 6', queries.captured_queries[0]['sql'])
+
+    def test_no_budget(self):
+        make_bar('bar')
+        self.assertEqual(plan_refresh(Bar.objects.all(), 0), [])
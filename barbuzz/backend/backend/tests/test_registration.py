@@ -0,0 +1,74 @@
+from django.contrib.auth.models import User, update_last_login
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..models import UserProfile
+from .base import BarBuzzTestCase
+
+REGISTER_URL = '/api/auth/register/'
+
+
+def writes(queries):
+    """The INSERT/UPDATE/DELETE statements among captured queries."""
+    return [
+        query['sql'] for query in queries
+        if query['sql'].lstrip().split(' ', 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE')
+    ]
+
+
+class RegistrationTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def register(self, username='newuser', email='new@example.com'):
+        return self.client.post(REGISTER_URL, {'username': username, 'email': email, 'password': 'pw-123456'})
+
+    def test_registration_writes_one_user_and_one_profile(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register()
+        self.assertEqual(response.status_code, 201)
+        statements = writes(queries.captured_queries)
+        self.assertEqual(len(statements), 2, statements)
+        self.assertIn('auth_user', statements[0])
+        self.assertIn('backend_userprofile', statements[1])
+        # No pre-check SELECTs for duplicates: the unique indexes catch them
+        self.assertEqual(len([query for query in queries.captured_queries if 'SELECT' in query['sql']]), 0)
+
+        profile = UserProfile.objects.get(user__username='newuser')
+        self.assertTrue(profile.is_over_21)
+
+    def test_last_login_update_does_not_write_the_profile(self):
+        user = User.objects.create_user('someone', 'someone@example.com', 'pw')
+        with CaptureQueriesContext(connection) as queries:
+            update_last_login(None, user)
+        statements = writes(queries.captured_queries)
+        self.assertEqual(len(statements), 1, statements)
+        self.assertIn('auth_user', statements[0])
+        self.assertNotIn('userprofile', ' '.join(query['sql'] for query in queries.captured_queries))
+
+    def test_duplicate_username(self):
+        self.register()
+        response = self.register(email='other@example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Username already exists'})
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_duplicate_email(self):
+        self.register()
+        response = self.register(username='otheruser')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Email already exists'})
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_duplicate_email_in_another_case(self):
+        self.register()
+        response = self.register(username='otheruser', email='NEW@Example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Email already exists'})
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_missing_fields(self):
+        response = self.client.post(REGISTER_URL, {'username': 'newuser'})
+        self.assertEqual(response.status_code, 400)
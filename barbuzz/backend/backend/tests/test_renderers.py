@@ -0,0 +1,71 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+import numpy as np
+from django.utils.functional import lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from ..parsers import ORJSONParser
+from ..renderers import ORJSONRenderer
+from .base import BarBuzzTestCase
+
+lazy_string = lazy(lambda: 'lazy', str)
+
+
+class ORJSONRendererTests(BarBuzzTestCase):
+    def test_matches_json_renderer(self):
+        data = {
+            'text': 'Café   bar',
+            'decimal': Decimal('4.25'),
+            'when': datetime.datetime(2026, 10, 19, 21, 30, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2026, 10, 19),
+            'uuid': uuid.UUID(int=1),
+            'lazy': lazy_string(),
+            'nested': [None, True, 1, 1.5, (2, 3)],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_numpy_values(self):
+        data = {'scores': np.array([0.5, 0.25]), 'top': np.float64(0.5), 'count': np.int64(3)}
+        self.assertEqual(ORJSONRenderer().render(data), b'{"scores":[0.5,0.25],"top":0.5,"count":3}')
+
+    def test_falls_back_for_indented_output_and_unsupported_data(self):
+        context = {'indent': 2}
+        self.assertEqual(ORJSONRenderer().render({'a': 1}, 'application/json', context),
+                         JSONRenderer().render({'a': 1}, 'application/json', context))
+        # orjson rejects integers over 64 bits
+        self.assertEqual(ORJSONRenderer().render({'big': 2 ** 70}), JSONRenderer().render({'big': 2 ** 70}))
+
+    def test_none(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+
+class ORJSONParserTests(BarBuzzTestCase):
+    def parse(self, body, encoding='utf-8'):
+        return ORJSONParser().parse(io.BytesIO(body), 'application/json', {'encoding': encoding})
+
+    def test_matches_json_parser(self):
+        body = '{"name": "Café", "ids": [1, 2], "rating": 4.5, "open": null}'.encode()
+        self.assertEqual(self.parse(body), JSONParser().parse(io.BytesIO(body)))
+
+    def test_invalid_json(self):
+        for body in (b'{"name": ', b'{"rating": NaN}'):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                self.parse(body)
+
+    def test_other_encodings_use_the_stdlib_parser(self):
+        self.assertEqual(self.parse('{"name": "Café"}'.encode('latin-1'), 'latin-1'), {'name': 'Café'})
+
+
+class ApiJsonTests(BarBuzzTestCase):
+    def test_json_request_and_response(self):
+        response = APIClient().post('/api/auth/register/', {'username': 'json', 'email': 'json@example.com',
+                                                             'password': 'pw-123456'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['username'], 'json')
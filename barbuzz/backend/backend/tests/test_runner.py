@@ -0,0 +1,122 @@
+import io
+import threading
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+
+from .. import runner
+from ..runner import CommandRunner, TokenBucket
+from .base import BarBuzzTestCase
+
+
+class FakeClock:
+    """
+    Stands in for the time module: sleep() advances monotonic().
+
+    Tests use power-of-two rates so the clock arithmetic stays exact.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TokenBucketTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        patcher = mock.patch.object(runner, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=4, capacity=2)
+        for _ in range(2):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        for _ in range(4):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [0.25] * 4)
+
+    def test_idle_time_refills_up_to_capacity(self):
+        bucket = TokenBucket(rate=2)
+        bucket.acquire()
+        bucket.acquire()
+        self.clock.now += 60
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [0.5])
+
+    def test_no_limit(self):
+        bucket = TokenBucket(rate=0)
+        for _ in range(1000):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+
+class CommandRunnerTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.stdout, self.stderr = io.StringIO(), io.StringIO()
+        self.command = BaseCommand(stdout=self.stdout, stderr=self.stderr)
+
+    def test_fetches_concurrently_and_handles_on_the_calling_thread(self):
+        lock, running, peak = threading.Lock(), [0], [0]
+        handled = {}
+
+        def fetch(item):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            threading.Event().wait(0.005)
+            with lock:
+                running[0] -= 1
+            return item * 2
+
+        def handle(item, result):
+            self.assertIs(threading.current_thread(), threading.main_thread())
+            handled[item] = result
+
+        stats = CommandRunner(self.command, workers=4, label='bars').run(iter(range(40)), fetch, handle, total=40)
+        self.assertEqual(handled, {item: item * 2 for item in range(40)})
+        self.assertLessEqual(peak[0], 4)
+        self.assertGreater(peak[0], 1)
+        self.assertEqual((stats.processed, stats.succeeded, stats.errors), (40, 40, []))
+        self.assertIn('Processed 40 bars', self.stdout.getvalue())
+
+    def test_errors_are_captured_per_item(self):
+        def fetch(item):
+            if item == 3:
+                raise ValueError('bad place')
+            return item
+
+        def handle(item, result):
+            if item == 5:
+                raise RuntimeError('bad row')
+
+        stats = CommandRunner(self.command, workers=2).run(range(8), fetch, handle)
+        self.assertEqual(stats.processed, 8)
+        self.assertEqual(sorted((error.item, str(error.error)) for error in stats.errors),
+                         [(3, 'bad place'), (5, 'bad row')])
+        self.assertIn('Error processing 3: bad place', self.stderr.getvalue())
+        self.assertIn('2 errors', self.stdout.getvalue())
+
+    def test_fetch_calls_take_tokens(self):
+        command_runner = CommandRunner(self.command, workers=2, qps=5)
+        with mock.patch.object(command_runner.limiter, 'acquire') as acquire:
+            command_runner.run(range(6), lambda item: item)
+        self.assertEqual(acquire.call_count, 6)
+
+    def test_progress_lines(self):
+        command_runner = CommandRunner(self.command, workers=1, label='bars', report_every=0)
+        command_runner.run(range(3), lambda item: item, total=3)
+        self.assertIn('3/3 bars (100.0%)', self.stdout.getvalue())
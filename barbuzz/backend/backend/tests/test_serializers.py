@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
+
+from ..caching import get_favorite_ids
+from ..models import Bar, Favorite
+from ..renderers import ORJSONRenderer
+from ..serializers import BarSerializer, FastBarSerializer, parse_fieldset
+from .base import BarBuzzTestCase, make_bar
+
+HOURS = [{'open': {'day': 5, 'time': '2000'}, 'close': {'day': 6, 'time': '0200'}}]
+
+
+class FastBarSerializerTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        make_bar('full', phone_number='(512) 555-0100', website='https://example.com', description='Dive bar',
+                 hours=HOURS, photo_reference='ref', price_level=2, rating=Decimal('4.25'), is_open=True)
+        # Null price, rating and hours, empty photo reference
+        make_bar('sparse', type='nightclub')
+        self.bars = list(Bar.objects.order_by('pk'))
+        # Bars built from Places results: unsaved, float ratings, with a distance
+        places = [Bar(place_id='places', name='From Places', address='', latitude=30.1, longitude=-97.1,
+                      rating=4.3, price_level=None, photo_reference=None)]
+        places[0].distance = 1.2
+        self.bars += places
+
+    def assertSameOutput(self, bars, **kwargs):
+        expected = BarSerializer(bars, many=True, **kwargs).data
+        actual = FastBarSerializer(bars, many=True, **kwargs).data
+        self.assertEqual(actual, expected)
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            with self.subTest(renderer=type(renderer).__name__):
+                self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_same_output(self):
+        self.assertSameOutput(self.bars)
+        rendered = FastBarSerializer(self.bars, many=True).data
+        self.assertEqual(rendered[0]['rating'], '4.25')
+        self.assertIsNone(rendered[1]['rating'])
+        self.assertIsNone(rendered[1]['price_level'])
+        self.assertIsNone(rendered[1]['image'])
+        self.assertNotIn('distance', rendered[0])
+        self.assertEqual(rendered[2]['distance'], 1.2)
+
+    def test_same_output_with_favorites(self):
+        user = User.objects.create_user('fan', 'fan@example.com', 'pw')
+        Favorite.objects.create(user=user, bar=self.bars[0])
+        context = {'favorite_ids': get_favorite_ids(user)}
+        self.assertSameOutput(self.bars, context=context)
+        self.assertEqual([bar['is_favorite'] for bar in FastBarSerializer(self.bars, many=True, context=context).data],
+                         [True, False, False])
+
+    def test_same_output_for_a_fieldset(self):
+        fields = ('id', 'name', 'rating', 'image', 'distance')
+        self.assertSameOutput(self.bars, fields=fields)
+        self.assertEqual(list(FastBarSerializer(self.bars[0], fields=fields).data), ['id', 'image', 'name', 'rating'])
+
+    def test_deferred_model_fields(self):
+        fields = parse_fieldset({'fields': 'name,image'}, FastBarSerializer.field_names())
+        bars = list(Bar.objects.only(*FastBarSerializer.model_fields(fields)).order_by('pk'))
+        with self.assertNumQueries(0):
+            data = FastBarSerializer(bars, many=True, fields=fields).data
+        self.assertEqual(data, BarSerializer(self.bars[:2], many=True, fields=fields).data)
@@ -0,0 +1,45 @@
+import datetime
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from ..ingest import insert_raw
+from ..models import WaitTime
+from .base import BarBuzzTestCase, make_bar
+
+
+class InsertRawTests(BarBuzzTestCase):
+    def test_keeps_auto_now_add_values(self):
+        bar = make_bar('bar')
+        last_year = timezone.now() - datetime.timedelta(days=365)
+        insert_raw(WaitTime, [WaitTime(bar=bar, timestamp=last_year, estimated_wait=minutes) for minutes in (5, 10)])
+        self.assertEqual(list(WaitTime.objects.values_list('timestamp', flat=True)), [last_year, last_year])
+        self.assertTrue(WaitTime._meta.get_field('timestamp').auto_now_add)
+
+
+class SnapshotRoundTripTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'snapshot.ndjson')
+
+    def test_wait_time_history_keeps_its_timestamps(self):
+        bar = make_bar('bar')
+        timestamps = [timezone.now() - datetime.timedelta(days=days) for days in (30, 2)]
+        for minutes, timestamp in zip((15, 25), timestamps):
+            wait_time = WaitTime.objects.create(bar=bar, estimated_wait=minutes)
+            WaitTime.objects.filter(pk=wait_time.pk).update(timestamp=timestamp)
+        call_command('export_snapshot', self.path, '--wait-times', '--compression', 'none', stdout=io.StringIO())
+        WaitTime.objects.all().delete()
+
+        for _ in range(2):
+            call_command('import_snapshot', self.path, stdout=io.StringIO())
+        self.assertEqual(
+            list(WaitTime.objects.order_by('timestamp').values_list('timestamp', 'estimated_wait')),
+            list(zip(timestamps, (15, 25))),
+        )
+        self.assertTrue(WaitTime._meta.get_field('timestamp').auto_now_add)
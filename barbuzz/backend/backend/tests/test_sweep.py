@@ -0,0 +1,133 @@
+import io
+import itertools
+import math
+from unittest import mock
+
+import googlemaps
+from django.core.management import call_command
+
+from ..models import Bar
+from ..places import NEARBY_MAX_RESULTS, search_nearby_pages
+from ..sweep import METERS_PER_DEGREE, parse_bounds, subdivide, tile_bounds
+from ..utils import haversine_distance
+from .base import BarBuzzTestCase, make_bar
+
+# haversine_distance uses a slightly smaller Earth than METERS_PER_DEGREE
+TOLERANCE = 1.01
+
+
+def grid(south, west, north, east, steps=25):
+    """Points of a steps x steps grid over a box, edges and corners included."""
+    return [
+        (south + (north - south) * row / (steps - 1), west + (east - west) * column / (steps - 1))
+        for row, column in itertools.product(range(steps), repeat=2)
+    ]
+
+
+def covered(point, tiles):
+    return any(
+        haversine_distance(point[0], point[1], tile.lat, tile.lng) * 1000 <= tile.radius * TOLERANCE
+        for tile in tiles
+    )
+
+
+class TileTests(BarBuzzTestCase):
+    def test_tiles_cover_the_box(self):
+        for bounds in ((30.1, -97.95, 30.5, -97.55), (59.8, 10.6, 60.0, 10.9), (-34.0, 18.3, -33.8, 18.6)):
+            with self.subTest(bounds=bounds):
+                tiles = tile_bounds(*bounds, radius=2000)
+                self.assertTrue(all(tile.radius == 2000 and tile.depth == 0 for tile in tiles))
+                missed = [point for point in grid(*bounds) if not covered(point, tiles)]
+                self.assertEqual(missed, [])
+
+    def test_small_box_is_one_tile(self):
+        [tile] = tile_bounds(30.0, -97.01, 30.01, -97.0, radius=2000)
+        self.assertAlmostEqual(tile.lat, 30.0 + 2000 * math.sqrt(2) / 2 / METERS_PER_DEGREE)
+
+    def test_subdivide_covers_the_parent_cell(self):
+        parent = tile_bounds(30.0, -97.01, 30.01, -97.0, radius=2000)[0]
+        children = subdivide(parent)
+        self.assertEqual(len(children), 4)
+        self.assertTrue(all(child.radius == 1000 and child.depth == 1 for child in children))
+        # The parent's cell is the square inscribed in its circle
+        lat_half = parent.radius / math.sqrt(2) / METERS_PER_DEGREE
+        lng_half = lat_half / math.cos(math.radians(parent.lat))
+        cell = (parent.lat - lat_half, parent.lng - lng_half, parent.lat + lat_half, parent.lng + lng_half)
+        self.assertEqual([point for point in grid(*cell) if not covered(point, children)], [])
+        # Grandchildren cover their parents the same way
+        self.assertEqual({grandchild.depth for grandchild in subdivide(children[0])}, {2})
+
+    def test_parse_bounds(self):
+        self.assertEqual(parse_bounds('30.1,-97.9,30.5,-97.5'), (30.1, -97.9, 30.5, -97.5))
+        for value in ('30.1,-97.9,30.5', '30.5,-97.9,30.1,-97.5', 'a,b,c,d', '30,-200,31,-97'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_bounds(value)
+
+
+@mock.patch('backend.places.time.sleep')
+class SearchNearbyPagesTests(BarBuzzTestCase):
+    def test_follows_page_tokens(self, sleep):
+        client = mock.Mock()
+        client.places_nearby.side_effect = [
+            {'results': [{'place_id': 'a'}], 'next_page_token': 'one'},
+            googlemaps.exceptions.ApiError('INVALID_REQUEST'),
+            {'results': [{'place_id': 'b'}], 'next_page_token': 'two'},
+            {'results': [{'place_id': 'c'}], 'next_page_token': 'three'},
+        ]
+        results = search_nearby_pages(client, (30.0, -97.0), 1000, 'bar')
+        self.assertEqual([place['place_id'] for place in results], ['a', 'b', 'c'])
+        # Three pages at most; the invalid token was retried
+        self.assertEqual(client.places_nearby.call_count, 4)
+        self.assertEqual(client.places_nearby.call_args.kwargs, {'page_token': 'two'})
+
+    def test_other_errors_are_raised(self, sleep):
+        client = mock.Mock()
+        client.places_nearby.side_effect = [
+            {'results': [], 'next_page_token': 'one'}, googlemaps.exceptions.ApiError('OVER_QUERY_LIMIT'),
+        ]
+        with self.assertRaises(googlemaps.exceptions.ApiError):
+            search_nearby_pages(client, (30.0, -97.0), 1000, 'bar')
+
+
+class SweepCityCommandTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = mock.Mock()
+        self.client.places_nearby.side_effect = self.places_nearby
+        self.client.place.side_effect = lambda place_id, fields: {'result': {
+            'place_id': place_id, 'name': place_id, 'types': ['bar'],
+            'geometry': {'location': {'lat': 30.005, 'lng': -97.005}},
+        }}
+        patcher = mock.patch('backend.management.commands.sweep_city.places_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def places_nearby(self, location, radius, type):
+        if type == 'night_club':
+            return {'results': [{'place_id': 'club'}, {'place_id': 'gone', 'business_status': 'CLOSED_PERMANENTLY'}]}
+        if radius == 2000:
+            # The first tile is full, so it is split
+            return {'results': [{'place_id': f'bar{index}'} for index in range(NEARBY_MAX_RESULTS)]}
+        return {'results': [{'place_id': 'bar0'}, {'place_id': f'sub{location[0]:.4f},{location[1]:.4f}'}]}
+
+    def sweep(self, **options):
+        stdout = io.StringIO()
+        call_command('sweep_city', bounds='30.0,-97.01,30.01,-97.0', workers=2, qps=0, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_subdivides_saturated_tiles_and_dedupes(self):
+        make_bar('bar1', rating=None)
+        output = self.sweep()
+        searched = [(call.kwargs['radius'], call.kwargs['type']) for call in self.client.places_nearby.call_args_list]
+        self.assertEqual(sorted(searched), [(1000, 'bar')] * 4 + [(2000, 'bar'), (2000, 'night_club')])
+        self.assertIn('Found 65 distinct places with 8 Nearby Search requests', output)
+        # Known bars need no Details request
+        self.assertEqual(self.client.place.call_count, 64)
+        self.assertEqual(Bar.objects.count(), 65)
+        self.assertFalse(Bar.objects.filter(place_id='gone').exists())
+
+    def test_min_radius_stops_subdividing(self):
+        output = self.sweep(min_radius=1500, estimate=True)
+        self.assertEqual(self.client.places_nearby.call_count, 2)
+        self.assertIn('1 tiles were still full at --min-radius', output)
+        self.assertEqual(self.client.place.call_count, 0)
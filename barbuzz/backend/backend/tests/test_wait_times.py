@@ -0,0 +1,79 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import WaitTime
+from .base import BarBuzzTestCase, make_bar
+
+START = datetime.datetime(2026, 10, 17, 20, 0, tzinfo=datetime.timezone.utc)
+
+
+class WaitTimeHistoryTests(BarBuzzTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('waiter', 'waiter@example.com', 'pw'))
+        self.bars = [make_bar(f'bar{index}') for index in range(3)]
+        # Every bar reports at START, START + 1h and START + 2h; the last
+        # two reports of bar0 share a timestamp
+        self.wait_times = {bar.pk: [] for bar in self.bars}
+        for hour in range(3):
+            for bar in self.bars:
+                self.add(bar, START + datetime.timedelta(hours=hour), estimated_wait=hour * 10 + bar.pk)
+        self.add(self.bars[0], START + datetime.timedelta(hours=2), estimated_wait=99)
+
+    def add(self, bar, timestamp, estimated_wait):
+        wait_time = WaitTime.objects.create(bar=bar, estimated_wait=estimated_wait)
+        # timestamp is auto_now_add
+        WaitTime.objects.filter(pk=wait_time.pk).update(timestamp=timestamp)
+        self.wait_times[bar.pk].append(wait_time.pk)
+
+    def history(self, **params):
+        pages, url = [], '/api/wait-times/history/'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.json()['results']])
+            url, params = response.json()['next'], None
+        return pages
+
+    def test_history_newest_first(self):
+        pages = self.history(page_size=4)
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        expected = list(WaitTime.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+    def test_history_filters(self):
+        bar = self.bars[1]
+        pages = self.history(bar=str(bar.pk), since=(START + datetime.timedelta(hours=1)).isoformat())
+        self.assertEqual(pages, [self.wait_times[bar.pk][:0:-1]])
+        pages = self.history(until=(START + datetime.timedelta(minutes=30)).isoformat())
+        self.assertEqual(sorted(pages[0]), sorted(ids[0] for ids in self.wait_times.values()))
+
+    def test_invalid_filters(self):
+        for params, error in (({'bar': 'x'}, 'Invalid bar ID'), ({'since': 'yesterday'}, "Invalid 'since' timestamp")):
+            for url in ('/api/wait-times/history/', '/api/wait-times/latest/'):
+                with self.subTest(url=url, params=params):
+                    response = self.client.get(url, params)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {'error': error})
+
+    def test_latest_per_bar(self):
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/wait-times/latest/').json()
+        self.assertEqual([row['bar'] for row in data], [bar.pk for bar in self.bars])
+        # Ties on timestamp go to the newer row
+        self.assertEqual([row['id'] for row in data], [ids[-1] for ids in self.wait_times.values()])
+        self.assertEqual(data[0]['estimated_wait'], 99)
+        self.assertEqual(data[0]['bar_name'], 'bar0')
+
+    def test_latest_within_window(self):
+        until = START + datetime.timedelta(hours=1, minutes=30)
+        data = self.client.get('/api/wait-times/latest/', {
+            'bar': f'{self.bars[0].pk},{self.bars[2].pk}', 'until': timezone.make_naive(until).isoformat(),
+        }).json()
+        self.assertEqual([row['id'] for row in data],
+                         [self.wait_times[self.bars[0].pk][1], self.wait_times[self.bars[2].pk][1]])
@@ -13,12 +13,13 @@ router.register(r'user-profiles', views.UserProfileViewSet)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path(f'api/auth/register/', views.UserRegistrationAPIView.as_view(), name='register'),
-    path(f'api/auth/login/', CustomAuthToken.as_view(), name='login'),
-    path(f'api/auth/logout/', views.LogoutAPIView.as_view(), name='logout'),
-    path(f'api/auth/user/', views.get_current_user, name='current_user'),
-    path(f'api/user-profiles/me/', views.get_user_profile, name='my_profile'),
-    path(f'api/favorites/', views.get_favorites, name='favorites'),
-    path(f'api/favorites/<int:bar_id>/toggle/', views.toggle_favorite, name='toggle_favorite'),
-    path(f'api/', include(router.urls)),
+    path('api/auth/register/', views.UserRegistrationAPIView.as_view(), name='register'),
+    path('api/auth/login/', CustomAuthToken.as_view(), name='login'),
+    path('api/auth/logout/', views.LogoutAPIView.as_view(), name='logout'),
+    path('api/auth/user/', views.get_current_user, name='current_user'),
+    path('api/user-profiles/me/', views.get_user_profile, name='my_profile'),
+    path('api/favorites/', views.get_favorites, name='favorites'),
+    path('api/favorites/<int:bar_id>/toggle/', views.toggle_favorite, name='toggle_favorite'),
+    path('api/favorites/bulk/', views.bulk_favorites, name='bulk_favorites'),
+    path('api/', include(router.urls)),
 ]
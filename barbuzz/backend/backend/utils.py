@@ -31,4 +31,24 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * math.asin(math.sqrt(a))
     r = 6371  
     
-    return c * r
\ No newline at end of file
+    return c * r
+
+def bar_type_from_place_types(types):
+    """
+    Map Google Places types to a Bar.type value.
+    
+    Args:
+        types (list): Place types reported by Google Places
+    
+    Returns:
+        str: 'bar+nightclub', 'bar' or 'nightclub', or None if the place is neither
+    """
+    is_bar = 'bar' in types
+    is_nightclub = 'night_club' in types
+    if is_bar and is_nightclub:
+        return 'bar+nightclub'
+    if is_bar:
+        return 'bar'
+    if is_nightclub:
+        return 'nightclub'
+    return None
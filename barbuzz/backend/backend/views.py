@@ -6,15 +6,20 @@ organized by functionality: Authentication, User Management, Bar Data, and Favor
 """
 
 import logging
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import transaction
+from django.db import IntegrityError, connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 
 from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import APIException
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
@@ -22,13 +27,34 @@ from rest_framework.authtoken.views import ObtainAuthToken
 from .models import Bar, Favorite, WaitTime, UserProfile
 from .serializers import (
     BarSerializer, 
+    FastBarSerializer,
+    parse_fieldset,
     WaitTimeSerializer, 
-    UserProfileSerializer
+    UserProfileSerializer,
+    UserProfileSummarySerializer
 )
-from .utils import haversine_distance
+from .utils import bar_type_from_place_types, haversine_distance
+from .filters import bar_matches, parse_bar_filters
 from .services import PlacesService, WaitTimeService
-
-import json
+from .pagination import KeysetPagination
+from .ranking import rank_bars
+from .authentication import CachedTokenAuthentication, cache_token, invalidate_token
+from .caching import (
+    bar_list_cache_key,
+    get_cached_response,
+    get_favorite_ids,
+    invalidate_favorite_ids,
+    quantize_coordinate,
+    record_bar_request,
+    set_cached_response,
+)
+from .conditional import (
+    BAR_LIST_CACHE_CONTROL,
+    add_validators,
+    favorites_signature,
+    make_etag,
+    not_modified,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +68,27 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
+# Case-insensitive unique index on auth_user.email, created by migration 0011
+AUTH_USER_EMAIL_INDEX = 'auth_user_email_uniq'
+
+
+def _is_email_conflict(error):
+    """
+    Check whether an IntegrityError came from the email unique index.
+    
+    Args:
+        error (IntegrityError): Error raised while saving a user
+        
+    Returns:
+        bool: True for a duplicate email, False for any other constraint
+    """
+    diag = getattr(error.__cause__, 'diag', None)
+    if diag is not None:
+        return diag.constraint_name == AUTH_USER_EMAIL_INDEX
+    # Backends without diagnostics (SQLite in tests) name the index in the message
+    return AUTH_USER_EMAIL_INDEX in str(error)
+
+
 class UserRegistrationAPIView(APIView):
     """
     API endpoint for user registration.
@@ -60,38 +107,25 @@ class UserRegistrationAPIView(APIView):
                     'error': 'Username, email, and password are required'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Check if user exists
-            if User.objects.filter(username=username).exists():
-                return Response({
-                    'error': 'Username already exists'
-                }, status=status.HTTP_400_BAD_REQUEST)
-                
-            if User.objects.filter(email=email).exists():
+            user = User(
+                username=User.normalize_username(username),
+                email=User.objects.normalize_email(email),
+            )
+            user.set_password(password)
+            # Applied by the post_save signal when it creates the profile
+            user.profile_defaults = {'is_over_21': True}
+            
+            # Duplicates are caught by the username and email unique indexes
+            # instead of checking for them first
+            try:
+                with transaction.atomic():
+                    user.save()
+            except IntegrityError as e:
+                field = 'Email' if _is_email_conflict(e) else 'Username'
                 return Response({
-                    'error': 'Email already exists'
+                    'error': f'{field} already exists'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Use atomic transaction to ensure consistency
-            with transaction.atomic():
-                # Create user
-                user = User.objects.create_user(
-                    username=username,
-                    email=email,
-                    password=password
-                )
-                
-                # Create user profile
-                # Use get_or_create to handle the case where a profile might already exist
-                profile, created = UserProfile.objects.get_or_create(
-                    user=user,
-                    defaults={'is_over_21': True}
-                )
-                
-                if not created:
-                    # If a profile already exists, update it
-                    profile.is_over_21 = True
-                    profile.save()
-            
             return Response({
                 'success': 'User registered successfully',
                 'username': username
@@ -139,6 +173,9 @@ class CustomAuthToken(ObtainAuthToken):
 
         user = serializer.validated_data['user']
         token, created = Token.objects.get_or_create(user=user)
+        # Warm the authentication cache for the requests that follow
+        token.user = user
+        cache_token(token)
         return Response({'token': token.key})
 
 class LogoutAPIView(APIView):
@@ -151,13 +188,20 @@ class LogoutAPIView(APIView):
         """
         Delete the user's authentication token to log them out.
         
+        The token is also dropped from the shared authentication cache and
+        this worker's local cache; other workers may accept it for up to
+        AUTH_TOKEN_LOCAL_CACHE_TIMEOUT seconds.
+        
         Args:
             request: HTTP request with authentication
             
         Returns:
             Response: Success message
         """
-        Token.objects.filter(user=request.user).delete()
+        keys = list(Token.objects.filter(user=request.user).values_list('key', flat=True))
+        Token.objects.filter(key__in=keys).delete()
+        for key in keys:
+            invalidate_token(key)
         return Response({"message": "Successfully logged out"})
 
 # User Profile Views
@@ -168,26 +212,79 @@ def get_user_profile(request):
     """
     Get the profile of the current authenticated user.
     
+    Sending ?summary=true returns favorite counts instead of the nested
+    favorite bars.
+    
     Args:
         request: HTTP request with authentication
         
     Returns:
         Response: Serialized user profile data
     """
-    profile = UserProfile.objects.get(user=request.user)
-    serializer = UserProfileSerializer(profile)
-    return Response(serializer.data)
+    summary = is_summary_requested(request)
+    profiles = UserProfile.objects.with_counts() if summary else UserProfile.objects.with_favorite_bars()
+    profile = profiles.get(user=request.user)
+    if summary:
+        etag = make_etag('profile', profile.pk, profile.is_over_21, profile.favorites_count)
+    else:
+        favorite_bars = profile.favorite_bars
+        etag = make_etag(
+            'profile', profile.pk, profile.is_over_21,
+            [(bar.pk, bar.updated_at) for bar in favorite_bars],
+        )
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    serializer_class = UserProfileSummarySerializer if summary else UserProfileSerializer
+    serializer = serializer_class(profile, context={'request': request})
+    return add_validators(Response(serializer.data), etag)
+
+def is_summary_requested(request):
+    """
+    Whether the client asked for the counts-only profile representation.
+    """
+    return request.query_params.get('summary', '').lower() in ('1', 'true', 'yes')
 
 class UserProfileViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing user profiles (admin access to all profiles).
+    
+    Favorite bars are prefetched for the whole page, so the query count
+    does not grow with the number of profiles. ?summary=true returns
+    counts only.
     """
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_orderings = {'id': ('id',)}
+
+    def get_queryset(self):
+        if is_summary_requested(self.request):
+            return UserProfile.objects.with_counts()
+        return UserProfile.objects.with_favorite_bars()
+
+    def get_serializer_class(self):
+        if is_summary_requested(self.request):
+            return UserProfileSummarySerializer
+        return UserProfileSerializer
+
+    def paginate_queryset(self, queryset):
+        """
+        Paginate only when the client sends a cursor or page size.
+        
+        Without them the list stays the plain array this endpoint returned
+        before pagination, so existing clients keep working.
+        """
+        if not self.paginator.is_requested(self.request):
+            return None
+        return super().paginate_queryset(queryset)
 
 # Bar Views
 
+# Orderings of the nearby search, the first is the default
+NEARBY_SORTS = ('distance', 'score')
+
 class BarViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing bars and related data.
@@ -197,8 +294,106 @@ class BarViewSet(viewsets.ModelViewSet):
     """
     queryset = Bar.objects.all()
     serializer_class = BarSerializer
+    # Serializer used for read-only list output; set to BarSerializer to
+    # fall back to the full DRF field machinery.
+    read_serializer_class = FastBarSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
+
+    pagination_class = KeysetPagination
+    # Output fields selected with ?fields= / ?exclude=, None for all fields
+    requested_fields = None
+
+    def get_serializer_context(self):
+        """
+        Add the user's cached favorite set for the is_favorite field.
+        """
+        context = super().get_serializer_context()
+        context['favorite_ids'] = self.get_favorite_ids()
+        return context
+
+    def get_favorite_ids(self):
+        """
+        Return the requesting user's favorite set, loaded once per request.
+        """
+        if not hasattr(self, '_favorite_ids'):
+            self._favorite_ids = get_favorite_ids(self.request.user)
+        return self._favorite_ids
+
+    def favorites_version(self):
+        """
+        Return the favorite set version if the response includes is_favorite.
+        
+        Responses without is_favorite do not depend on the user, so they can
+        share ETags and response cache entries across users.
+        
+        Returns:
+            tuple: (user id, favorite set version), or None
+        """
+        if self.requested_fields is not None and 'is_favorite' not in self.requested_fields:
+            return None
+        favorite_ids = self.get_favorite_ids()
+        if favorite_ids is None:
+            return None
+        return (self.request.user.pk, favorite_ids.version)
+
+    def get_read_serializer(self, *args, **kwargs):
+        """
+        Return the serializer used to render bar lists.
+        
+        Returns:
+            Serializer instance built from read_serializer_class
+        """
+        kwargs.setdefault('context', self.get_serializer_context())
+        kwargs.setdefault('fields', self.requested_fields)
+        return self.read_serializer_class(*args, **kwargs)
+
+    def get_queryset(self):
+        """
+        Project retrieve queries down to the columns the requested fields need.
+        """
+        queryset = super().get_queryset()
+        if self.action == 'retrieve' and self.requested_fields is not None:
+            model_fields = FastBarSerializer.model_fields(self.requested_fields)
+            if model_fields is not None:
+                # updated_at is always needed for the ETag
+                queryset = queryset.only(*model_fields, 'updated_at')
+        return queryset
+
+    @staticmethod
+    def _search_etag(cache_key, *parts):
+        """
+        Build the ETag for a Places-backed bar list from its cached result version.
+        
+        Args:
+            cache_key (str): PlacesService cache key of the search
+            *parts: Other values the response depends on (e.g. requested fields)
+            
+        Returns:
+            str: ETag, or None if the search results are not cached
+        """
+        version = PlacesService.get_result_version(cache_key)
+        if version is None:
+            return None
+        return make_etag('bars', cache_key, version, *parts)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Get a single bar, answering 304 when the client's copy is current.
+        """
+        try:
+            self.requested_fields = parse_fieldset(request.query_params, FastBarSerializer.field_names())
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        instance = self.get_object()
+        record_bar_request(instance.pk)
+        etag = make_etag('bar', instance.pk, instance.updated_at, self.requested_fields, self.favorites_version())
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        serializer = self.get_read_serializer(instance)
+        return add_validators(Response(serializer.data), etag)
     
     def list(self, request):
         """
@@ -208,10 +403,16 @@ class BarViewSet(viewsets.ModelViewSet):
         - lat, lng: User location coordinates
         - radius: Search radius in meters
         - limit: Maximum number of results
-        - price_level: Filter by price level
+        - price_level: Comma-separated price levels
         - rating: Minimum rating threshold
+        - type: Comma-separated kinds ('bar', 'nightclub')
+        - open_now: Only bars that are open now
         - query: Search text (when global=true)
         - global: Whether to perform a global search
+        - fields / exclude: Comma-separated bar fields to include / leave out
+        - sort: 'distance' (default) or 'score', ranking by combined distance,
+          rating, price, wait time and popularity (nearby search only)
+        - cursor / page_size: Keyset pagination in sort order (nearby search only)
         
         Args:
             request: HTTP request with query parameters
@@ -220,64 +421,240 @@ class BarViewSet(viewsets.ModelViewSet):
             Response: Serialized bar data with distances
         """
         try:
-            query = request.query_params.get('query')
-            is_global = request.query_params.get('global', 'false').lower() == 'true'
-            
-            if is_global and query:
-                return self._handle_global_search(request, query)
-            
             try:
-                lat = float(request.query_params.get('lat', 0))
-                lng = float(request.query_params.get('lng', 0))
-                radius = int(request.query_params.get('radius', 5000))
-                limit = int(request.query_params.get('limit', 12))
+                self.requested_fields = parse_fieldset(request.query_params, FastBarSerializer.field_names())
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
+
+            try:
+                params = self._list_params(request)
             except (ValueError, TypeError):
                 return Response({"error": "Invalid location parameters"}, status=400)
-                
-            if lat == 0 and lng == 0:
+            try:
+                params['filters'] = parse_bar_filters(request.query_params)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
+            if params['mode'] == 'nearby':
+                params['sort'] = request.query_params.get('sort', 'distance')
+                if params['sort'] not in NEARBY_SORTS:
+                    return Response(
+                        {"error": f"sort must be one of: {', '.join(NEARBY_SORTS)}"}, status=400
+                    )
+            params['fields'] = self.requested_fields
+            params['favorites'] = self.favorites_version()
+            if self.paginator.is_requested(request):
+                params['cursor'] = request.query_params.get(self.paginator.cursor_query_param)
+                params['page_size'] = self.paginator.get_page_size(request)
+
+            if params['mode'] == 'nearby' and params['lat'] == 0 and params['lng'] == 0:
                 return Response({"error": "Location parameters required"}, status=400)
-            
-            service = PlacesService()
-            results = service.search_nearby(lat, lng, radius, limit)
-            bars = []
-            for item in results:
-                loc = item.get('geometry', {}).get('location', {})
-                bar = Bar(
-                    place_id=item.get('place_id'),
-                    name=item.get('name', ''),
-                    address=item.get('vicinity', item.get('formatted_address', '')),
-                    latitude=loc.get('lat'),
-                    longitude=loc.get('lng'),
-                    photo_reference=(
-                        item.get('photos', [{}])[0].get('photo_reference')
-                        if item.get('photos')
-                        else None
-                    ),
-                    price_level=item.get('price_level'),
-                    rating=item.get('rating'),
-                )
-                distance = haversine_distance(lat, lng, bar.latitude, bar.longitude)
-                bar.distance = distance * 0.621371
-                bars.append(bar)
 
-            serializer = self.get_serializer(bars, many=True)
-            data = serializer.data
-            for i, bar in enumerate(bars):
-                data[i]['distance'] = round(bar.distance, 1)
+            response_cache_key = bar_list_cache_key(params)
+            # Scores move with wait times and favorites, see _search_nearby
+            if params.get('sort') != 'score':
+                response = self._cached_list_response(request, response_cache_key)
+                if response is not None:
+                    return response
 
-            return Response(data)
+            if params['mode'] == 'global':
+                response = self._handle_global_search(request, params['query'], params['limit'], params['filters'])
+            else:
+                response = self._search_nearby(request, params)
+            return self._cache_list_response(request, response_cache_key, response)
                 
+        except APIException:
+            raise
         except Exception as e:
             logger.error(f"Error in bar list: {str(e)}")
             return Response({"error": str(e)}, status=500)
+
+    def _list_params(self, request):
+        """
+        Parse and normalize the list query parameters.
+        
+        Coordinates are quantized to the response cache grid and used as-is
+        for the search, so a cached response is exact for every request
+        that maps to the same key.
+        
+        Args:
+            request: HTTP request with query parameters
+            
+        Returns:
+            dict: Normalized parameters, with 'mode' of 'global' or 'nearby'
+            
+        Raises:
+            ValueError: If location parameters are not numeric
+        """
+        query = ' '.join((request.query_params.get('query') or '').split())
+        is_global = request.query_params.get('global', 'false').lower() == 'true'
+
+        if is_global and query:
+            try:
+                limit = int(request.query_params.get('limit', 12))
+            except (ValueError, TypeError):
+                limit = 12
+            return {'mode': 'global', 'query': query, 'limit': limit}
+
+        return {
+            'mode': 'nearby',
+            'lat': quantize_coordinate(float(request.query_params.get('lat', 0))),
+            'lng': quantize_coordinate(float(request.query_params.get('lng', 0))),
+            'radius': int(request.query_params.get('radius', 5000)),
+            'limit': int(request.query_params.get('limit', 12)),
+        }
+
+    def _cached_list_response(self, request, cache_key):
+        """
+        Serve a bar list from the rendered-response cache.
+        
+        Skipped for non-JSON renderers (e.g. the browsable API) and when the
+        client sends ``Cache-Control: no-cache``.
+        
+        Args:
+            request: HTTP request
+            cache_key (str): Key from bar_list_cache_key
+            
+        Returns:
+            HttpResponse: Cached (or 304) response, or None on a miss
+        """
+        if request.accepted_renderer.format != 'json' or self._bypass_cache(request):
+            return None
+        entry = get_cached_response(cache_key)
+        if entry is None:
+            return None
+        etag, content_type, content = entry
+        response = not_modified(request, etag, BAR_LIST_CACHE_CONTROL)
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        return add_validators(response, etag, BAR_LIST_CACHE_CONTROL)
+
+    def _cache_list_response(self, request, cache_key, response):
+        """
+        Render a bar list response and store the bytes in the response cache.
+        
+        Only successful JSON responses backed by a cached search (i.e. with
+        an ETag) are stored.
+        
+        Args:
+            request: HTTP request
+            cache_key (str): Key from bar_list_cache_key
+            response: Response returned by the search
+            
+        Returns:
+            The response to send
+        """
+        etag = response.get('ETag')
+        if (not isinstance(response, Response) or response.status_code != 200
+                or etag is None or request.accepted_renderer.format != 'json'):
+            return response
+
+        renderer = request.accepted_renderer
+        content = renderer.render(response.data, request.accepted_media_type, self.get_renderer_context())
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        set_cached_response(cache_key, etag, content_type, content)
+
+        cached = HttpResponse(content, content_type=content_type)
+        return add_validators(cached, etag, BAR_LIST_CACHE_CONTROL)
+
+    @staticmethod
+    def _bypass_cache(request):
+        """Whether the client asked to skip the response cache."""
+        cache_control = request.headers.get('Cache-Control', '').lower()
+        return 'no-cache' in cache_control or 'no-store' in cache_control
+
+    def _search_nearby(self, request, params):
+        """
+        Search bars near a location using the Places service.
+        
+        The whole cached Places page is post-filtered with the request's bar
+        filters before it is cut to `limit`, so every filter combination
+        shares one cached upstream result and matches past the first `limit`
+        results are not lost. With sort=score up to BAR_RANKING_CANDIDATES
+        matches are ranked and the best `limit` bars by rank_bars() are
+        returned.
+        Scores depend on recent wait times and favorite counts, which the
+        Places result version does not track, so they get no ETag and are
+        not stored in the response cache.
+        
+        Args:
+            request: HTTP request
+            params (dict): Normalized nearby parameters from _list_params
+            
+        Returns:
+            Response: Serialized bar data with distances in miles
+        """
+        lat, lng = params['lat'], params['lng']
+        radius, limit = params['radius'], params['limit']
+        filters = params['filters']
+        by_score = params.get('sort') == 'score'
+        keep = max(limit, settings.BAR_RANKING_CANDIDATES) if by_score else limit
+
+        service = PlacesService()
+        cache_key = service.nearby_cache_key(lat, lng, radius)
+        etag_parts = (self.requested_fields, self.favorites_version(), filters, limit)
+        if not by_score:
+            response = not_modified(request, self._search_etag(cache_key, *etag_parts), BAR_LIST_CACHE_CONTROL)
+            if response is not None:
+                return response
+
+        results = service.search_nearby(lat, lng, radius, limit=None)
+        bars = []
+        for item in results:
+            loc = item.get('geometry', {}).get('location', {})
+            bar = Bar(
+                place_id=item.get('place_id'),
+                name=item.get('name', ''),
+                address=item.get('vicinity', item.get('formatted_address', '')),
+                latitude=loc.get('lat'),
+                longitude=loc.get('lng'),
+                photo_reference=(
+                    item.get('photos', [{}])[0].get('photo_reference')
+                    if item.get('photos')
+                    else None
+                ),
+                price_level=item.get('price_level'),
+                rating=item.get('rating'),
+                type=bar_type_from_place_types(item.get('types', [])) or 'bar',
+                is_open=item.get('opening_hours', {}).get('open_now', False),
+            )
+            if not bar_matches(bar, filters):
+                continue
+            if not by_score:
+                distance = haversine_distance(lat, lng, bar.latitude, bar.longitude)
+                # Distance in miles, rounded for display
+                bar.distance = round(distance * 0.621371, 1)
+            bars.append(bar)
+            if len(bars) >= keep:
+                break
+
+        if by_score:
+            price_target = sum(filters.price_levels) / len(filters.price_levels) if filters.price_levels else None
+            bars = rank_bars(bars, lat, lng, limit, price_target=price_target)
+            sort_key, ordering_name = (lambda bar: (-bar.score, bar.place_id)), 'score'
+        else:
+            sort_key, ordering_name = (lambda bar: (bar.distance, bar.place_id)), 'distance'
+
+        if self.paginator.is_requested(request):
+            page = self.paginator.paginate_list(bars, request, key=sort_key, ordering_name=ordering_name)
+            serializer = self.get_read_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_read_serializer(bars, many=True)
+            response = Response(serializer.data)
+        etag = None if by_score else self._search_etag(cache_key, *etag_parts)
+        return add_validators(response, etag, BAR_LIST_CACHE_CONTROL)
     
-    def _handle_global_search(self, request, query):
+    def _handle_global_search(self, request, query, limit=12, filters=None):
         """
         Handle global search using the centralized bar manager.
         
         Args:
             request: HTTP request
             query (str): Search query
+            limit (int): Maximum number of results
+            filters (BarFilters, optional): Filters applied to the Places results
             
         Returns:
             Response: Serialized bar data matching the query
@@ -285,13 +662,15 @@ class BarViewSet(viewsets.ModelViewSet):
         try:
             logger.info(f"Global search request received - Query: '{query}'")
             
-            try:
-                limit = int(request.query_params.get('limit', 12))
-            except (ValueError, TypeError):
-                limit = 12
-            
             service = PlacesService()
-            results = service.search_text(query, limit)
+            cache_key = service.text_cache_key(query)
+            etag_parts = (self.requested_fields, self.favorites_version(), filters, limit)
+            response = not_modified(request, self._search_etag(cache_key, *etag_parts), BAR_LIST_CACHE_CONTROL)
+            if response is not None:
+                return response
+
+            # Filter the whole cached page, then keep the first `limit` matches
+            results = service.search_text(query, limit=None)
             bars = []
             for item in results:
                 loc = item.get('geometry', {}).get('location', {})
@@ -308,11 +687,18 @@ class BarViewSet(viewsets.ModelViewSet):
                     ),
                     price_level=item.get('price_level'),
                     rating=item.get('rating'),
+                    type=bar_type_from_place_types(item.get('types', [])) or 'bar',
+                    is_open=item.get('opening_hours', {}).get('open_now', False),
                 )
-                bars.append(bar)
+                if bar_matches(bar, filters):
+                    bars.append(bar)
+                    if len(bars) >= limit:
+                        break
 
-            serializer = self.get_serializer(bars, many=True)
-            return Response(serializer.data)
+            serializer = self.get_read_serializer(bars, many=True)
+            return add_validators(
+                Response(serializer.data), self._search_etag(cache_key, *etag_parts), BAR_LIST_CACHE_CONTROL
+            )
             
         except Exception as e:
             logger.error(f"Error in global search: {str(e)}")
@@ -379,7 +765,7 @@ class BarViewSet(viewsets.ModelViewSet):
                         if 'open' in cleaned_period:
                             cleaned_hours.append(cleaned_period)
                 
-                hours = json.dumps(cleaned_hours)
+                hours = cleaned_hours
             
             price_level = place_details.get('price_level')
             rating = place_details.get('rating')
@@ -421,7 +807,108 @@ class WaitTimeViewSet(viewsets.ModelViewSet):
     queryset = WaitTime.objects.all()
     serializer_class = WaitTimeSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
+    pagination_class = KeysetPagination
+    keyset_orderings = {'recent': ('-timestamp', '-id')}
+
+    # Columns read by WaitTimeSerializer, bar_name included
+    read_fields = ('id', 'timestamp', 'estimated_wait', 'bar', 'bar__name')
+
+    def get_queryset(self):
+        """
+        Load the bar with each wait time, projected to the serialized columns.
+        """
+        queryset = super().get_queryset().select_related('bar')
+        if self.request.method in permissions.SAFE_METHODS:
+            queryset = queryset.only(*self.read_fields)
+        return queryset
+
+    def filter_wait_times(self, queryset, request):
+        """
+        Apply the optional bar and time window query parameters.
+        
+        Args:
+            queryset: Wait time queryset to filter
+            request: HTTP request with optional 'bar' (comma-separated IDs),
+                'since' and 'until' (ISO 8601) query parameters
+            
+        Returns:
+            QuerySet: Filtered wait times
+            
+        Raises:
+            ValueError: If a parameter cannot be parsed
+        """
+        bar_ids = request.query_params.get('bar')
+        if bar_ids:
+            try:
+                queryset = queryset.filter(bar_id__in=[int(bar_id) for bar_id in bar_ids.split(',')])
+            except ValueError:
+                raise ValueError("Invalid bar ID")
+
+        for param, lookup in (('since', 'timestamp__gte'), ('until', 'timestamp__lt')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                moment = parse_datetime(value)
+            except ValueError:
+                moment = None
+            if moment is None:
+                raise ValueError(f"Invalid '{param}' timestamp")
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            queryset = queryset.filter(**{lookup: moment})
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """
+        Page through recorded wait times, newest first.
+        
+        Args:
+            request: HTTP request with optional 'bar', 'since', 'until' and
+                'cursor' query parameters
+            
+        Returns:
+            Response: Paginated serialized wait times
+        """
+        try:
+            queryset = self.filter_wait_times(self.get_queryset(), request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def latest(self, request):
+        """
+        Get the most recent recorded wait time for each bar.
+        
+        One query: on PostgreSQL, DISTINCT ON (bar) walks the (bar, timestamp,
+        id) index and keeps each bar's first row; other backends pick that
+        row with a correlated subquery.
+        
+        Args:
+            request: HTTP request with optional 'bar', 'since' and 'until'
+                query parameters
+            
+        Returns:
+            Response: Serialized wait times, one per bar
+        """
+        try:
+            queryset = self.filter_wait_times(self.get_queryset(), request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if connection.vendor == 'postgresql':
+            latest = queryset.order_by('bar_id', '-timestamp', '-id').distinct('bar_id')
+        else:
+            newest = queryset.filter(bar_id=OuterRef('bar_id')).order_by('-timestamp', '-id').values('id')[:1]
+            latest = queryset.filter(id=Subquery(newest)).order_by('bar_id')
+        serializer = self.get_serializer(latest, many=True)
+        return Response(serializer.data)
 
     def list(self, request, *args, **kwargs):
         """
@@ -479,12 +966,22 @@ class WaitTimeViewSet(viewsets.ModelViewSet):
 
 # Favorites Views
 
+# Keyset orderings for paginated favorites, served by favorite_user_recent_idx
+FAVORITE_ORDERINGS = {
+    'recent': ('-id',),
+}
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_favorites(request):
     """
     Get all favorite bars for the current user.
     
+    Supports ?fields= / ?exclude= to limit the bar fields returned; the
+    projection is pushed down to the query with only(). Sending ?cursor= or
+    ?page_size= switches to a keyset-paginated {next, results} response,
+    newest favorite first.
+    
     Args:
         request: HTTP request with authentication
         
@@ -492,11 +989,40 @@ def get_favorites(request):
         Response: Serialized favorite bar data
     """
     try:
+        try:
+            fields = parse_fieldset(request.query_params, FastBarSerializer.field_names())
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag = make_etag(
+            'favorites', request.user.pk, *favorites_signature(request.user),
+            sorted(request.query_params.items()),
+        )
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        paginator = KeysetPagination()
+        context = {'request': request, 'favorite_ids': get_favorite_ids(request.user)}
         favorites = Favorite.objects.filter(user=request.user).select_related('bar')
-        favorite_bars = [favorite.bar for favorite in favorites]
-        serializer = BarSerializer(favorite_bars, many=True)
-        return Response(serializer.data)
+        model_fields = FastBarSerializer.model_fields(fields) if fields is not None else None
+        if model_fields is not None:
+            favorites = favorites.only('bar', *(f'bar__{name}' for name in model_fields))
+
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(favorites, request, orderings=FAVORITE_ORDERINGS)
+            serializer = FastBarSerializer(
+                [favorite.bar for favorite in page], many=True, context=context, fields=fields
+            )
+            response = paginator.get_paginated_response(serializer.data)
+        else:
+            favorite_bars = [favorite.bar for favorite in favorites]
+            serializer = FastBarSerializer(favorite_bars, many=True, context=context, fields=fields)
+            response = Response(serializer.data)
+        return add_validators(response, etag)
     
+    except APIException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching favorites: {str(e)}")
         return Response(
@@ -504,12 +1030,26 @@ def get_favorites(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
     
+def _lock_favorites(user):
+    """
+    Lock the user's row until the end of the transaction.
+    
+    Favorite writes of one user are serialized, so the rows a write finds
+    missing (or present) are the rows it inserts (or deletes), and the
+    favorites_count deltas match them exactly.
+    """
+    list(User.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def toggle_favorite(request, bar_id):
     """
     Toggle a bar as favorite/unfavorite for the current user.
     
+    The bar's favorites_count moves with the Favorite row in the same
+    transaction.
+    
     Args:
         request: HTTP request with authentication
         bar_id (int): ID of the bar to toggle
@@ -519,12 +1059,114 @@ def toggle_favorite(request, bar_id):
     """
     try:
         bar = Bar.objects.get(pk=bar_id)
-        favorite, created = Favorite.objects.get_or_create(user=request.user, bar=bar)
-        
-        if not created:
-            favorite.delete()
-            return Response({"status": "unfavorited"})
-        
-        return Response({"status": "favorited"})
+        with transaction.atomic():
+            _lock_favorites(request.user)
+            favorite, created = Favorite.objects.get_or_create(user=request.user, bar=bar)
+            if created:
+                Bar.objects.adjust_favorites_count([bar.pk], 1)
+            else:
+                favorite.delete()
+                Bar.objects.adjust_favorites_count([bar.pk], -1)
+        invalidate_favorite_ids(request.user.pk)
+        return Response({"status": "favorited" if created else "unfavorited"})
     except Bar.DoesNotExist:
         return Response({"error": "Bar not found"}, status=status.HTTP_404_NOT_FOUND)
+
+# Upper bound on add + remove IDs accepted by one bulk favorites request
+BULK_FAVORITES_MAX_IDS = 1000
+
+
+def _parse_bar_ids(value):
+    """
+    Validate a list of bar IDs from a request body.
+    
+    Args:
+        value: Decoded JSON value, expected to be a list of integers
+        
+    Returns:
+        set: Bar IDs
+        
+    Raises:
+        ValueError: If the value is not a list of integers
+    """
+    if value is None:
+        return set()
+    if not isinstance(value, list) or not all(
+        isinstance(bar_id, int) and not isinstance(bar_id, bool) for bar_id in value
+    ):
+        raise ValueError
+    return set(value)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_favorites(request):
+    """
+    Add and remove several favorites for the current user at once.
+    
+    Both sets are applied in one transaction with a fixed number of
+    queries: a lock of the user row, one lookup of the bars to add, one of
+    the user's favorites among the IDs, one INSERT ... ON CONFLICT DO
+    NOTHING, one DELETE ... WHERE bar_id IN (...) and one favorites_count
+    UPDATE per direction. Adding a
+    favorite that already exists or removing one that does not is a no-op,
+    so offline clients can safely replay their queued changes.
+    
+    Args:
+        request: HTTP request with authentication and a body of the form
+            {"add": [bar IDs], "remove": [bar IDs]}
+        
+    Returns:
+        Response: The user's favorite bar IDs after the update and the IDs
+        from "add" that do not match any bar
+    """
+    try:
+        add = _parse_bar_ids(request.data.get('add'))
+        remove = _parse_bar_ids(request.data.get('remove'))
+    except (AttributeError, ValueError):
+        return Response(
+            {"error": "'add' and 'remove' must be lists of bar IDs"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if add & remove:
+        return Response(
+            {"error": "Bar IDs cannot be both added and removed"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(add) + len(remove) > BULK_FAVORITES_MAX_IDS:
+        return Response(
+            {"error": f"At most {BULK_FAVORITES_MAX_IDS} bar IDs per request"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        with transaction.atomic():
+            _lock_favorites(request.user)
+            existing = set(Bar.objects.filter(pk__in=add).values_list('pk', flat=True)) if add else set()
+            current = set(Favorite.objects.filter(
+                user=request.user, bar_id__in=existing | remove
+            ).values_list('bar_id', flat=True)) if existing or remove else set()
+            added = existing - current
+            removed = remove & current
+            if added:
+                Favorite.objects.bulk_create(
+                    [Favorite(user=request.user, bar_id=bar_id) for bar_id in added],
+                    ignore_conflicts=True,
+                )
+                Bar.objects.adjust_favorites_count(added, 1)
+            if removed:
+                Favorite.objects.filter(user=request.user, bar_id__in=removed).delete()
+                Bar.objects.adjust_favorites_count(removed, -1)
+        invalidate_favorite_ids(request.user.pk)
+
+        favorite_ids = get_favorite_ids(request.user)
+        return Response({
+            "favorites": sorted(favorite_ids.bar_ids),
+            "not_found": sorted(add - existing),
+        })
+    except Exception as e:
+        logger.error(f"Error updating favorites: {str(e)}")
+        return Response(
+            {"error": "Failed to update favorites."},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )